@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+HyprNova Benchmark
+
+Times each stage of the install pipeline against synthetic fixtures, cold
+(empty caches) and warm (caches from the previous run), and compares the
+results with a saved baseline.
+
+    python benchmark.py                                 # print timings
+    python benchmark.py --save-baseline baseline.json   # record a baseline
+    python benchmark.py --baseline baseline.json        # fail on regressions
+"""
+
+import os
+import sys
+import argparse
+import importlib.util
+import json
+import logging
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Optional
+
+BASELINE_VERSION = 1
+
+# Stages that finish faster than this are compared against this floor instead,
+# so timer noise on tiny numbers doesn't read as a regression
+MIN_COMPARED_SECONDS = 0.002
+
+logger = logging.getLogger("hyprnova.benchmark")
+
+def load_installer_module(script_dir: Path):
+    """Import the installer that sits next to this script (main.py in a checkout, python-installer.py in .setup)"""
+    for name in ["main.py", "python-installer.py"]:
+        path = script_dir / name
+        if path.exists():
+            spec = importlib.util.spec_from_file_location("hyprnova_installer", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+    raise FileNotFoundError(f"No installer found in {script_dir}")
+
+def component_sources(script_dir: Path) -> Dict[str, Path]:
+    """Map component names to their installer files, from components/ or *-component.py"""
+    components_dir = script_dir / "components"
+    if components_dir.exists():
+        return {path.stem: path for path in sorted(components_dir.glob("*.py")) if not path.name.startswith("_")}
+    return {
+        path.name[:-len("-component.py")].replace("-", "_"): path
+        for path in sorted(script_dir.glob("*-component.py"))
+    }
+
+class Fixture:
+    """
+    A synthetic HyprNova checkout and home directory
+
+    Args:
+        root: Directory to build the fixture in
+        scale: Multiplier for every fixture size
+        components: Component name to installer file, copied into the fixture
+    """
+
+    def __init__(self, root: Path, scale: float, components: Dict[str, Path]):
+        self.root = root
+        self.repo = root / "repo"
+        self.home = root / "home"
+        self.config_dir = self.home / ".config"
+        self.variables = int(2000 * scale)
+        self.templates = max(1, int(20 * scale))
+        self.template_slots = int(2000 * scale)
+        self.modules = int(100 * scale)
+        self.tree_dirs = int(200 * scale)
+        self.tree_files = 10
+        self.components = components
+
+    def build(self):
+        """Write the fixture from scratch"""
+        shutil.rmtree(self.root, ignore_errors=True)
+        (self.repo / "colors").mkdir(parents=True)
+        (self.repo / "components").mkdir()
+        (self.repo / "waybar" / "modules").mkdir(parents=True)
+        self.config_dir.mkdir(parents=True)
+
+        # A large palette with reference chains, on top of the shipped names
+        lines = ["# HyprNova Benchmark Theme - Complete Color Definitions"]
+        for index in range(self.variables):
+            if index % 4 == 0:
+                lines.append(f"$bench-{index} = rgb({index % 256}, {index * 7 % 256}, {index * 13 % 256})  # base")
+            else:
+                lines.append(f"$bench-{index} = $bench-{index - index % 4}")
+        shipped = Path(__file__).resolve().parent.parent / "colors" / "default.conf"
+        if not shipped.exists():
+            shipped = Path(__file__).resolve().parent / "colors" / "default.conf"
+        base = shipped.read_text() if shipped.exists() else ""
+        (self.repo / "colors" / "default.conf").write_text(base + "\n" + "\n".join(lines) + "\n")
+
+        for name, path in self.components.items():
+            shutil.copy2(path, self.repo / "components" / f"{name}.py")
+
+        # A component that renders several big templates
+        (self.repo / "templates").mkdir()
+        for index in range(self.templates):
+            slots = "\n".join(
+                f".rule-{slot} {{ color: $bench-{slot % self.variables}|hex; background: ${{bench-{(slot * 3) % self.variables}}}; }}"
+                for slot in range(self.template_slots)
+            )
+            (self.repo / "templates" / f"bench-{index}.css.template").write_text(slots + "\n")
+        (self.repo / "components" / "bench_templates.py").write_text(
+            '"""Benchmark component rendering every template in templates/"""\n'
+            "def install(context):\n"
+            '    for template in sorted((context["repo_root"] / "templates").glob("*.template")):\n'
+            '        output = context["config_dir"] / "bench" / template.name[:-len(".template")]\n'
+            '        if not context["render_template"](template, output):\n'
+            "            return False\n"
+            "    return True\n"
+        )
+
+        for index in range(self.modules):
+            (self.repo / "waybar" / "modules" / f"custom-{index}.jsonc").write_text(
+                f"// Module {index}\n"
+                f'"custom/bench-{index}": {{\n'
+                f'    "format": "{{}} {index}", // label\n'
+                f'    "exec": "echo {index}",\n'
+                f'    "interval": {index % 60 + 1},\n'
+                "},\n"
+            )
+
+        # A deep config tree for backups
+        for index in range(self.tree_dirs):
+            directory = self.config_dir / "deep" / Path(*[f"d{level}" for level in range(index % 8)]) / f"n{index}"
+            directory.mkdir(parents=True, exist_ok=True)
+            for file_index in range(self.tree_files):
+                (directory / f"f{file_index}.conf").write_text(f"key = {index}.{file_index}\n" * 20)
+
+    def reset_caches(self):
+        """Drop everything HyprNova caches or writes, keeping the fixture inputs"""
+        shutil.rmtree(self.repo / ".hyprnova-cache", ignore_errors=True)
+        shutil.rmtree(self.repo / ".oops-pit", ignore_errors=True)
+        for name in list(self.config_dir.iterdir()):
+            if name.name != "deep":
+                shutil.rmtree(name) if name.is_dir() and not name.is_symlink() else name.unlink()
+
+def run_args(**overrides) -> argparse.Namespace:
+    """Arguments the installer expects from its own command line"""
+    values = {"theme": None, "components": None, "jobs": None, "from_image": None,
+              "derive_light": False, "verbose": False}
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+def tree_size(path: Path) -> int:
+    return sum(entry.stat().st_size for entry in path.rglob("*") if entry.is_file())
+
+def measure(action: Callable[[], Any], repeat: int, prepare: Optional[Callable[[], Any]] = None) -> List[float]:
+    """Time `action` `repeat` times, calling `prepare` (untimed) before each run"""
+    timings = []
+    for _ in range(repeat):
+        state = prepare() if prepare else None
+        start = time.perf_counter()
+        action() if state is None else action(state)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def run_benchmarks(module, fixture: Fixture, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Time every stage cold and warm
+
+    Returns:
+        dict: Stage name to {"cold", "warm"} median seconds, plus "items" and
+            "unit" for throughput
+    """
+    color_file = fixture.repo / "colors" / "default.conf"
+    results = {}
+
+    def installer():
+        return module.HyprNovaInstaller(fixture.repo, config_dir=fixture.config_dir)
+
+    def cold_installer():
+        fixture.reset_caches()
+        return installer()
+
+    def warm_installer():
+        return installer()
+
+    def stage(name, action, items, unit, warm_setup=None):
+        cold = measure(action, repeat, cold_installer)
+        if warm_setup:
+            warm_setup()
+        else:
+            action(installer())
+        warm = measure(action, repeat, warm_installer)
+        results[name] = {
+            "cold": statistics.median(cold),
+            "warm": statistics.median(warm),
+            "items": items,
+            "unit": unit,
+        }
+
+    stage("component_index", lambda hn: hn.load_component_index(), len(fixture.components) + 1, "components")
+    stage("component_load", lambda hn: (hn.load_component_index(), hn.load_component_installers()),
+          len(fixture.components) + 1, "components")
+
+    variable_count = sum(1 for line in color_file.read_text().splitlines() if line.startswith("$"))
+    stage("palette_load", lambda hn: hn.load_color_variables(color_file), variable_count, "variables")
+
+    def render(hn):
+        color_vars = hn.load_color_variables(color_file)
+        for template in sorted((fixture.repo / "templates").glob("*.template")):
+            hn.render_template("bench_templates", template, fixture.config_dir / "bench" / template.stem, color_vars)
+        hn.build_cache.save()
+    stage("template_render", render, fixture.templates * fixture.template_slots, "slots")
+
+    deep = fixture.config_dir / "deep"
+    stage("backup", lambda hn: hn.create_backup(deep), fixture.tree_dirs * fixture.tree_files, "files")
+
+    def install(hn):
+        hn.run(run_args())
+    stage("install", install, len(fixture.components) + 1, "components")
+
+    return results
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Names of stage timings that are slower than the baseline by more than `threshold`"""
+    regressions = []
+    for name, timings in results.items():
+        previous = baseline.get("stages", {}).get(name)
+        if not previous:
+            continue
+        for kind in ["cold", "warm"]:
+            limit = max(previous[kind], MIN_COMPARED_SECONDS) * (1 + threshold)
+            if timings[kind] > limit:
+                regressions.append(f"{name} ({kind}): {timings[kind] * 1000:.1f}ms vs {previous[kind] * 1000:.1f}ms")
+    return regressions
+
+def print_report(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]]):
+    print(f"{'Stage':<16} {'Cold':>10} {'Warm':>10} {'Throughput (warm)':>26} {'vs baseline':>14}")
+    for name, timings in results.items():
+        throughput = timings["items"] / timings["warm"] if timings["warm"] else float("inf")
+        change = ""
+        previous = (baseline or {}).get("stages", {}).get(name)
+        if previous and previous["warm"]:
+            change = f"{(timings['warm'] / previous['warm'] - 1) * 100:+.0f}%"
+        print(f"{name:<16} {timings['cold'] * 1000:>8.2f}ms {timings['warm'] * 1000:>8.2f}ms "
+              f"{throughput:>16,.0f} {timings['unit'] + '/s':<9} {change:>14}")
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="HyprNova install pipeline benchmark")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for fixture sizes (default: 1.0)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage; the median is reported (default: 5)")
+    parser.add_argument("--fixture-dir", type=Path, help="Where to build fixtures (default: a temporary directory)")
+    parser.add_argument("--save-baseline", type=Path, metavar="FILE", help="Write the results as a baseline")
+    parser.add_argument("--baseline", type=Path, metavar="FILE", help="Compare with a baseline and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline, as a fraction (default: 0.25)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    script_dir = Path(__file__).resolve().parent
+    module = load_installer_module(script_dir)
+    # The installer's own progress output would swamp the timings
+    logging.getLogger("hyprnova").setLevel(logging.ERROR)
+
+    fixture_root = args.fixture_dir or Path(tempfile.mkdtemp(prefix="hyprnova-bench-"))
+    fixture = Fixture(fixture_root, args.scale, component_sources(script_dir))
+    try:
+        logger.info(f"Building fixtures in {fixture_root}")
+        fixture.build()
+        results = run_benchmarks(module, fixture, args.repeat)
+    finally:
+        if not args.fixture_dir:
+            shutil.rmtree(fixture_root, ignore_errors=True)
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read baseline {args.baseline}: {e}")
+            return 1
+        if baseline.get("version") != BASELINE_VERSION or baseline.get("scale") != args.scale:
+            logger.error(f"Baseline {args.baseline} was recorded with a different version or scale")
+            return 1
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({
+                "version": BASELINE_VERSION,
+                "scale": args.scale,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "stages": results,
+            }, f, indent=2)
+        logger.info(f"Saved baseline to {args.save_baseline}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            for regression in regressions:
+                logger.error(f"Regression: {regression}")
+            return 1
+        logger.info(f"No stage regressed by more than {args.threshold:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+HyprNova Dunst Component Installer
+"""
+
+import subprocess
+from pathlib import Path
+from typing import Dict, Any
+
+# Resources this component needs before it runs, and the ones it makes available
+REQUIRES = []
+PROVIDES = ["dunst"]
+
+# Used when the repo has no dunst/hyprnova.conf.template
+DEFAULT_TEMPLATE = """# HyprNova notification colors (generated, do not edit)
+
+[global]
+    frame_width = 2
+    separator_color = frame
+    highlight = ${accent-primary}|hexa
+
+[urgency_low]
+    background = ${notification-low-bg}|hexa
+    foreground = ${notification-low-fg}|hexa
+    frame_color = ${notification-low-border}|hexa
+
+[urgency_normal]
+    background = ${notification-normal-bg}|hexa
+    foreground = ${notification-normal-fg}|hexa
+    frame_color = ${notification-normal-border}|hexa
+
+[urgency_critical]
+    background = ${notification-critical-bg}|hexa
+    foreground = ${notification-critical-fg}|hexa
+    frame_color = ${notification-critical-border}|hexa
+"""
+
+def install(context: Dict[str, Any]) -> bool:
+    """
+    Install Dunst notification colors
+    
+    The colors go into a drop-in file under `dunstrc.d`, which Dunst reads
+    after the user's own `dunstrc`, so the rest of the configuration is
+    left alone.
+    
+    Args:
+        context: Installation context containing helper functions and paths
+        
+    Returns:
+        bool: True if installation was successful, False otherwise
+    """
+    logger = context["logger"]
+    repo_root = context["repo_root"]
+    config_dir = context["config_dir"]
+    render_template = context["render_template"]
+    
+    logger.info("Installing Dunst configuration...")
+    
+    template = repo_root / "dunst" / "hyprnova.conf.template"
+    output = config_dir / "dunst" / "dunstrc.d" / "90-hyprnova.conf"
+    
+    if not render_template(template if template.exists() else DEFAULT_TEMPLATE, output):
+        logger.error("Failed to render Dunst colors")
+        return False
+        
+    logger.info("Dunst configuration installed successfully")
+    return True
+
+def reload(context: Dict[str, Any]) -> bool:
+    """
+    Ask a running Dunst to reload its configuration
+    
+    Args:
+        context: Reload context containing the logger and the changed files
+        
+    Returns:
+        bool: True if Dunst reloaded, False otherwise
+    """
+    try:
+        result = subprocess.run(["dunstctl", "reload"], capture_output=True, timeout=5)
+    except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+        context["logger"].debug(f"Could not reload Dunst: {e}")
+        return False
+    return result.returncode == 0
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+HyprNova GTK Component Installer
+"""
+
+import subprocess
+from pathlib import Path
+from typing import Dict, Any
+
+# Resources this component needs before it runs, and the ones it makes available
+REQUIRES = []
+PROVIDES = ["gtk"]
+
+# Used when the repo has no gtk/hyprnova-colors.css.template; overrides the
+# named colors of Adwaita and most themes derived from it
+DEFAULT_TEMPLATE = """/* HyprNova GTK colors (generated, do not edit) */
+
+@define-color theme_bg_color ${gtk-bg}|css;
+@define-color theme_fg_color ${gtk-fg}|css;
+@define-color theme_base_color ${gtk-base}|css;
+@define-color theme_text_color ${gtk-text}|css;
+@define-color theme_selected_bg_color ${gtk-selected-bg}|css;
+@define-color theme_selected_fg_color ${gtk-selected-fg}|css;
+@define-color borders ${gtk-border}|css;
+
+@define-color window_bg_color ${gtk-bg}|css;
+@define-color window_fg_color ${gtk-fg}|css;
+@define-color view_bg_color ${gtk-base}|css;
+@define-color view_fg_color ${gtk-text}|css;
+@define-color headerbar_bg_color ${gtk-headerbar-bg}|css;
+@define-color headerbar_fg_color ${gtk-fg}|css;
+@define-color popover_bg_color ${gtk-base}|css;
+@define-color popover_fg_color ${gtk-fg}|css;
+@define-color card_bg_color ${gtk-base}|css;
+@define-color card_fg_color ${gtk-fg}|css;
+@define-color accent_color ${gtk-accent}|css;
+@define-color accent_bg_color ${gtk-selected-bg}|css;
+@define-color accent_fg_color ${gtk-selected-fg}|css;
+@define-color success_color ${accent-success}|css;
+@define-color warning_color ${accent-warning}|css;
+@define-color error_color ${accent-danger}|css;
+
+tooltip {
+    background-color: ${gtk-tooltip-bg}|css;
+    color: ${gtk-tooltip-fg}|css;
+}
+"""
+
+IMPORT_LINE = '@import url("hyprnova-colors.css");'
+
+def install(context: Dict[str, Any]) -> bool:
+    """
+    Install GTK 3 and GTK 4 colors
+    
+    The colors are written to `hyprnova-colors.css` next to each version's
+    `gtk.css`, which gets an import line if it doesn't have one yet.
+    
+    Args:
+        context: Installation context containing helper functions and paths
+        
+    Returns:
+        bool: True if installation was successful, False otherwise
+    """
+    logger = context["logger"]
+    repo_root = context["repo_root"]
+    config_dir = context["config_dir"]
+    render_template = context["render_template"]
+    write_output = context["write_output"]
+    
+    logger.info("Installing GTK colors...")
+    
+    template = repo_root / "gtk" / "hyprnova-colors.css.template"
+    source = template if template.exists() else DEFAULT_TEMPLATE
+    
+    for version_dir in ["gtk-3.0", "gtk-4.0"]:
+        gtk_dir = config_dir / version_dir
+        if not render_template(source, gtk_dir / "hyprnova-colors.css"):
+            logger.error(f"Failed to render {version_dir} colors")
+            return False
+            
+        # Imports must come before any rule, so the line goes first
+        gtk_css = gtk_dir / "gtk.css"
+        content = gtk_css.read_text() if gtk_css.exists() else ""
+        if IMPORT_LINE not in content:
+            logger.info(f"Adding HyprNova colors import to {gtk_css}")
+            write_output(gtk_css, f"{IMPORT_LINE}\n{content}")
+                
+    logger.info("GTK colors installed successfully")
+    return True
+
+# gsettings key GTK 3 apps watch; the CSS is only re-read when the theme changes
+THEME_KEY = ["org.gnome.desktop.interface", "gtk-theme"]
+
+def reload(context: Dict[str, Any]) -> bool:
+    """
+    Make running GTK 3 apps re-read gtk.css
+    
+    GTK has no reload signal, so the gsettings theme is switched to another
+    built-in theme and straight back, which makes every app reload its CSS.
+    
+    Args:
+        context: Reload context containing the logger and the changed files
+        
+    Returns:
+        bool: True if the theme was toggled, False otherwise
+    """
+    logger = context["logger"]
+    try:
+        result = subprocess.run(["gsettings", "get", *THEME_KEY], capture_output=True, text=True, timeout=5)
+        if result.returncode != 0:
+            logger.debug(f"Could not read the GTK theme: {result.stderr.strip()}")
+            return False
+        theme = result.stdout.strip().strip("'")
+        other = "HighContrast" if theme != "HighContrast" else "Adwaita"
+        subprocess.run(["gsettings", "set", *THEME_KEY, other], capture_output=True, timeout=5)
+        result = subprocess.run(["gsettings", "set", *THEME_KEY, theme], capture_output=True, timeout=5)
+    except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+        logger.debug(f"Could not reload GTK: {e}")
+        return False
+    return result.returncode == 0
@@ -4,10 +4,15 @@ HyprNova Hyprland Component Installer
 """
 
 import os
+import subprocess
 from pathlib import Path
 import shutil
 from typing import Dict, Any
 
+# Resources this component needs before it runs, and the ones it makes available
+REQUIRES = ["themes"]
+PROVIDES = ["hyprland"]
+
 def install(context: Dict[str, Any]) -> bool:
     """
     Install Hyprland configuration
@@ -24,16 +29,16 @@ def install(context: Dict[str, Any]) -> bool:
     colors_dir = context["colors_dir"]
     create_backup = context["create_backup"]
     create_symlink = context["create_symlink"]
+    write_output = context["write_output"]
     color_vars = context["color_vars"]
     
     logger.info("Installing Hyprland configuration...")
     
-    # Create Hyprland config directory
+    # Hyprland config directory (created on first write)
     hypr_dir = config_dir / "hypr"
-    hypr_dir.mkdir(parents=True, exist_ok=True)
     
-    # Create symlink for colors
-    colors_file = colors_dir / "default.conf"
+    # Create symlink for the selected theme's colors
+    colors_file = context.get("color_file", colors_dir / "default.conf")
     hypr_colors = hypr_dir / "colors.conf"
     create_symlink(colors_file, hypr_colors)
     
@@ -56,18 +61,32 @@ def install(context: Dict[str, Any]) -> bool:
             
         if source_line not in content:
             logger.info("Adding appearance.conf source line to hyprland.conf")
-            create_backup(hypr_conf)
-            
-            with open(hypr_conf, "a") as f:
-                f.write(f"\n# HyprNova theme configuration\n{source_line}\n")
+            write_output(hypr_conf, f"{content}\n# HyprNova theme configuration\n{source_line}\n")
         else:
             logger.info("appearance.conf already sourced in hyprland.conf")
     else:
         logger.warning(f"hyprland.conf not found at {hypr_conf}")
         logger.info("Creating minimal hyprland.conf with theme configuration")
         
-        with open(hypr_conf, "w") as f:
-            f.write(f"# HyprNova minimal Hyprland configuration\n{source_line}\n")
+        write_output(hypr_conf, f"# HyprNova minimal Hyprland configuration\n{source_line}\n")
             
     logger.info("Hyprland configuration installed successfully")
     return True
+
+
+def reload(context: Dict[str, Any]) -> bool:
+    """
+    Ask a running Hyprland to reload its configuration
+    
+    Args:
+        context: Reload context containing the logger and the changed files
+        
+    Returns:
+        bool: True if Hyprland accepted the reload, False otherwise
+    """
+    try:
+        result = subprocess.run(["hyprctl", "reload"], capture_output=True, timeout=5)
+    except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+        context["logger"].debug(f"Could not reload Hyprland: {e}")
+        return False
+    return result.returncode == 0
@@ -7,13 +7,41 @@ A modular theme installer for Hyprland and associated tools
 import os
 import sys
 import argparse
+import ast
+import base64
+import ctypes
+import ctypes.util
+import difflib
+import fcntl
+import fnmatch
+import hashlib
 import importlib.util
+import io
+import json
 import logging
+import math
+import mmap
+import re
+import select
 from pathlib import Path
 import subprocess
 import shutil
-from typing import List, Dict, Any, Optional, Callable
-import yaml
+import tarfile
+import signal
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache, partial
+from typing import List, Dict, Any, Optional, Callable, Union, Set, Tuple
+from collections import ChainMap
+from collections.abc import Mapping
 
 # Set up logging
 logging.basicConfig(
@@ -23,149 +51,2361 @@ logging.basicConfig(
 )
 logger = logging.getLogger("hyprnova")
 
+# rgb(r, g, b) / rgba(r, g, b, a) with decimal channels
+CSS_COLOR = re.compile(r"rgba?\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*(?:,\s*([\d.]+)\s*)?\)")
+# Hyprland's rgb(rrggbb) / rgba(rrggbbaa), CSS #rrggbb[aa] and 0xAARRGGBB
+HEX_COLOR = re.compile(r"(?:rgba?\(|#)([0-9a-fA-F]{6}|[0-9a-fA-F]{8})\)?|0x([0-9a-fA-F]{8})")
+
+@lru_cache(maxsize=None)
+def parse_color(value: str) -> Optional[Tuple[int, int, int, float]]:
+    """Parse a single color value into (r, g, b, alpha), or None if it isn't one"""
+    value = value.strip()
+    match = CSS_COLOR.fullmatch(value)
+    if match:
+        r, g, b = (min(int(channel), 255) for channel in match.group(1, 2, 3))
+        return (r, g, b, float(match.group(4)) if match.group(4) else 1.0)
+    match = HEX_COLOR.fullmatch(value)
+    if match:
+        if match.group(2):
+            digits = match.group(2)
+            return (int(digits[2:4], 16), int(digits[4:6], 16), int(digits[6:8], 16), int(digits[0:2], 16) / 255)
+        digits = match.group(1)
+        alpha = int(digits[6:8], 16) / 255 if len(digits) == 8 else 1.0
+        return (int(digits[0:2], 16), int(digits[2:4], 16), int(digits[4:6], 16), alpha)
+    return None
+
+def _color_channels(rgba: Tuple[int, int, int, float]) -> str:
+    return f"{rgba[0]}, {rgba[1]}, {rgba[2]}"
+
+# Conversions of a parsed color, keyed by format name
+COLOR_FORMATTERS = {
+    "hex": lambda rgba: "#{:02x}{:02x}{:02x}".format(*rgba[:3]),
+    "hexa": lambda rgba: "#{:02x}{:02x}{:02x}{:02x}".format(*rgba[:3], round(rgba[3] * 255)),
+    "rgb": lambda rgba: f"rgb({_color_channels(rgba)})",
+    "rgba": lambda rgba: f"rgba({_color_channels(rgba)}, {rgba[3]:g})",
+    # CSS: hex when opaque, rgba() otherwise
+    "css": lambda rgba: COLOR_FORMATTERS["rgba" if rgba[3] < 1 else "hex"](rgba),
+    # Qt stylesheets and palettes put alpha first
+    "qt": lambda rgba: "#{:02x}{:02x}{:02x}{:02x}".format(round(rgba[3] * 255), *rgba[:3]),
+}
+
+# A color inside a larger value, and a Hyprland gradient: colors followed by an optional angle
+COLOR_TOKEN = re.compile(r"rgba?\([^)]*\)|#[0-9a-fA-F]{6,8}\b|0x[0-9a-fA-F]{8}\b")
+GRADIENT = re.compile(r"((?:(?:%s)\s*)+?)\s*(-?[\d.]+deg)?" % COLOR_TOKEN.pattern)
+
+@lru_cache(maxsize=None)
+def parse_gradient(value: str) -> Optional[Tuple[Tuple[Tuple[int, int, int, float], ...], Optional[str]]]:
+    """Split a gradient like `rgb(...) rgb(...) 45deg` into parsed colors and its angle, or None"""
+    match = GRADIENT.fullmatch(value.strip())
+    if not match:
+        return None
+    colors = tuple(parse_color(token) for token in COLOR_TOKEN.findall(match.group(1)))
+    if None in colors:
+        return None
+    return colors, match.group(2)
+
+@lru_cache(maxsize=None)
+def emit_color(value: str, format_name: str) -> str:
+    """
+    Render a color value in another format, memoized per value and format
+
+    Single colors go through COLOR_FORMATTERS. Gradients are converted color
+    by color and keep their angle, except for the `gradient` format, which
+    emits a CSS linear-gradient(). Anything else is returned unchanged.
+    """
+    gradient = parse_gradient(value)
+    if not gradient:
+        return value
+    colors, angle = gradient
+    if format_name == "gradient":
+        stops = [COLOR_FORMATTERS["css"](rgba) for rgba in colors]
+        if len(stops) == 1:
+            return stops[0]
+        return f"linear-gradient({', '.join(([angle] if angle else []) + stops)})"
+    parts = [COLOR_FORMATTERS[format_name](rgba) for rgba in colors]
+    return " ".join(parts + ([angle] if angle else []))
+
+# Formats a template can ask for with `$name|format`, longest first for the slot pattern
+COLOR_EMITTERS = sorted(list(COLOR_FORMATTERS) + ["gradient"], key=len, reverse=True)
+
+# Template slots: `$name` or `${name}`, either optionally followed by `|format`.
+# Names match exactly: `$bg-80` is the variable `bg-80`, never `$bg` followed by
+# "-80". Use the braced form to put text right after a variable, e.g. `${bg}-80`.
+TEMPLATE_SLOT = re.compile(
+    r"(?:\$\{([A-Za-z0-9_-]+)\}|\$([A-Za-z0-9_-]+))(?:\|(%s)(?![A-Za-z0-9_-]))?" % "|".join(COLOR_EMITTERS)
+)
+
+class CompiledTemplate:
+    """A template tokenized into literal chunks and variable slots"""
+
+    def __init__(self, text: str):
+        self._text = text
+        self._digest = None
+        # Each chunk is (literal, slot name, original slot text, braced, format)
+        self.chunks = []
+        self.names = set()
+        pos = 0
+        for match in TEMPLATE_SLOT.finditer(text):
+            braced = match.group(1) is not None
+            name = match.group(1) if braced else match.group(2)
+            format_name = match.group(3)
+            raw = match.group(0)[:-len(format_name) - 1] if format_name else match.group(0)
+            self.chunks.append((text[pos:match.start()], name, raw, braced, format_name))
+            self.names.add(name)
+            pos = match.end()
+        self.tail = text[pos:]
+
+    @property
+    def digest(self) -> str:
+        """Hash of the template text, computed on first use (color values never need it)"""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self._text.encode()).hexdigest()
+        return self._digest
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        """Render the template in one pass over its chunks"""
+        parts = []
+        for literal, name, raw, braced, format_name in self.chunks:
+            parts.append(literal)
+            value = variables.get(name)
+            if value is not None:
+                parts.append(emit_color(str(value), format_name) if format_name else str(value))
+                continue
+            # Unresolved slots are left as written, filter included
+            parts.append(raw)
+            if format_name:
+                parts.append(f"|{format_name}")
+        parts.append(self.tail)
+        return "".join(parts)
+
+    def fingerprint(self, variables: Dict[str, Any]) -> str:
+        """Hash of the variable values this template actually uses"""
+        used = []
+        for name in sorted(self.names):
+            value = variables.get(name)
+            if value is not None:
+                used.append(f"{name}={value}")
+        return hashlib.sha256("\0".join(used).encode()).hexdigest()
+
+    def unresolved(self, variables: Dict[str, Any]) -> List[Tuple[str, int]]:
+        """Slots with no value in `variables`, as (name, line number) pairs"""
+        missing = []
+        line = 1
+        for literal, name, raw, braced, format_name in self.chunks:
+            line += literal.count("\n")
+            if variables.get(name) is None:
+                missing.append((name, line))
+            line += raw.count("\n")
+        return missing
+
+class TemplateEngine:
+    """Compiles templates once and caches the compiled form"""
+
+    def __init__(self):
+        self._files = {}
+        self._strings = {}
+
+    def compile(self, text: str) -> CompiledTemplate:
+        """Compile template text, reusing a cached result for identical text"""
+        compiled = self._strings.get(text)
+        if compiled is None:
+            compiled = CompiledTemplate(text)
+            self._strings[text] = compiled
+        return compiled
+
+    def load(self, template_path: Path) -> CompiledTemplate:
+        """Compile a template file, recompiling only when it changes on disk"""
+        stat = template_path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._files.get(template_path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        with open(template_path, "r") as f:
+            compiled = self.compile(f.read())
+        self._files[template_path] = (key, compiled)
+        return compiled
+
+# Bump to invalidate every cached output when the render pipeline changes
+BUILD_CACHE_VERSION = 2
+
+class BuildCache:
+    """Persisted manifest of rendered outputs keyed by a hash of their inputs (in memory only without a path)"""
+
+    def __init__(self, manifest_path: Optional[Path]):
+        self.manifest_path = manifest_path
+        self.entries = {}
+        self.dirty = False
+
+        if manifest_path and manifest_path.exists():
+            try:
+                with open(manifest_path, "r") as f:
+                    data = json.load(f)
+                if data.get("version") == BUILD_CACHE_VERSION:
+                    self.entries = data.get("outputs", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable build manifest {manifest_path}: {e}")
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        """Combine input hashes into a single cache key"""
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def is_fresh(self, output_path: Path, key: str) -> bool:
+        """Check that output_path was produced from `key` and hasn't been touched since"""
+        entry = self.entries.get(str(output_path))
+        if not entry or entry["key"] != key:
+            return False
+        try:
+            stat = output_path.stat()
+        except OSError:
+            return False
+        return entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+
+    def record(self, output_path: Path, key: str):
+        """Remember the key that produced the current contents of output_path"""
+        stat = output_path.stat()
+        self.entries[str(output_path)] = {
+            "key": key,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        self.dirty = True
+
+    def save(self):
+        """Write the manifest if anything changed"""
+        if not self.dirty or not self.manifest_path:
+            return
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": BUILD_CACHE_VERSION, "outputs": self.entries}, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self.dirty = False
+
+# Bump to rebuild the component index when its entry format changes
+COMPONENT_INDEX_VERSION = 1
+
+# Linux ioctl to share extents with another file (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+class BackupStore:
+    """
+    Content-addressed backup store
+    
+    File contents live once under objects/<hash>, and each installer run
+    writes a manifest under runs/<run id>.json that only references them.
+    """
+
+    def __init__(self, root: Path, run_id: Optional[str] = None):
+        self.root = root
+        self.objects_dir = root / "objects"
+        self.runs_dir = root / "runs"
+        self.run_id = run_id or self._new_run_id()
+        self.entries = {}
+        self._stat_cache = None
+        self._lock = threading.Lock()
+        self._deferred = 0
+
+    def _new_run_id(self) -> str:
+        run_id = time.strftime("%Y%m%d_%H%M%S")
+        suffix = 1
+        while (self.runs_dir / f"{run_id}.json").exists():
+            run_id = f"{run_id.split('.')[0]}.{suffix}"
+            suffix += 1
+        return run_id
+
+    @staticmethod
+    def run_order(run_id: str) -> Tuple[str, int]:
+        """Sort key for run ids, so `20250101_120000.10` comes after `.2`"""
+        timestamp, _, suffix = run_id.partition(".")
+        return timestamp, int(suffix) if suffix.isdigit() else 0
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.runs_dir / f"{self.run_id}.json"
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def _load_stat_cache(self) -> Dict[str, list]:
+        if self._stat_cache is None:
+            self._stat_cache = {}
+            cache_file = self.root / "stat-cache.json"
+            if cache_file.exists():
+                try:
+                    with open(cache_file, "r") as f:
+                        self._stat_cache = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        return self._stat_cache
+
+    @staticmethod
+    def hash_file(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def clone_file(source: Path, destination: Path):
+        """Copy a file, sharing extents via reflink when the filesystem allows it"""
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return
+            except OSError:
+                pass
+            shutil.copyfileobj(src, dst, 1 << 20)
+
+    def _digest(self, path: Path, file_stat: os.stat_result) -> str:
+        """Hash a file's contents, reusing the stat cache when the file is unchanged"""
+        stat_key = [file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns]
+        with self._lock:
+            cached = self._load_stat_cache().get(str(path))
+        if cached and cached[:4] == stat_key and self.object_path(cached[4]).exists():
+            return cached[4]
+        return self.hash_file(path)
+
+    def _store_file(self, path: Path, file_stat: os.stat_result) -> Dict[str, Any]:
+        """Store a regular file's contents, skipping files already in the store"""
+        digest = self._digest(path, file_stat)
+        object_path = self.object_path(digest)
+        if not object_path.exists():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=object_path.parent, prefix=".tmp-")
+            os.close(fd)
+            try:
+                self.clone_file(path, Path(tmp_name))
+                os.chmod(tmp_name, 0o444)
+                os.replace(tmp_name, object_path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        with self._lock:
+            self._stat_cache[str(path)] = [
+                file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns, digest
+            ]
+
+        return {
+            "type": "file",
+            "hash": digest,
+            "mode": stat.S_IMODE(file_stat.st_mode),
+            "size": file_stat.st_size,
+            "mtime_ns": file_stat.st_mtime_ns,
+        }
+
+    def _snapshot(self, path: Path) -> Dict[str, Any]:
+        """Describe the current state of a single path, storing file contents"""
+        file_stat = path.lstat()
+        if stat.S_ISLNK(file_stat.st_mode):
+            return {"type": "symlink", "target": os.readlink(path)}
+        if stat.S_ISDIR(file_stat.st_mode):
+            return {"type": "dir", "mode": stat.S_IMODE(file_stat.st_mode)}
+        return self._store_file(path, file_stat)
+
+    def backup(self, path: Path) -> Dict[str, Dict[str, Any]]:
+        """Snapshot a file, symlink or directory tree into the current run"""
+        entries = {str(path): self._snapshot(path)}
+        if entries[str(path)]["type"] == "dir":
+            for root, dirs, files in os.walk(path):
+                for name in dirs + files:
+                    child = Path(root) / name
+                    entries[str(child)] = self._snapshot(child)
+                    
+        with self._lock:
+            # The first snapshot of a path in a run is the one to restore
+            for entry_path, entry in entries.items():
+                self.entries.setdefault(entry_path, entry)
+            self.save()
+        return entries
+
+    def record_absent(self, path: Path):
+        """Remember that a path did not exist, so restoring this run removes it"""
+        with self._lock:
+            if str(path) not in self.entries:
+                self.entries[str(path)] = {"type": "absent"}
+                self.save()
+
+    def matches(self, path: Path, entry: Dict[str, Any]) -> bool:
+        """Check whether a path is already in the state an entry describes"""
+        try:
+            current = path.lstat()
+        except FileNotFoundError:
+            return entry["type"] == "absent"
+            
+        if entry["type"] == "symlink":
+            return stat.S_ISLNK(current.st_mode) and os.readlink(path) == entry["target"]
+        if entry["type"] == "dir":
+            return stat.S_ISDIR(current.st_mode)
+        if entry["type"] == "file":
+            return (
+                stat.S_ISREG(current.st_mode)
+                and current.st_size == entry["size"]
+                and stat.S_IMODE(current.st_mode) == entry["mode"]
+                and self._digest(path, current) == entry["hash"]
+            )
+        return False
+
+    def restore(self, entries: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Bring paths back to the states recorded in `entries`
+        
+        Replacement files and symlinks are staged next to their targets and
+        only renamed into place once all of them staged cleanly. Paths that
+        already match are not touched. Whatever gets replaced is snapshotted
+        into the current run first, so a restore can itself be rolled back.
+        """
+        staged = []
+        removals = []
+        created_dirs = []
+        unchanged = 0
+        try:
+            for index, path_str in enumerate(sorted(entries)):
+                entry = entries[path_str]
+                path = Path(path_str)
+                if self.matches(path, entry):
+                    unchanged += 1
+                    continue
+                if entry["type"] == "absent":
+                    removals.append(path)
+                    continue
+                if path.is_dir() and not path.is_symlink():
+                    raise IsADirectoryError(f"Refusing to replace directory {path} with a {entry['type']}")
+                    
+                # Remember every directory made here, so a failed restore can take them away again
+                missing = [parent for parent in path.parents if not parent.exists()]
+                for parent in reversed(missing):
+                    parent.mkdir(exist_ok=True)
+                    created_dirs.append(parent)
+                if entry["type"] == "dir":
+                    path.mkdir(mode=entry["mode"])
+                    created_dirs.append(path)
+                    continue
+                    
+                tmp_path = path.parent / f".{path.name}.restore-{os.getpid()}-{index}"
+                # Listed before it exists, so a half-written copy is cleaned up too
+                staged.append((tmp_path, path))
+                if entry["type"] == "symlink":
+                    os.symlink(entry["target"], tmp_path)
+                else:
+                    self.clone_file(self.object_path(entry["hash"]), tmp_path)
+                    os.chmod(tmp_path, entry["mode"])
+        except BaseException:
+            for tmp_path, _ in staged:
+                tmp_path.unlink(missing_ok=True)
+            for directory in reversed(created_dirs):
+                try:
+                    directory.rmdir()
+                except OSError as e:
+                    logger.warning(f"Could not remove {directory} after a failed restore: {e}")
+            raise
+            
+        # Snapshot the state being replaced before anything moves
+        for path in [path for _, path in staged] + removals:
+            if path.exists() or path.is_symlink():
+                self.backup(path)
+            else:
+                self.record_absent(path)
+                
+        for tmp_path, path in staged:
+            os.replace(tmp_path, path)
+        removed = 0
+        for path in removals:
+            if path.is_dir() and not path.is_symlink():
+                logger.warning(f"Leaving directory in place: {path}")
+                continue
+            path.unlink()
+            removed += 1
+            
+        return {"restored": len(staged), "removed": removed, "unchanged": unchanged}
+
+    @contextmanager
+    def deferred(self):
+        """Save once when the block ends instead of after every backup (for bulk writes)"""
+        with self._lock:
+            self._deferred += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._deferred -= 1
+                if not self._deferred:
+                    self.save()
+
+    def save(self):
+        """Write the run manifest and stat cache (unless saving is deferred)"""
+        if self._deferred:
+            return
+        self.runs_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"run": self.run_id, "entries": self.entries}, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        
+        if self._stat_cache is not None:
+            cache_file = self.root / "stat-cache.json"
+            tmp_path = cache_file.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._stat_cache, f)
+            os.replace(tmp_path, cache_file)
+
+    def list_runs(self) -> List[str]:
+        """Run ids, oldest first"""
+        if not self.runs_dir.exists():
+            return []
+        return sorted((manifest.stem for manifest in self.runs_dir.glob("*.json")), key=self.run_order)
+
+    def load_run(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        with open(self.runs_dir / f"{run_id}.json", "r") as f:
+            return json.load(f)["entries"]
+
+    def gc(self, keep: int) -> Dict[str, int]:
+        """Delete all but the newest `keep` runs, then every object no run references"""
+        runs = self.list_runs()
+        pruned_runs = runs[:-keep] if keep > 0 else runs
+        for run_id in pruned_runs:
+            (self.runs_dir / f"{run_id}.json").unlink()
+            
+        referenced = set()
+        for run_id in self.list_runs():
+            for entry in self.load_run(run_id).values():
+                if entry["type"] == "file":
+                    referenced.add(entry["hash"])
+                    
+        pruned_objects = 0
+        freed = 0
+        if self.objects_dir.exists():
+            for object_path in self.objects_dir.glob("*/*"):
+                if object_path.name not in referenced:
+                    freed += object_path.stat().st_size
+                    object_path.unlink()
+                    pruned_objects += 1
+                    
+        stat_cache = self._load_stat_cache()
+        for cached_path in [key for key, value in stat_cache.items() if value[4] not in referenced]:
+            del stat_cache[cached_path]
+        cache_file = self.root / "stat-cache.json"
+        if cache_file.exists() or stat_cache:
+            with open(cache_file, "w") as f:
+                json.dump(stat_cache, f)
+                
+        return {"runs": len(pruned_runs), "objects": pruned_objects, "bytes": freed}
+
+PLAN_VERSION = 1
+
+class ChangePlan:
+    """
+    The changes an install would make, collected instead of applied
+    
+    Writes and symlinks go to an in-memory overlay keyed by path, and backups
+    are only listed. Each change remembers the state of its path when it was
+    planned, so a saved plan can later be applied without re-rendering and
+    refuses to overwrite anything that changed in between.
+    """
+
+    def __init__(self):
+        self.changes = {}
+        self.backups = {}
+
+    @staticmethod
+    def state(path: Path) -> Optional[str]:
+        """Fingerprint of what is at `path` now (None when nothing is)"""
+        try:
+            file_stat = path.lstat()
+        except FileNotFoundError:
+            return None
+        if stat.S_ISLNK(file_stat.st_mode):
+            return f"symlink:{os.readlink(path)}"
+        if stat.S_ISDIR(file_stat.st_mode):
+            return "dir"
+        return BackupStore.hash_file(path)
+
+    def __contains__(self, path: Path) -> bool:
+        return str(path) in self.changes
+
+    def content(self, path: Path) -> Optional[bytes]:
+        """Planned contents of a file, or None if the plan doesn't write it"""
+        change = self.changes.get(str(path))
+        return change["content"] if change and change["action"] != "symlink" else None
+
+    def _record(self, path: Path, change: Dict[str, Any]):
+        previous = self.changes.get(str(path))
+        # A path planned twice keeps the state it had before the first change
+        change["before"] = previous["before"] if previous else self.state(path)
+        self.changes[str(path)] = change
+
+    def write(self, path: Path, data: bytes, component_name: Optional[str] = None):
+        """Plan replacing a file's contents"""
+        if path.is_file():
+            old_size = path.stat().st_size
+            action = "append" if len(data) > old_size and data.startswith(path.read_bytes()) else "modify"
+        else:
+            action = "create"
+        self._record(path, {"action": action, "component": component_name, "content": data})
+
+    def symlink(self, source: Path, target: Path, component_name: Optional[str] = None):
+        """Plan pointing `target` at `source`"""
+        self._record(target, {"action": "symlink", "component": component_name, "target": str(source)})
+
+    def backup(self, path: Path):
+        """Note that `path` would be saved to the backup store"""
+        self.backups.setdefault(str(path), path.exists() or path.is_symlink())
+
+    def diff(self, path: str) -> str:
+        """Unified diff of a planned change against what is on disk now"""
+        change = self.changes[path]
+        current = Path(path)
+        if change["action"] == "symlink":
+            before = f"-> {os.readlink(current)}\n" if current.is_symlink() else ""
+            lines = difflib.unified_diff(before.splitlines(True), [f"-> {change['target']}\n"],
+                                         f"a{path}" if before else "/dev/null", f"b{path}")
+            return "".join(lines)
+            
+        old = current.read_bytes() if current.is_file() else b""
+        try:
+            old_text = old.decode()
+            new_text = change["content"].decode()
+        except UnicodeDecodeError:
+            return f"Binary files a{path} and b{path} differ ({len(old)} -> {len(change['content'])} bytes)\n"
+            
+        lines = difflib.unified_diff(old_text.splitlines(True), new_text.splitlines(True),
+                                     f"a{path}" if current.is_file() else "/dev/null", f"b{path}")
+        # Keep the diff well-formed when either side lacks a final newline
+        return "".join(line if line.endswith("\n") else line + "\n\\ No newline at end of file\n" for line in lines)
+
+    def summary(self) -> Dict[str, int]:
+        counts = {}
+        for change in self.changes.values():
+            counts[change["action"]] = counts.get(change["action"], 0) + 1
+        return counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        changes = []
+        for path, change in self.changes.items():
+            entry = {"path": path, **change}
+            if "content" in entry:
+                try:
+                    entry["content"] = change["content"].decode()
+                except UnicodeDecodeError:
+                    entry["content_base64"] = base64.b64encode(entry.pop("content")).decode()
+            changes.append(entry)
+        return {"version": PLAN_VERSION, "changes": changes, "backups": self.backups}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChangePlan":
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(f"unsupported plan version {data.get('version')}")
+        plan = cls()
+        for entry in data["changes"]:
+            change = dict(entry)
+            path = change.pop("path")
+            if "content_base64" in change:
+                change["content"] = base64.b64decode(change.pop("content_base64"))
+            elif "content" in change:
+                change["content"] = change["content"].encode()
+            plan.changes[path] = change
+        plan.backups = dict(data.get("backups", {}))
+        return plan
+
+    def save(self, path: Path):
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ChangePlan":
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+class ColorGraphError(Exception):
+    """Raised when color variables reference undefined names or form a cycle"""
+
+class ColorGraph:
+    """
+    Color variables with memoized, cycle-checked `$var` reference resolution
+    
+    Values are only tokenized when first resolved, so resolving a few names
+    of a large theme doesn't pay for the rest.
+    """
+
+    def __init__(self):
+        self.raw = {}
+        self.sources = {}
+        self._templates = {}
+        self._deps = {}
+        self._dependents = None
+        self._resolved = {}
+
+    def define(self, name: str, value: str, source: Optional[str] = None):
+        """Define or redefine a variable, dropping any cached resolutions it affects"""
+        if name in self.raw:
+            self.invalidate(name)
+        else:
+            # A new name may satisfy references that were undefined so far
+            self._deps = {}
+            self._dependents = None
+        self.raw[name] = value
+        self.sources[name] = source
+        self._templates.pop(name, None)
+
+    def invalidate(self, name: str) -> set:
+        """Drop cached values for a variable and everything depending on it"""
+        affected = {name} | self.dependents(name)
+        for affected_name in affected:
+            self._resolved.pop(affected_name, None)
+        self._deps = {}
+        self._dependents = None
+        return affected
+
+    def update(self, name: str, value: str, source: Optional[str] = None) -> set:
+        """Change a single variable and return the names whose values may change"""
+        affected = {name} | (self.dependents(name) if name in self.raw else set())
+        self.define(name, value, source)
+        return affected
+
+    def _describe(self, name: str) -> str:
+        source = self.sources.get(name)
+        return f"${name} ({source})" if source else f"${name}"
+
+    def _template(self, name: str) -> Optional[CompiledTemplate]:
+        """A variable's value tokenized, or None for plain values that resolve to themselves"""
+        if name not in self._templates:
+            value = self.raw[name]
+            self._templates[name] = CompiledTemplate(value) if "$" in value else None
+        return self._templates[name]
+
+    def _build_edges(self):
+        """Build the reverse-dependency index"""
+        dependents = {name: set() for name in self.raw}
+        for name in self.raw:
+            template = self._template(name)
+            for ref in template.names if template else ():
+                if ref in dependents:
+                    dependents[ref].add(name)
+        self._dependents = dependents
+
+    def dependencies(self, name: str) -> List[str]:
+        """Names directly referenced by a variable"""
+        if name not in self._deps:
+            template = self._template(name)
+            targets = sorted(template.names) if template else []
+            for ref in targets:
+                # Only exact names resolve; `$bg-80` never falls back to `$bg`
+                if ref not in self.raw:
+                    raise ColorGraphError(f"Undefined variable ${ref} referenced by {self._describe(name)}")
+            self._deps[name] = targets
+        return self._deps[name]
+
+    def dependents(self, name: str) -> set:
+        """All variables that directly or transitively reference `name`"""
+        if self._dependents is None:
+            self._build_edges()
+        found = set()
+        pending = [name]
+        while pending:
+            for dependent in self._dependents.get(pending.pop(), ()):
+                if dependent not in found:
+                    found.add(dependent)
+                    pending.append(dependent)
+        return found
+
+    def resolve(self, name: str) -> str:
+        """Resolve a single variable, memoizing it and everything it references"""
+        if name in self._resolved:
+            return self._resolved[name]
+        if name not in self.raw:
+            raise ColorGraphError(f"Undefined variable ${name}")
+
+        # Iterative post-order walk so long reference chains can't hit the recursion limit
+        visiting = []
+        on_stack = set()
+        stack = [(name, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if current in self._resolved:
+                continue
+            if expanded:
+                on_stack.discard(current)
+                visiting.pop()
+                template = self._template(current)
+                self._resolved[current] = template.render(self._resolved) if template else self.raw[current]
+                continue
+            if current in on_stack:
+                cycle = visiting[visiting.index(current):] + [current]
+                raise ColorGraphError(
+                    "Reference cycle: " + " -> ".join(self._describe(item) for item in cycle)
+                )
+            on_stack.add(current)
+            visiting.append(current)
+            stack.append((current, True))
+            for dep in self.dependencies(current):
+                if dep not in self._resolved:
+                    if dep in on_stack:
+                        cycle = visiting[visiting.index(dep):] + [dep]
+                        raise ColorGraphError(
+                            "Reference cycle: " + " -> ".join(self._describe(item) for item in cycle)
+                        )
+                    stack.append((dep, False))
+        return self._resolved[name]
+
+    def resolve_all(self) -> Dict[str, str]:
+        """Resolve every variable, preserving definition order"""
+        return {name: self.resolve(name) for name in self.raw}
+
+class ComponentLogBuffer(logging.Handler):
+    """Routes log records into per-component buffers so parallel output stays ordered"""
+
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local()
+
+    @contextmanager
+    def capture(self, records: list):
+        """Buffer records logged by the current thread into `records`"""
+        self._local.records = records
+        try:
+            yield records
+        finally:
+            self._local.records = None
+
+    def emit(self, record: logging.LogRecord):
+        records = getattr(self._local, "records", None)
+        if records is None:
+            logging.getLogger().handle(record)
+        else:
+            records.append(record)
+
+    @staticmethod
+    def replay(records: list):
+        """Send buffered records on to the root handlers"""
+        root = logging.getLogger()
+        for record in records:
+            root.handle(record)
+
+TRACE_REPORT_VERSION = 1
+
+class Span:
+    """A timed operation and the I/O it did, recorded by a Tracer"""
+
+    __slots__ = ("name", "category", "args", "start", "duration", "thread", "_sink")
+
+    def __init__(self, name: Any, category: str, args: Dict[str, Any], sink: list):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+        self.duration = 0
+        self.thread = 0
+        self._sink = sink
+
+    def add(self, counter: str, amount: Union[int, float] = 1):
+        """Add to a counter such as bytes_read, bytes_written, files, cache_hits or cache_misses"""
+        self.args[counter] = self.args.get(counter, 0) + amount
+
+    def __enter__(self):
+        self.thread = threading.get_ident()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter_ns() - self.start
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self._sink.append(self)
+        return False
+
+class _NullSpan:
+    """Stands in for a Span while tracing is off"""
+
+    __slots__ = ()
+
+    def add(self, counter: str, amount: Union[int, float] = 1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class Tracer:
+    """
+    Records spans for the stages of a run
+    
+    While disabled, span() hands out a shared no-op span, so instrumented code
+    costs a call and an attribute check. Span names may be any object (paths,
+    usually) and are only converted to strings when a report is written.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.spans = []
+        self.origin = time.perf_counter_ns()
+
+    def span(self, name: Any, category: str = "run", **args) -> Union[Span, _NullSpan]:
+        """Context manager timing `name`; extra keyword arguments are recorded with it"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(name, category, args, self.spans)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize the recorded spans
+        
+        Returns:
+            dict: Per-category totals (count, wall time and summed counters)
+                and every span in the order they finished
+        """
+        stages = {}
+        spans = []
+        for span in list(self.spans):
+            stage = stages.setdefault(span.category, {"count": 0, "wall_ms": 0.0})
+            stage["count"] += 1
+            stage["wall_ms"] = round(stage["wall_ms"] + span.duration / 1e6, 3)
+            for key, value in span.args.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    stage[key] = stage.get(key, 0) + value
+            spans.append({
+                "name": str(span.name),
+                "category": span.category,
+                "start_ms": round((span.start - self.origin) / 1e6, 3),
+                "wall_ms": round(span.duration / 1e6, 3),
+                **span.args,
+            })
+        return {
+            "version": TRACE_REPORT_VERSION,
+            "wall_ms": round((time.perf_counter_ns() - self.origin) / 1e6, 3),
+            "stages": stages,
+            "spans": spans,
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The recorded spans in Chrome's trace event format (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        return {
+            "displayTimeUnit": "ms",
+            "traceEvents": [
+                {
+                    "name": str(span.name),
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": (span.start - self.origin) / 1000,
+                    "dur": span.duration / 1000,
+                    "pid": pid,
+                    "tid": span.thread,
+                    "args": span.args,
+                }
+                for span in list(self.spans)
+            ],
+        }
+
+    def save(self, report_path: Optional[Path] = None, trace_path: Optional[Path] = None) -> bool:
+        """Write the JSON report and/or the Chrome trace"""
+        success = True
+        if report_path:
+            success = self._write_json(report_path, self.report()) and success
+        if trace_path:
+            success = self._write_json(trace_path, self.chrome_trace()) and success
+        return success
+
+    @staticmethod
+    def _write_json(path: Path, data: Dict[str, Any]) -> bool:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            logger.error(f"Failed to write {path}: {e}")
+            return False
+        logger.info(f"Wrote {path}")
+        return True
+
+# WCAG AA minimum contrast for text, and for icons and other non-text UI (1.4.11)
+WCAG_TEXT = 4.5
+WCAG_NON_TEXT = 3.0
+
+# Foreground/background pairs checked by --audit, with the lowest ratio each needs
+CONTRAST_PAIRS = [
+    ("foreground", "background", WCAG_TEXT),
+    ("foreground-muted", "background", WCAG_TEXT),
+    ("module-text", "module-background", WCAG_TEXT),
+    ("module-text-muted", "module-background", WCAG_TEXT),
+    ("module-icon-color", "module-background", WCAG_NON_TEXT),
+    ("module-text", "bar-background", WCAG_TEXT),
+    ("notification-low-fg", "notification-low-bg", WCAG_TEXT),
+    ("notification-normal-fg", "notification-normal-bg", WCAG_TEXT),
+    ("notification-critical-fg", "notification-critical-bg", WCAG_TEXT),
+    ("rofi-foreground", "rofi-background", WCAG_TEXT),
+    ("rofi-foreground", "rofi-alternate-bg", WCAG_TEXT),
+    ("rofi-selected-fg", "rofi-selected-bg", WCAG_TEXT),
+    ("terminal-foreground", "terminal-background", WCAG_TEXT),
+    ("terminal-selection-fg", "terminal-selection-bg", WCAG_TEXT),
+    ("gtk-fg", "gtk-bg", WCAG_TEXT),
+    ("gtk-text", "gtk-base", WCAG_TEXT),
+    ("gtk-selected-fg", "gtk-selected-bg", WCAG_TEXT),
+    ("gtk-tooltip-fg", "gtk-tooltip-bg", WCAG_TEXT),
+    ("qt-fg", "qt-bg", WCAG_TEXT),
+    ("qt-text", "qt-base", WCAG_TEXT),
+    ("qt-selected-fg", "qt-selected-bg", WCAG_TEXT),
+    ("qt-tooltip-fg", "qt-tooltip-bg", WCAG_TEXT),
+]
+
+# Variables the audit reads, including the base that translucent backgrounds sit on
+CONTRAST_VARIABLES = {name for fg, bg, _ in CONTRAST_PAIRS for name in (fg, bg)} | {"background"}
+
+def contrast_ratios(palettes: Dict[str, Dict[str, str]], pairs: List[Tuple[str, str, float]],
+                    base: str = "background"):
+    """
+    WCAG contrast ratios for every theme and pair in one vectorized pass
+    
+    Translucent colors are composited first: the background of a pair over
+    the theme's opaque `base` color, then the foreground over that result.
+    
+    Returns:
+        numpy array of shape (themes, pairs); NaN where a color is missing
+    """
+    import numpy as np
+    
+    names = sorted({name for pair in pairs for name in pair[:2]} | {base})
+    column = {name: index for index, name in enumerate(names)}
+    colors = np.full((len(palettes), len(names), 4), np.nan)
+    for row, palette in enumerate(palettes.values()):
+        for name in names:
+            parsed = parse_color(palette.get(name, ""))
+            if parsed:
+                colors[row, column[name]] = parsed
+                
+    base_rgb = colors[:, column[base], :3][:, None, :]
+    foreground = colors[:, [column[pair[0]] for pair in pairs]]
+    background = colors[:, [column[pair[1]] for pair in pairs]]
+    background_alpha = background[..., 3:]
+    background_rgb = background[..., :3] * background_alpha + base_rgb * (1 - background_alpha)
+    foreground_alpha = foreground[..., 3:]
+    foreground_rgb = foreground[..., :3] * foreground_alpha + background_rgb * (1 - foreground_alpha)
+    
+    def luminance(rgb):
+        c = rgb / 255.0
+        linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+        return linear @ np.array([0.2126, 0.7152, 0.0722])
+        
+    first = luminance(foreground_rgb)
+    second = luminance(background_rgb)
+    return (np.maximum(first, second) + 0.05) / (np.minimum(first, second) + 0.05)
+
+# Magic, version, variable count, slot count, source size, source mtime, source sha256
+THEME_CACHE_HEADER = struct.Struct("<4sHIIQq32s")
+THEME_CACHE_MAGIC = b"HNTC"
+THEME_CACHE_VERSION = 3
+# Formats stored for every variable; conversions are absent for values that aren't a single color
+THEME_FORMATS = ("value", "hex", "hexa", "rgb", "rgba", "qt", "css", "css-var")
+# A hash table slot: name (offset, length), then (offset, length) per format
+THEME_CACHE_SLOT = struct.Struct("<" + "IH" * (1 + len(THEME_FORMATS)))
+THEME_CACHE_ABSENT = 0xFFFFFFFF
+
+class CompiledTheme(Mapping):
+    """
+    Read-only view of a compiled theme file
+    
+    Variables live in an open-addressed hash table inside the memory-mapped
+    file, so opening a theme costs the same however many variables it has,
+    and values are decoded only when looked up.
+    """
+
+    def __init__(self, buffer: mmap.mmap, count: int, slots: int):
+        self._buffer = buffer
+        self._count = count
+        self._slots = slots
+
+    def _find(self, name: str) -> Optional[tuple]:
+        key = name.encode()
+        mask = self._slots - 1
+        index = zlib.crc32(key) & mask
+        while True:
+            slot = THEME_CACHE_SLOT.unpack_from(self._buffer, THEME_CACHE_HEADER.size + index * THEME_CACHE_SLOT.size)
+            if slot[1] == 0:
+                return None
+            if self._buffer[slot[0]:slot[0] + slot[1]] == key:
+                return slot
+            index = (index + 1) & mask
+
+    def _string(self, offset: int, length: int) -> Optional[str]:
+        if offset == THEME_CACHE_ABSENT:
+            return None
+        return self._buffer[offset:offset + length].decode()
+
+    def format(self, name: str, format_name: str) -> Optional[str]:
+        """A variable in one of THEME_FORMATS, or None if undefined or not convertible"""
+        slot = self._find(name)
+        if slot is None:
+            return None
+        position = 2 + 2 * THEME_FORMATS.index(format_name)
+        return self._string(slot[position], slot[position + 1])
+
+    def __getitem__(self, name: str) -> str:
+        slot = self._find(name)
+        if slot is None:
+            raise KeyError(name)
+        return self._string(slot[2], slot[3])
+
+    def __iter__(self):
+        for index in range(self._slots):
+            slot = THEME_CACHE_SLOT.unpack_from(self._buffer, THEME_CACHE_HEADER.size + index * THEME_CACHE_SLOT.size)
+            if slot[1]:
+                yield self._buffer[slot[0]:slot[0] + slot[1]].decode()
+
+    def __len__(self) -> int:
+        return self._count
+
+class ThemeCache:
+    """
+    Compiled themes stored as `<cache_dir>/<theme>-<path hash>.bin`, one per color file
+    
+    A compiled theme holds every resolved variable in each of THEME_FORMATS.
+    It is valid while its source is unchanged: size and mtime are checked
+    first, then the source's hash, so touching a file doesn't force a rebuild.
+    Files are replaced atomically, so processes that still map an older
+    version keep a consistent view.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+
+    def path(self, color_file: Path) -> Path:
+        # Keyed by location too: themes with the same name in different directories are different themes
+        location = hashlib.sha256(str(color_file.resolve()).encode()).hexdigest()[:12]
+        return self.cache_dir / f"{color_file.stem}-{location}.bin"
+
+    def load(self, color_file: Path) -> Optional[CompiledTheme]:
+        """Map the compiled form of color_file, or return None if it's missing or stale"""
+        try:
+            with open(self.path(color_file), "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+            
+        try:
+            magic, version, count, slots, size, mtime_ns, digest = THEME_CACHE_HEADER.unpack_from(buffer)
+            source_stat = color_file.stat()
+        except (OSError, struct.error):
+            buffer.close()
+            return None
+            
+        if magic != THEME_CACHE_MAGIC or version != THEME_CACHE_VERSION:
+            buffer.close()
+            return None
+        if (source_stat.st_size, source_stat.st_mtime_ns) != (size, mtime_ns):
+            if hashlib.sha256(color_file.read_bytes()).digest() != digest:
+                buffer.close()
+                return None
+        return CompiledTheme(buffer, count, slots)
+
+    def install(self, color_file: Path, data: bytes) -> bool:
+        """
+        Adopt a compiled theme made elsewhere (a theme pack) for color_file
+        
+        It is only used if it was compiled from exactly the current contents
+        of color_file; its header is then restamped with the file's size and
+        mtime, so loading it doesn't need to hash the source.
+        """
+        try:
+            magic, version, count, slots, _, _, digest = THEME_CACHE_HEADER.unpack_from(data)
+            source_stat = color_file.stat()
+        except (OSError, struct.error):
+            return False
+        if magic != THEME_CACHE_MAGIC or version != THEME_CACHE_VERSION:
+            return False
+        if hashlib.sha256(color_file.read_bytes()).digest() != digest:
+            return False
+            
+        header = THEME_CACHE_HEADER.pack(magic, version, count, slots,
+                                         source_stat.st_size, source_stat.st_mtime_ns, digest)
+        cache_file = self.path(color_file)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.{threading.get_ident()}")
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(data[THEME_CACHE_HEADER.size:])
+            os.replace(tmp_path, cache_file)
+        except OSError as e:
+            logger.warning(f"Failed to write theme cache {cache_file}: {e}")
+            return False
+        return True
+
+    def compile(self, color_file: Path, color_vars: Dict[str, str], source: bytes) -> Optional[CompiledTheme]:
+        """Write the compiled form of a resolved theme, returning it mapped"""
+        slots = 8
+        while slots < 2 * len(color_vars):
+            slots *= 2
+            
+        pool = bytearray()
+        strings = {}
+        
+        def intern(value: Optional[str]) -> Tuple[int, int]:
+            if value is None:
+                return (THEME_CACHE_ABSENT, 0)
+            data = value.encode()
+            if data not in strings:
+                strings[data] = len(pool)
+                pool.extend(data)
+            return (strings[data], len(data))
+            
+        table = [None] * slots
+        for name, value in color_vars.items():
+            rgba = parse_color(value)
+            formats = {"value": value}
+            if rgba:
+                formats.update({format_name: formatter(rgba) for format_name, formatter in COLOR_FORMATTERS.items()})
+            formats["css-var"] = f"--{name}: {formats.get('css', value)};"
+            fields = [intern(name)] + [intern(formats.get(format_name)) for format_name in THEME_FORMATS]
+            index = zlib.crc32(name.encode()) & (slots - 1)
+            while table[index] is not None:
+                index = (index + 1) & (slots - 1)
+            table[index] = fields
+            
+        # Offsets in the table are relative to the pool until its start is known
+        pool_start = THEME_CACHE_HEADER.size + slots * THEME_CACHE_SLOT.size
+        source_stat = color_file.stat()
+        data = bytearray(THEME_CACHE_HEADER.pack(
+            THEME_CACHE_MAGIC, THEME_CACHE_VERSION, len(color_vars), slots,
+            source_stat.st_size, source_stat.st_mtime_ns, hashlib.sha256(source).digest()
+        ))
+        empty = THEME_CACHE_SLOT.pack(*([0] * (2 + 2 * len(THEME_FORMATS))))
+        for fields in table:
+            if fields is None:
+                data += empty
+                continue
+            packed = []
+            for offset, length in fields:
+                packed += [offset if offset == THEME_CACHE_ABSENT else pool_start + offset, length]
+            data += THEME_CACHE_SLOT.pack(*packed)
+        data += pool
+        
+        cache_file = self.path(color_file)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.{threading.get_ident()}")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, cache_file)
+        except OSError as e:
+            logger.warning(f"Failed to write theme cache {cache_file}: {e}")
+            return None
+        return self.load(color_file)
+
+# inotify event mask bits (see inotify(7))
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_CLOEXEC = 0o2000000
+
+class FileWatcher:
+    """
+    Waits for changes to a set of files
+    
+    Uses inotify on the files' parent directories (editors usually save by
+    renaming a new file into place), falling back to polling mtimes when
+    inotify isn't available. Bursts of events are debounced into one batch.
+    """
+
+    def __init__(self, paths: List[Path], poll_interval: float = 0.5, debounce: float = 0.2):
+        self.paths = {path.absolute() for path in paths}
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._fd = None
+        self._libc = None
+        self._watches = {}
+        self._snapshot = {}
+        self._start_inotify()
+        if self._fd is None:
+            self._snapshot = self._stat_all()
+
+    def _start_inotify(self):
+        library = ctypes.util.find_library("c")
+        if not library:
+            return
+        try:
+            libc = ctypes.CDLL(library, use_errno=True)
+            fd = libc.inotify_init1(IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+            
+        self._fd = fd
+        self._libc = libc
+        self._add_watches()
+        logger.debug(f"Watching {len(self.paths)} files with inotify")
+
+    def _add_watches(self):
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        watched = set(self._watches.values())
+        for directory in {path.parent for path in self.paths} - watched:
+            wd = self._libc.inotify_add_watch(self._fd, str(directory).encode(), mask)
+            if wd >= 0:
+                self._watches[wd] = directory
+
+    def update(self, paths: List[Path]):
+        """
+        Change the set of watched files
+        
+        Files watched before and after keep their pending changes, so an edit
+        made while the caller was busy is still reported by the next wait().
+        """
+        self.paths = {path.absolute() for path in paths}
+        if self._fd is not None:
+            # Directories no longer needed stay watched; their events are ignored
+            self._add_watches()
+        else:
+            current = self._stat_all()
+            self._snapshot = {path: self._snapshot.get(path, current[path]) for path in self.paths}
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _stat_all(self) -> Dict[Path, Optional[tuple]]:
+        snapshot = {}
+        for path in self.paths:
+            try:
+                file_stat = path.stat()
+                snapshot[path] = (file_stat.st_mtime_ns, file_stat.st_size)
+            except FileNotFoundError:
+                snapshot[path] = None
+        return snapshot
+
+    def _read_events(self, timeout: Optional[float]) -> Set[Path]:
+        """Collect watched paths from pending inotify events"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+            
+        changed = set()
+        data = os.read(self._fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, _mask, _cookie, length = struct.unpack_from("iIII", data, offset)
+            name = data[offset + 16:offset + 16 + length].rstrip(b"\0").decode()
+            offset += 16 + length
+            path = self._watches.get(wd, Path()) / name
+            if path in self.paths:
+                changed.add(path)
+        return changed
+
+    def _poll(self, timeout: Optional[float]) -> Set[Path]:
+        """Collect watched paths whose mtime or size changed"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._stat_all()
+            changed = {path for path in self.paths if snapshot[path] != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.poll_interval)
+
+    def wait(self) -> Set[Path]:
+        """Block until watched files change, returning each burst of changes once"""
+        collect = self._read_events if self._fd is not None else self._poll
+        changed = set()
+        while not changed:
+            changed = collect(None)
+        # Keep absorbing events until things go quiet
+        while True:
+            more = collect(self.debounce)
+            if not more:
+                return changed
+            changed |= more
+
 class HyprNovaInstaller:
-    def __init__(self, repo_root: Path):
+    def __init__(self, repo_root: Path, config_dir: Optional[Path] = None, backups: bool = True):
         self.repo_root = repo_root
         self.colors_dir = repo_root / "colors"
-        self.backup_dir = repo_root / ".oops-pit" / time.strftime("%Y%m%d_%H%M%S")
-        self.config_dir = Path.home() / ".config"
+        self.backup_dir = repo_root / ".oops-pit"
+        self.backup_store = BackupStore(self.backup_dir)
+        self.backups = backups
+        self.config_dir = config_dir or Path.home() / ".config"
+        # Staged trees are deployed elsewhere, where links into this repo would dangle
+        self.copy_links = False
+        self.cache_dir = repo_root / ".hyprnova-cache"
         self.components = {}
+        self.component_index = {}
+        self.component_versions = {}
         self.color_vars = {}
+        self.color_graph = None
+        self.theme_cache = ThemeCache(self.cache_dir / "themes")
+        self.color_file = self.colors_dir / "default.conf"
+        self.changes = {}
+        self._changes_lock = threading.Lock()
+        self.render_jobs = {}
+        # Symlinks made by components: target -> (source, component name)
+        self.links = {}
+        self.templates = TemplateEngine()
+        self.build_cache = BuildCache(self.cache_dir / "build-manifest.json")
+        self.tracer = Tracer()
+        # Set by plan mode: changes are collected here instead of made
+        self.plan = None
+        
+    @staticmethod
+    def describe_component(source: bytes) -> Dict[str, Any]:
+        """Read a component's description and dependencies from its source without running it"""
+        try:
+            tree = ast.parse(source)
+        except SyntaxError as e:
+            return {"description": "", "requires": [], "provides": [], "has_install": False, "error": str(e)}
+            
+        docstring = ast.get_docstring(tree) or ""
+        entry = {
+            "description": next((line.strip() for line in docstring.splitlines() if line.strip()), ""),
+            "requires": [],
+            "provides": [],
+            "has_install": False,
+        }
+        for node in tree.body:
+            if isinstance(node, ast.FunctionDef) and node.name == "install":
+                entry["has_install"] = True
+            elif isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                key = node.targets[0].id.lower()
+                if key in ("requires", "provides"):
+                    try:
+                        entry[key] = list(ast.literal_eval(node.value))
+                    except ValueError:
+                        pass
+        return entry
         
-    def load_component_installers(self):
-        """Load all component installers from the components directory"""
+    def load_component_index(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Describe the available components without importing them
+        
+        The index is cached in .hyprnova-cache/components.json. A component's
+        entry is rebuilt only when its file's hash changes, and the hash is only
+        recomputed when the file's size or mtime changed.
+        """
         components_dir = self.repo_root / "components"
         if not components_dir.exists():
             logger.error(f"Components directory not found at {components_dir}")
-            return False
+            return {}
             
-        for installer_file in components_dir.glob("*.py"):
-            if installer_file.name.startswith("_"):
-                continue
-                
-            component_name = installer_file.stem
+        index_file = self.cache_dir / "components.json"
+        cached = {}
+        if index_file.exists():
             try:
+                with open(index_file, "r") as f:
+                    data = json.load(f)
+                if data.get("version") == COMPONENT_INDEX_VERSION:
+                    cached = data["components"]
+            except (OSError, ValueError, KeyError):
+                pass
+                
+        with self.tracer.span("component index", "component_index") as span:
+            index = {}
+            changed = False
+            for installer_file in sorted(components_dir.glob("*.py")):
+                if installer_file.name.startswith("_"):
+                    continue
+                    
+                component_name = installer_file.stem
+                file_stat = installer_file.stat()
+                stat_key = [file_stat.st_size, file_stat.st_mtime_ns]
+                entry = cached.get(component_name)
+                if entry and entry["stat"] == stat_key:
+                    index[component_name] = entry
+                    span.add("cache_hits")
+                    continue
+                    
+                source = installer_file.read_bytes()
+                span.add("bytes_read", len(source))
+                digest = hashlib.sha256(source).hexdigest()
+                if not entry or entry["hash"] != digest:
+                    logger.debug(f"Indexing component: {component_name}")
+                    entry = self.describe_component(source)
+                    entry["hash"] = digest
+                    span.add("cache_misses")
+                else:
+                    span.add("cache_hits")
+                entry["stat"] = stat_key
+                index[component_name] = entry
+                changed = True
+                
+            if changed or index.keys() != cached.keys():
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = index_file.with_suffix(".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump({"version": COMPONENT_INDEX_VERSION, "components": index}, f, indent=2)
+                os.replace(tmp_path, index_file)
+                span.add("bytes_written", index_file.stat().st_size)
+            span.add("files", len(index))
+            
+        self.component_index = index
+        return index
+        
+    def load_component(self, component_name: str):
+        """Import a single component module, returning None if it can't be used"""
+        if component_name in self.components:
+            return self.components[component_name]
+            
+        entry = self.component_index.get(component_name)
+        if entry is None:
+            logger.error(f"Component {component_name} not found")
+            return None
+            
+        installer_file = self.repo_root / "components" / f"{component_name}.py"
+        try:
+            with self.tracer.span(component_name, "component_load", files=1):
                 spec = importlib.util.spec_from_file_location(component_name, installer_file)
                 module = importlib.util.module_from_spec(spec)
                 spec.loader.exec_module(module)
+            
+            if hasattr(module, "install"):
+                self.components[component_name] = module
+                self.component_versions[component_name] = entry["hash"]
+                logger.info(f"Loaded component installer: {component_name}")
+            else:
+                logger.warning(f"Component {component_name} does not have an install function")
+        except Exception as e:
+            logger.error(f"Failed to load component {component_name}: {e}")
+            
+        return self.components.get(component_name)
+        
+    def load_component_installers(self, component_names: Optional[List[str]] = None) -> bool:
+        """Load the given component installers (default: every indexed component; [] loads none)"""
+        if not self.component_index and not self.load_component_index():
+            return False
+            
+        for component_name in list(self.component_index) if component_names is None else component_names:
+            self.load_component(component_name)
+            
+        return len(self.components) > 0
+        
+    def parse_color_file(self, color_file: Path, source: Optional[bytes] = None) -> Optional[ColorGraph]:
+        """Read the variable definitions of a color file into a ColorGraph"""
+        if source is None:
+            if not color_file.exists():
+                logger.error(f"Color file not found: {color_file}")
+                return None
+            source = color_file.read_bytes()
+            
+        graph = ColorGraph()
+        source_name = str(color_file)
+        for line_number, line in enumerate(source.decode().splitlines(), 1):
+            line = line.strip()
+            if line.startswith("#") or not line:
+                continue
                 
-                if hasattr(module, "install"):
-                    self.components[component_name] = module
-                    logger.info(f"Loaded component installer: {component_name}")
-                else:
-                    logger.warning(f"Component {component_name} does not have an install function")
-            except Exception as e:
-                logger.error(f"Failed to load component {component_name}: {e}")
+            if "=" in line:
+                var, value = line.split("=", 1)
+                var_name = var.strip().lstrip("$")
+                var_value = value.strip()
                 
-        return len(self.components) > 0
+                # Remove comments at the end of the line
+                if "#" in var_value:
+                    var_value = var_value.split("#", 1)[0].strip()
+                    
+                graph.define(var_name, var_value, f"{source_name}:{line_number}")
+                
+        return graph
+        
+    def load_color_variables(self, color_file: Path) -> Mapping:
+        """
+        Load color variables from the specified color file, with references resolved
+        
+        The compiled theme is used when it is still valid; otherwise the file
+        is parsed and compiled again. self.color_graph is only set when the
+        file was parsed.
+        """
+        with self.tracer.span(color_file, "palette") as span:
+            # A theme written earlier in a planned run only exists in the plan, and
+            # the compiled cache (or the file on disk) would still show the old one
+            planned = self.plan.content(color_file) if self.plan is not None else None
+            if planned is not None:
+                graph = self.parse_color_file(color_file, planned)
+                try:
+                    return graph.resolve_all()
+                except ColorGraphError as e:
+                    logger.error(f"Invalid color variables: {e}")
+                    return {}
+                    
+            compiled = self.theme_cache.load(color_file)
+            if compiled is not None:
+                self.color_graph = None
+                span.add("cache_hits")
+                return compiled
+                
+            if not color_file.exists():
+                logger.error(f"Color file not found: {color_file}")
+                return {}
+                
+            span.add("cache_misses")
+            source = color_file.read_bytes()
+            span.add("bytes_read", len(source))
+            graph = self.parse_color_file(color_file, source)
+            try:
+                color_vars = graph.resolve_all()
+            except ColorGraphError as e:
+                logger.error(f"Invalid color variables: {e}")
+                return {}
+                
+            self.color_graph = graph
+            span.add("files")
+            return self.theme_cache.compile(color_file, color_vars, source) or color_vars
+        
+    def create_backup(self, path: Path) -> Path:
+        """Create a backup of the specified file or directory"""
+        if not self.backups:
+            return None
+        if self.plan is not None:
+            self.plan.backup(path)
+            return None
+        if not path.exists() and not path.is_symlink():
+            # Remember the path was absent so a rollback removes it again
+            self.backup_store.record_absent(path)
+            return None
+            
+        with self.tracer.span(path, "backup") as span:
+            entries = self.backup_store.backup(path)
+            files = [entry for entry in entries.values() if entry["type"] == "file"]
+            span.add("files", len(files))
+            span.add("bytes_read", sum(entry["size"] for entry in files))
+        entry = entries[str(path)]
+        if entry["type"] == "symlink":
+            logger.info(f"Backed up symlink {path} -> {entry['target']} in run {self.backup_store.run_id}")
+        else:
+            logger.info(f"Backed up {path} ({len(files)} files) in run {self.backup_store.run_id}")
+        return self.backup_store.manifest_path
+        
+    def record_change(self, component_name: Optional[str], path: Path):
+        """Remember that a component changed a file during this install"""
+        with self._changes_lock:
+            self.changes.setdefault(component_name, []).append(path)
+            
+    def create_symlink(self, source: Path, target: Path, component_name: Optional[str] = None):
+        """Create a symlink with backup of existing file (a copy when copy_links is set)"""
+        if self.copy_links:
+            if target.is_symlink():
+                target.unlink()
+            self.write_output(target, source.read_bytes(), component_name)
+            return
+            
+        self.links[target] = (source, component_name)
+        if target.is_symlink() and os.readlink(target) == str(source):
+            logger.debug(f"Symlink already up to date: {target}")
+            return
+            
+        self.create_backup(target)
+        if self.plan is not None:
+            self.plan.symlink(source, target, component_name)
+            self.record_change(component_name, target)
+            return
+            
+        target.unlink(missing_ok=True)
+            
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.symlink_to(source)
+        self.record_change(component_name, target)
+        logger.info(f"Created symlink from {source} to {target}")
+        
+    def write_output(self, path: Path, content: Union[str, bytes], component_name: Optional[str] = None) -> bool:
+        """
+        Atomically replace a file's contents, leaving identical files untouched
+        
+        The new contents are written to a temp file in the same directory,
+        fsynced and renamed over the target, so readers never see a partial
+        file. A symlink at the target is replaced by a regular file rather
+        than written through, so files it points at (often in a dotfiles
+        repo) are never modified; the backup records the link itself.
+        
+        Returns:
+            bool: True if the file was written, False if it was already up to date
+        """
+        data = content.encode() if isinstance(content, str) else content
+        with self.tracer.span(path, "write") as span:
+            is_link = path.is_symlink()
+            if not is_link and path.is_file() and path.stat().st_size == len(data):
+                span.add("bytes_read", len(data))
+                if path.read_bytes() == data:
+                    logger.debug(f"Output unchanged: {path}")
+                    return False
+                    
+            self.create_backup(path)
+            if self.plan is not None:
+                self.plan.write(path, data, component_name)
+                self.record_change(component_name, path)
+                return True
+                
+            if is_link:
+                logger.warning(f"Replacing symlink {path} -> {os.readlink(path)} with a regular file")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            mode = stat.S_IMODE(path.stat().st_mode) if path.exists() and not is_link else 0o644
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(tmp_name, mode)
+                os.replace(tmp_name, path)
+                span.add("bytes_written", len(data))
+                span.add("files")
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+                
+            # Make the rename itself durable
+            dir_fd = os.open(path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+                
+            self.record_change(component_name, path)
+            logger.info(f"Wrote {path}")
+            return True
+        
+    def restore_entries(self, entries: Dict[str, Dict[str, Any]], description: str) -> int:
+        """Restore backed-up entries, logging a summary"""
+        try:
+            with self.backup_store.deferred():
+                result = self.backup_store.restore(entries)
+        except OSError as e:
+            logger.error(f"Failed to restore {description}: {e}")
+            return 1
+            
+        logger.info(
+            f"Restored {description}: {result['restored']} replaced, {result['removed']} removed, "
+            f"{result['unchanged']} already up to date"
+        )
+        if result["restored"] or result["removed"]:
+            logger.info(f"Previous state saved as backup run {self.backup_store.run_id}")
+        return 0
+        
+    def rollback(self, run_id: Optional[str] = None) -> int:
+        """Undo everything a backup run recorded (default: the newest run)"""
+        runs = self.backup_store.list_runs()
+        if not runs:
+            logger.error(f"No backup runs found in {self.backup_dir}")
+            return 1
+            
+        run_id = run_id or runs[-1]
+        if run_id not in runs:
+            logger.error(f"Backup run not found: {run_id}")
+            return 1
+            
+        return self.restore_entries(self.backup_store.load_run(run_id), f"run {run_id}")
+        
+    def restore(self, path: Path, run_id: str) -> int:
+        """Restore a single file or directory tree from a backup run"""
+        if run_id not in self.backup_store.list_runs():
+            logger.error(f"Backup run not found: {run_id}")
+            return 1
+            
+        prefix = str(path) + os.sep
+        entries = {
+            entry_path: entry
+            for entry_path, entry in self.backup_store.load_run(run_id).items()
+            if entry_path == str(path) or entry_path.startswith(prefix)
+        }
+        if not entries:
+            logger.error(f"{path} is not part of backup run {run_id}")
+            return 1
+            
+        return self.restore_entries(entries, f"{path} from run {run_id}")
+        
+    def render_template(self, component_name: str, source: Union[Path, str], output_path: Path,
+                        variables: Dict[str, Any]) -> bool:
+        """Render a template file (or inline template text) unless the cached output is current"""
+        if isinstance(source, Path):
+            if not source.exists():
+                return False
+            compiled = self.templates.load(source)
+        else:
+            compiled = self.templates.compile(source)
+            
+        with self.tracer.span(output_path, "render", component=component_name) as span:
+            key = BuildCache.key(
+                str(BUILD_CACHE_VERSION),
+                self.component_versions.get(component_name, ""),
+                compiled.digest,
+                compiled.fingerprint(variables),
+            )
+            if self.build_cache.is_fresh(output_path, key):
+                logger.debug(f"Output up to date: {output_path}")
+                span.add("cache_hits")
+                return True
+                
+            span.add("cache_misses")
+            # Left as written; usually the target's own syntax (e.g. Hyprland's `$mainMod`), sometimes a typo
+            location = source if isinstance(source, Path) else f"{component_name} template"
+            for name, line in compiled.unresolved(variables):
+                logger.debug(f"{location}:{line}: no color variable ${name}, left as written")
+            self.write_output(output_path, compiled.render(variables), component_name)
+            if self.plan is None:
+                self.build_cache.record(output_path, key)
+        return True
+        
+    def component_context(self, component_name: str, color_vars: Dict[str, str], args: Any) -> Dict[str, Any]:
+        """Context passed to a component's functions, with helpers bound to the component"""
+        def render_template(source, output_path, extra_vars=None):
+            self.render_jobs[output_path] = (component_name, source, extra_vars)
+            variables = ChainMap(extra_vars, color_vars) if extra_vars else color_vars
+            return self.render_template(component_name, source, output_path, variables)
+            
+        return {
+            "repo_root": self.repo_root,
+            "config_dir": self.config_dir,
+            "colors_dir": self.colors_dir,
+            "color_file": self.color_file,
+            "backup_dir": self.backup_dir,
+            "cache_dir": self.cache_dir,
+            "color_vars": color_vars,
+            "create_backup": self.create_backup,
+            "create_symlink": partial(self.create_symlink, component_name=component_name),
+            "write_output": partial(self.write_output, component_name=component_name),
+            "templates": self.templates,
+            "render_template": render_template,
+            "trace": partial(self.tracer.span, category=component_name),
+            "logger": logger,
+            "args": args
+        }
+        
+    def install_component(self, component_name: str, color_vars: Dict[str, str], args: Any) -> bool:
+        """Install a specific component"""
+        if component_name not in self.components:
+            logger.error(f"Component {component_name} not found")
+            return False
+            
+        component = self.components[component_name]
+        
+        try:
+            # Call the component's install function
+            with self.tracer.span(component_name, "install"):
+                result = component.install(self.component_context(component_name, color_vars, args))
+            if result:
+                logger.info(f"Successfully installed component: {component_name}")
+            else:
+                logger.warning(f"Component {component_name} installation returned False")
+                
+            return result
+        except Exception as e:
+            logger.error(f"Error installing component {component_name}: {e}")
+            return False
+            
+    def dependency_map(self) -> Dict[str, Set[Path]]:
+        """Map each variable to the rendered outputs whose templates reference it"""
+        variable_map = {}
+        for output_path, (_, source, _) in self.render_jobs.items():
+            try:
+                compiled = self.templates.load(source) if isinstance(source, Path) else self.templates.compile(source)
+            except FileNotFoundError:
+                continue
+            for name in compiled.names:
+                variable_map.setdefault(name, set()).add(output_path)
+        return variable_map
+        
+    def affected_outputs(self, old_graph: ColorGraph, new_graph: ColorGraph) -> Set[Path]:
+        """Outputs that reference a variable whose definition changed, directly or through a reference"""
+        changed = {name for name in old_graph.raw.keys() | new_graph.raw.keys()
+                   if old_graph.raw.get(name) != new_graph.raw.get(name)}
+        affected_vars = set(changed)
+        for name in changed:
+            for graph in (old_graph, new_graph):
+                if name in graph.raw:
+                    affected_vars |= graph.dependents(name)
+                    
+        variable_map = self.dependency_map()
+        outputs = set()
+        for name in affected_vars:
+            outputs |= variable_map.get(name, set())
+        return outputs
+        
+    def rerender(self, output_paths: Set[Path]) -> int:
+        """Re-render the given outputs from their recorded render jobs"""
+        rendered = 0
+        for output_path in sorted(output_paths):
+            component_name, source, extra_vars = self.render_jobs[output_path]
+            variables = ChainMap(extra_vars, self.color_vars) if extra_vars else self.color_vars
+            if self.render_template(component_name, source, output_path, variables):
+                rendered += 1
+        self.build_cache.save()
+        return rendered
+        
+    def watch(self, args: Any) -> int:
+        """Install once, then re-render only the outputs affected by each edit"""
+        result = self.run(args)
+        if not self.color_vars:
+            return result
+        if self.color_graph is None:
+            # The theme came from the compiled cache; edits are diffed against its definitions
+            self.color_graph = self.parse_color_file(self.color_file)
+            
+        watched = self.watched_files()
+        # One watcher for the whole session, so edits saved during a re-render are seen by the next wait
+        watcher = FileWatcher(watched)
+        try:
+            while True:
+                logger.info(f"Watching {len(watched)} files for changes (Ctrl+C to stop)")
+                try:
+                    changed = watcher.wait()
+                except KeyboardInterrupt:
+                    return result
+                self.apply_changes(changed)
+                if self.watched_files() != watched:
+                    watched = self.watched_files()
+                    watcher.update(watched)
+        finally:
+            watcher.close()
+            
+    def watched_files(self) -> List[Path]:
+        """The color file and every template file behind a rendered output"""
+        return [self.color_file] + sorted(
+            {source for _, source, _ in self.render_jobs.values() if isinstance(source, Path)}
+        )
+        
+    def apply_changes(self, changed: Set[Path]):
+        """Re-render the outputs affected by a batch of changed files (see watch)"""
+        outputs = set()
+        if self.color_file.absolute() in changed:
+            old_graph = self.color_graph
+            color_vars = self.load_color_variables(self.color_file)
+            if not color_vars:
+                self.color_graph = old_graph
+                logger.error(f"Keeping previous colors until {self.color_file} is fixed")
+            else:
+                self.color_vars = color_vars
+                if self.color_graph is None:
+                    self.color_graph = self.parse_color_file(self.color_file)
+                outputs |= self.affected_outputs(old_graph, self.color_graph)
+                
+        for output_path, (_, source, _) in self.render_jobs.items():
+            if isinstance(source, Path) and source.absolute() in changed:
+                outputs.add(output_path)
+                
+        if outputs:
+            self.rerender(outputs)
+            logger.info(f"Updated {len(outputs)} of {len(self.render_jobs)} outputs")
+        else:
+            logger.info("No outputs affected")
+            
+    def load_palette_values(self, color_file: Path, names: Set[str]) -> Dict[str, str]:
+        """
+        Resolve only some variables of a theme (for audits and the catalog)
         
-    def load_color_variables(self, color_file: Path) -> Dict[str, str]:
-        """Load color variables from the specified color file"""
-        if not color_file.exists():
-            logger.error(f"Color file not found: {color_file}")
+        They are read from the compiled theme when it is current. Otherwise
+        the file is parsed and just these names (and what they reference)
+        are resolved; nothing is compiled, so a cold scan of many themes
+        stays cheap.
+        """
+        if self.plan is not None and self.plan.content(color_file) is not None:
+            color_vars = self.load_color_variables(color_file)
+            return {name: color_vars[name] for name in names if name in color_vars}
+            
+        compiled = self.theme_cache.load(color_file)
+        if compiled is not None:
+            return {name: compiled[name] for name in names if name in compiled}
+            
+        graph = self.parse_color_file(color_file)
+        if graph is None:
+            return {}
+        try:
+            return {name: graph.resolve(name) for name in names if name in graph.raw}
+        except ColorGraphError as e:
+            logger.error(f"Invalid color variables: {e}")
             return {}
             
-        color_vars = {}
-        with open(color_file, "r") as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith("#") or not line:
-                    continue
-                    
-                if "=" in line:
-                    var, value = line.split("=", 1)
-                    var_name = var.strip().lstrip("$")
-                    var_value = value.strip()
-                    
-                    # Remove comments at the end of the line
-                    if "#" in var_value:
-                        var_value = var_value.split("#", 1)[0].strip()
-                        
-                    color_vars[var_name] = var_value
-                    
-        return color_vars
+    def load_all_palettes(self, names: Optional[Set[str]] = None) -> Dict[str, Mapping]:
+        """Resolve every theme in the colors directory (only `names` of each, if given)"""
+        palettes = {}
+        for color_file in sorted(self.colors_dir.glob("*.conf")):
+            if names is None:
+                color_vars = self.load_color_variables(color_file)
+            else:
+                color_vars = self.load_palette_values(color_file, names)
+            if color_vars:
+                palettes[color_file.stem] = color_vars
+            else:
+                logger.warning(f"Skipping theme {color_file.stem}: colors failed to load")
+        return palettes
         
-    def create_backup(self, path: Path) -> Path:
-        """Create a backup of the specified file or directory"""
-        if not path.exists():
-            return None
+    def audit(self, min_contrast: Optional[float] = None, verbose: bool = False) -> int:
+        """Check CONTRAST_PAIRS in every theme, failing if any pair is below its minimum (or min_contrast, if given)"""
+        palettes = self.load_all_palettes(CONTRAST_VARIABLES)
+        if not palettes:
+            logger.error(f"No themes found in {self.colors_dir}")
+            return 1
+            
+        try:
+            ratios = contrast_ratios(palettes, CONTRAST_PAIRS)
+        except ImportError:
+            logger.error("The contrast audit requires NumPy")
+            return 1
             
-        backup_path = self.backup_dir / path.relative_to(Path.home())
-        backup_path.parent.mkdir(parents=True, exist_ok=True)
+        theme_width = max(len(theme) for theme in palettes)
+        pair_width = max(len(f"{fg} / {bg}") for fg, bg, _ in CONTRAST_PAIRS)
+        print(f"{'Theme':<{theme_width}}  {'Pair':<{pair_width}}  {'Ratio':>6}  {'Min':>4}  Result")
+        failures = 0
+        missing = 0
+        for theme_ratios, theme in zip(ratios, palettes):
+            for ratio, (fg, bg, minimum) in zip(theme_ratios, CONTRAST_PAIRS):
+                minimum = minimum if min_contrast is None else min_contrast
+                if ratio != ratio:
+                    result = "missing"
+                    missing += 1
+                elif ratio < minimum:
+                    result = "FAIL"
+                    failures += 1
+                else:
+                    result = "ok"
+                if verbose or result != "ok":
+                    ratio_text = "-" if result == "missing" else f"{ratio:.2f}"
+                    print(f"{theme:<{theme_width}}  {f'{fg} / {bg}':<{pair_width}}  {ratio_text:>6}  {minimum:>4g}  {result}")
+                    
+        worst = ratios[ratios == ratios].min() if (ratios == ratios).any() else float("nan")
+        threshold = "their minimum" if min_contrast is None else f"{min_contrast:g}:1"
+        print(f"\n{len(palettes)} themes, {len(CONTRAST_PAIRS)} pairs each: {failures} below {threshold}, "
+              f"{missing} missing, lowest ratio {worst:.2f}")
+        return 1 if failures else 0
         
-        if path.is_dir():
-            shutil.copytree(path, backup_path)
-        else:
-            shutil.copy2(path, backup_path)
+    def plan_run(self, args: Any, plan_path: Optional[Path] = None) -> int:
+        """
+        Run the install against a ChangePlan and print what it would change
+        
+        Nothing under the config directory or in the backup store is touched;
+        only HyprNova's own caches may be refreshed.
+        
+        Args:
+            args: Install arguments, as for run()
+            plan_path: Where to save the plan for apply_plan() (optional)
+        """
+        self.plan = ChangePlan()
+        try:
+            result = self.run(args)
+        finally:
+            plan, self.plan = self.plan, None
+            
+        for path in plan.changes:
+            print(plan.diff(path), end="")
             
-        logger.info(f"Created backup of {path} at {backup_path}")
-        return backup_path
+        for path, change in plan.changes.items():
+            detail = f"-> {change['target']}" if change["action"] == "symlink" else f"{len(change['content'])} bytes"
+            print(f"{change['action']:<8} {path} ({change['component'] or '-'}, {detail})")
+            
+        counts = ", ".join(f"{count} {action}" for action, count in sorted(plan.summary().items()))
+        backups = sum(1 for exists in plan.backups.values() if exists)
+        print(f"\nPlan: {len(plan.changes)} changes ({counts or 'nothing to do'}), {backups} existing paths to back up")
+        
+        if plan_path:
+            try:
+                plan.save(plan_path)
+            except OSError as e:
+                logger.error(f"Failed to save plan to {plan_path}: {e}")
+                return 1
+            logger.info(f"Saved plan to {plan_path}")
+        return result
+        
+    def apply_plan(self, plan_path: Path) -> int:
+        """
+        Make the changes of a saved plan, with the usual backups
         
-    def create_symlink(self, source: Path, target: Path):
-        """Create a symlink with backup of existing file"""
-        if target.exists() or target.is_symlink():
-            self.create_backup(target)
-            target.unlink(missing_ok=True)
+        Nothing is changed if any planned path differs from when the plan
+        was made; plan again in that case.
+        """
+        try:
+            plan = ChangePlan.load(plan_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to read plan {plan_path}: {e}")
+            return 1
             
-        target.parent.mkdir(parents=True, exist_ok=True)
-        target.symlink_to(source)
-        logger.info(f"Created symlink from {source} to {target}")
+        stale = [path for path, change in plan.changes.items() if ChangePlan.state(Path(path)) != change["before"]]
+        if stale:
+            for path in stale:
+                logger.error(f"Changed since the plan was made: {path}")
+            return 1
+            
+        for path, change in plan.changes.items():
+            if change["action"] == "symlink":
+                self.create_symlink(Path(change["target"]), Path(path), change["component"])
+            else:
+                self.write_output(Path(path), change["content"], change["component"])
+                
+        logger.info(f"Applied {len(plan.changes)} changes from {plan_path}")
+        return 0
         
-    def install_component(self, component_name: str, color_vars: Dict[str, str], args: Any) -> bool:
-        """Install a specific component"""
-        if component_name not in self.components:
-            logger.error(f"Component {component_name} not found")
-            return False
+    def render_transition(self, start_vars: Mapping, end_vars: Mapping, end_color_file: Path,
+                          frames: int = None) -> Optional[Path]:
+        """
+        Render the frames of an animated switch from the current theme
+        
+        The theme generator interpolates the palettes; every rendered output
+        is then rendered once per frame, and every symlink to the current
+        color file gets a frame color file. Frame sets are cached by their
+        inputs in .hyprnova-cache/transitions/, so playing one is only file
+        swaps. The last frame is the end theme itself.
+        
+        Args:
+            start_vars: Resolved palette of the current theme
+            end_vars: Resolved palette of the theme being switched to
+            end_color_file: Color file of the theme being switched to
+            frames: Number of intermediate frames (default: TRANSITION_FRAMES)
+            
+        Returns:
+            Path: Directory of the frame set, or None if it couldn't be rendered
+        """
+        frames = frames or TRANSITION_FRAMES
+        outputs = []
+        for output_path, (component_name, source, extra_vars) in sorted(self.render_jobs.items()):
+            compiled = self.templates.load(source) if isinstance(source, Path) else self.templates.compile(source)
+            outputs.append({
+                "path": str(output_path.resolve()),
+                "component": component_name,
+                "kind": "file",
+                "compiled": compiled,
+                "extra_vars": extra_vars,
+            })
+        for target, (source, component_name) in sorted(self.links.items()):
+            if source == self.color_file:
+                outputs.append({"path": str(target), "component": component_name, "kind": "link"})
+        if not outputs:
+            return None
+            
+        key = BuildCache.key(
+            str(TRANSITION_CACHE_VERSION),
+            json.dumps(sorted(dict(start_vars).items())),
+            json.dumps(sorted(dict(end_vars).items())),
+            str(end_color_file),
+            str(frames),
+            *(
+                f"{output['path']}:{self.component_versions.get(output['component'], '')}:"
+                f"{output['compiled'].digest}:{sorted((output['extra_vars'] or {}).items())}"
+                if output["kind"] == "file" else f"{output['path']}:link"
+                for output in outputs
+            ),
+        )
+        transitions_dir = self.cache_dir / "transitions"
+        frame_dir = transitions_dir / key[:16]
+        if (frame_dir / "manifest.json").exists():
+            os.utime(frame_dir)
+            return frame_dir
+            
+        generator = self.load_component("theme_generator")
+        if not generator or not hasattr(generator, "interpolate_palettes"):
+            logger.error("The theme generator component is required for transitions")
+            return None
             
-        component = self.components[component_name]
         try:
-            # Create component context with helper functions
-            context = {
-                "repo_root": self.repo_root,
-                "config_dir": self.config_dir,
-                "colors_dir": self.colors_dir,
-                "backup_dir": self.backup_dir,
-                "color_vars": color_vars,
-                "create_backup": self.create_backup,
-                "create_symlink": self.create_symlink,
-                "logger": logger,
-                "args": args
+            palettes = generator.interpolate_palettes(dict(start_vars), dict(end_vars), frames) + [dict(end_vars)]
+        except ImportError:
+            logger.error("Transitions require NumPy")
+            return None
+        tmp_dir = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=".transition-"))
+        try:
+            for frame, palette in enumerate(palettes):
+                (tmp_dir / str(frame)).mkdir()
+                colors = "".join(f"${name} = {value}\n" for name, value in palette.items())
+                for index, output in enumerate(outputs):
+                    if output["kind"] == "link":
+                        content = colors
+                    else:
+                        variables = ChainMap(output["extra_vars"], palette) if output["extra_vars"] else palette
+                        content = output["compiled"].render(variables)
+                    (tmp_dir / str(frame) / str(index)).write_text(content)
+                    
+            manifest = {
+                "frames": len(palettes),
+                "end_color_file": str(end_color_file),
+                "outputs": [{field: output[field] for field in ("path", "component", "kind")} for output in outputs],
             }
+            with open(tmp_dir / "manifest.json", "w") as f:
+                json.dump(manifest, f, indent=2)
+            transitions_dir.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_dir, frame_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
             
-            # Call the component's install function
-            result = component.install(context)
-            if result:
-                logger.info(f"Successfully installed component: {component_name}")
-            else:
-                logger.warning(f"Component {component_name} installation returned False")
+        # Keep only the most recently used frame sets
+        frame_sets = sorted(transitions_dir.iterdir(), key=lambda path: path.stat().st_mtime, reverse=True)
+        for stale in frame_sets[TRANSITION_CACHE_SIZE:]:
+            shutil.rmtree(stale, ignore_errors=True)
+            
+        logger.info(f"Rendered {frames} transition frames for {len(outputs)} outputs")
+        return frame_dir
+        
+    def install_target(self, root: Path, color_file: Path, color_vars: Dict[str, str],
+                       component_names: List[str], args: Any) -> Dict[str, bool]:
+        """
+        Install components into another home directory
+        
+        Used by fleet mode to reuse one installer, with its imported components
+        and compiled templates, for many targets.
+        
+        Returns:
+            dict: Component name to whether it installed successfully
+        """
+        self.config_dir = root / ".config"
+        self.color_file = color_file
+        self.color_vars = color_vars
+        self.changes = {}
+        self.render_jobs = {}
+        self.build_cache = BuildCache(None)
+        
+        self.load_component_installers(component_names)
+        missing = [name for name in component_names if name not in self.components]
+        results = self.install_components(
+            [name for name in component_names if name in self.components], color_vars, args, jobs=1
+        )
+        results.update({name: False for name in missing})
+        return results
+        
+    def build_component_graph(self, component_names: List[str]) -> Optional[Dict[str, List[str]]]:
+        """
+        Map each component to the selected components it must run after
+        
+        Components declare module-level REQUIRES and PROVIDES lists. A requirement
+        is satisfied by a component that provides it or is named after it.
+        """
+        providers = {}
+        for name in component_names:
+            providers.setdefault(name, []).append(name)
+            for provided in getattr(self.components[name], "PROVIDES", []):
+                providers.setdefault(provided, []).append(name)
                 
-            return result
-        except Exception as e:
-            logger.error(f"Error installing component {component_name}: {e}")
-            return False
+        graph = {}
+        for name in component_names:
+            deps = []
+            for required in getattr(self.components[name], "REQUIRES", []):
+                if required not in providers:
+                    logger.debug(f"Requirement {required} of {name} is not provided by any selected component")
+                for provider in providers.get(required, []):
+                    if provider != name and provider not in deps:
+                        deps.append(provider)
+            graph[name] = deps
+            
+        # Reject cycles up front so the scheduler can't stall
+        if len(self.topological_order(graph, component_names)) != len(component_names):
+            logger.error(f"Component dependency cycle among: {', '.join(component_names)}")
+            return None
+        return graph
+        
+    @staticmethod
+    def topological_order(graph: Dict[str, List[str]], component_names: List[str]) -> List[str]:
+        """Order components so dependencies come first, keeping the given order otherwise"""
+        order = []
+        placed = set()
+        remaining = list(component_names)
+        while remaining:
+            ready = [name for name in remaining if all(dep in placed for dep in graph[name])]
+            if not ready:
+                break
+            for name in ready:
+                order.append(name)
+                placed.add(name)
+                remaining.remove(name)
+        return order
+        
+    def install_components(self, component_names: List[str], color_vars: Dict[str, str], args: Any,
+                           jobs: int = 1) -> Dict[str, bool]:
+        """
+        Install components in dependency order, running independent ones concurrently
+        
+        With more than one job, each component's log output is buffered and
+        replayed in dependency order once it and everything before it finished.
+        """
+        graph = self.build_component_graph(component_names)
+        if graph is None:
+            return {name: False for name in component_names}
             
+        order = self.topological_order(graph, component_names)
+        buffers = {name: [] for name in order}
+        results = {}
+        flushed = 0
+        
+        log_buffer = None
+        if jobs > 1:
+            log_buffer = ComponentLogBuffer()
+            logger.addHandler(log_buffer)
+            logger.propagate = False
+            
+        def captured(name):
+            return log_buffer.capture(buffers[name]) if log_buffer else nullcontext()
+            
+        def run_one(name):
+            with captured(name):
+                return self.install_component(name, color_vars, args)
+                
+        try:
+            with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+                waiting = list(order)
+                running = {}
+                while waiting or running:
+                    for name in list(waiting):
+                        if not all(dep in results for dep in graph[name]):
+                            continue
+                        waiting.remove(name)
+                        failed = [dep for dep in graph[name] if not results[dep]]
+                        if failed:
+                            with captured(name):
+                                logger.warning(f"Skipping component {name}: dependency {', '.join(failed)} failed")
+                            results[name] = False
+                        else:
+                            running[pool.submit(run_one, name)] = name
+                            
+                    if running:
+                        done, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            results[running.pop(future)] = future.result()
+                            
+                    # Replay finished components in order
+                    while log_buffer and flushed < len(order) and order[flushed] in results:
+                        log_buffer.replay(buffers[order[flushed]])
+                        flushed += 1
+        finally:
+            if log_buffer:
+                logger.removeHandler(log_buffer)
+                logger.propagate = True
+                
+        return results
+        
     def run(self, args: Any) -> int:
         """Run the installer with the specified arguments"""
-        # Create backup directory
-        self.backup_dir.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Created backup directory: {self.backup_dir}")
-        
-        # Load component installers
-        if not self.load_component_installers():
+        # Index component installers (nothing is imported yet)
+        if not self.load_component_index():
             logger.error("No component installers found")
             return 1
             
+        # Generate a theme from a wallpaper first, so this run applies it
+        if getattr(args, "from_image", None):
+            generator = self.load_component("theme_generator")
+            if not generator or not hasattr(generator, "generate_theme_from_image"):
+                logger.error("The theme generator component is required for --from-image")
+                return 1
+            context = self.component_context("theme_generator", {}, args)
+            theme_file = generator.generate_theme_from_image(context, args.from_image, args.theme,
+                                                             force=getattr(args, "force", False))
+            if not theme_file:
+                return 1
+            args.theme = theme_file.stem
+            
         # Load color variables
         color_file = self.colors_dir / "default.conf"
         if args.theme:
             theme_file = self.colors_dir / f"{args.theme}.conf"
-            if theme_file.exists():
+            if theme_file.exists() or (self.plan is not None and theme_file in self.plan):
                 color_file = theme_file
                 logger.info(f"Using theme: {args.theme}")
             else:
                 logger.warning(f"Theme file not found: {theme_file}")
+                suggestions = difflib.get_close_matches(args.theme, [path.stem for path in self.colors_dir.glob("*.conf")])
+                if suggestions:
+                    logger.info(f"Did you mean: {', '.join(suggestions)}?")
                 logger.info(f"Falling back to default theme")
                 
+        self.color_file = color_file
         self.color_vars = self.load_color_variables(color_file)
         if not self.color_vars:
             logger.error("Failed to load color variables")
@@ -176,38 +2416,1001 @@ class HyprNovaInstaller:
         if args.components:
             # Install specific components
             for component in args.components:
-                if component in self.components:
+                if component in self.component_index:
                     components_to_install.append(component)
                 else:
                     logger.warning(f"Component not found: {component}")
         else:
             # Install all components
-            components_to_install = list(self.components.keys())
+            components_to_install = list(self.component_index)
+            
+        # Only import the selected components
+        self.load_component_installers(components_to_install)
+        components_to_install = [component for component in components_to_install if component in self.components]
             
         if not components_to_install:
             logger.error("No components to install")
             return 1
             
-        # Install each component
-        success_count = 0
-        for component in components_to_install:
-            if self.install_component(component, self.color_vars, args):
-                success_count += 1
+        # Install components, independent ones in parallel
+        jobs = getattr(args, "jobs", None) or os.cpu_count() or 1
+        results = self.install_components(components_to_install, self.color_vars, args, jobs)
+        success_count = sum(1 for result in results.values() if result)
                 
+        if self.plan is None:
+            self.build_cache.save()
+        
         # Print summary
         logger.info(f"Installation summary: {success_count}/{len(components_to_install)} components installed successfully")
         
         return 0 if success_count == len(components_to_install) else 1
 
+# Intermediate palettes of an animated switch, and how many rendered frame sets to keep
+TRANSITION_FRAMES = 12
+TRANSITION_CACHE_SIZE = 8
+TRANSITION_CACHE_VERSION = 1
+
+def default_socket_path() -> Path:
+    """Socket the theme-switch daemon listens on"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "hyprnova.sock"
+    return Path(tempfile.gettempdir()) / f"hyprnova-{os.getuid()}.sock"
+
+class HyprNovaDaemon:
+    """
+    Long-running theme switcher
+    
+    Keeps components imported, palettes resolved and templates compiled in
+    memory, and listens on a Unix socket for line-based commands:
+    `switch <theme> [<duration ms> [<frames>]]`, `status` and `stop`.
+    
+    A switch with a duration crossfades from the current theme through
+    precomputed frames (see HyprNovaInstaller.render_transition).
+    
+    After a switch, the reload hook of every component that changed a file is
+    called concurrently. Hooks default to each component's optional
+    `reload(context)` function and can be replaced by passing `reload_hooks`.
+    """
+
+    def __init__(self, installer: HyprNovaInstaller, args: Any, socket_path: Path,
+                 reload_hooks: Optional[Dict[str, Callable[[Dict[str, Any]], Any]]] = None):
+        self.installer = installer
+        self.args = args
+        self.socket_path = socket_path
+        self.reload_hooks = reload_hooks
+        self.palettes = {}
+        self.current_theme = None
+        self.component_names = []
+        self._server = None
+
+    def load_palette(self, theme: str) -> Optional[Dict[str, str]]:
+        """Return a theme's resolved palette, re-reading it only if its file changed"""
+        color_file = self.installer.colors_dir / f"{theme}.conf"
+        try:
+            file_stat = color_file.stat()
+        except FileNotFoundError:
+            return None
+            
+        key = (file_stat.st_mtime_ns, file_stat.st_size)
+        cached = self.palettes.get(theme)
+        if cached and cached[0] == key:
+            return cached[1]
+            
+        color_vars = self.installer.load_color_variables(color_file)
+        if not color_vars:
+            return None
+        self.palettes[theme] = (key, color_vars)
+        return color_vars
+
+    def start(self) -> bool:
+        """Import components and warm the palette cache"""
+        if not self.installer.load_component_index():
+            logger.error("No component installers found")
+            return False
+            
+        self.installer.load_component_installers(self.args.components)
+        selected = self.installer.component_index if self.args.components is None else self.args.components
+        self.component_names = [name for name in selected
+                                if name in self.installer.components]
+        if self.reload_hooks is None:
+            self.reload_hooks = {
+                name: self.installer.components[name].reload
+                for name in self.component_names
+                if hasattr(self.installer.components[name], "reload")
+            }
+            
+        for color_file in sorted(self.installer.colors_dir.glob("*.conf")):
+            self.load_palette(color_file.stem)
+        logger.info(f"Daemon ready with {len(self.palettes)} themes and {len(self.component_names)} components")
+        return True
+
+    def reload_apps(self, component_names: List[str]) -> List[str]:
+        """Run the reload hooks of the given components concurrently"""
+        hooks = {name: self.reload_hooks[name] for name in component_names if name in self.reload_hooks}
+        if not hooks:
+            return []
+            
+        context = {"logger": logger, "config_dir": self.installer.config_dir}
+        reloaded = []
+        with ThreadPoolExecutor(max_workers=len(hooks)) as pool:
+            futures = {pool.submit(hook, dict(context, changes=self.installer.changes.get(name, []))): name
+                       for name, hook in hooks.items()}
+            for future, name in futures.items():
+                try:
+                    if future.result():
+                        reloaded.append(name)
+                except Exception as e:
+                    logger.warning(f"Reload hook for {name} failed: {e}")
+        return reloaded
+
+    def play_transition(self, frame_dir: Path, duration_ms: float):
+        """Step through a rendered frame set, swapping files in and reloading apps every frame"""
+        with open(frame_dir / "manifest.json", "r") as f:
+            manifest = json.load(f)
+        outputs = [(Path(output["path"]), output["kind"]) for output in manifest["outputs"]]
+        components = sorted({output["component"] for output in manifest["outputs"]})
+        self.installer.changes = {}
+        for output, (path, _) in zip(manifest["outputs"], outputs):
+            # Back up the starting state, so the switch can be rolled back like any other
+            self.installer.create_backup(path)
+            self.installer.changes.setdefault(output["component"], []).append(path)
+            
+        interval = duration_ms / 1000 / manifest["frames"]
+        for frame in range(manifest["frames"]):
+            started = time.perf_counter()
+            last = frame == manifest["frames"] - 1
+            for index, (path, kind) in enumerate(outputs):
+                frame_file = frame_dir / str(frame) / str(index)
+                tmp_path = path.with_name(f".{path.name}.transition")
+                tmp_path.unlink(missing_ok=True)
+                if kind == "link":
+                    tmp_path.symlink_to(manifest["end_color_file"] if last else frame_file)
+                else:
+                    BackupStore.clone_file(frame_file, tmp_path)
+                os.replace(tmp_path, path)
+            self.reload_apps(components)
+            time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+            
+    def switch(self, theme: str, duration_ms: float = 0, frames: Optional[int] = None) -> str:
+        """Apply a theme, crossfading for duration_ms, and reload the apps whose outputs changed"""
+        started = time.perf_counter()
+        color_vars = self.load_palette(theme)
+        if color_vars is None:
+            return f"error unknown theme: {theme}"
+            
+        # The first switch has no rendered outputs to animate yet
+        start_vars = self.load_palette(self.current_theme) if self.current_theme else None
+        if duration_ms > 0 and start_vars and self.current_theme != theme:
+            try:
+                frame_dir = self.installer.render_transition(
+                    start_vars, color_vars, self.installer.colors_dir / f"{theme}.conf", frames
+                )
+                if frame_dir:
+                    self.play_transition(frame_dir, duration_ms)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Transition to {theme} failed, switching directly: {e}")
+                
+        self.installer.color_file = self.installer.colors_dir / f"{theme}.conf"
+        self.installer.changes = {}
+        jobs = getattr(self.args, "jobs", None) or os.cpu_count() or 1
+        results = self.installer.install_components(self.component_names, color_vars, self.args, jobs)
+        self.installer.build_cache.save()
+        
+        changed = [name for name in self.component_names if self.installer.changes.get(name)]
+        reloaded = self.reload_apps(changed)
+        self.current_theme = theme
+        
+        elapsed = (time.perf_counter() - started) * 1000
+        failed = [name for name, result in results.items() if not result]
+        status = "ok" if not failed else f"partial (failed: {', '.join(failed)})"
+        return f"{status} {theme} in {elapsed:.1f}ms, reloaded: {', '.join(reloaded) or 'nothing'}"
+
+    def handle_command(self, line: str) -> str:
+        command, _, argument = line.strip().partition(" ")
+        if command == "switch" and argument:
+            theme, *options = argument.split()
+            try:
+                duration_ms = float(options[0]) if options else 0
+                frames = int(options[1]) if len(options) > 1 else None
+            except ValueError:
+                return f"error invalid transition: {' '.join(options)}"
+            return self.switch(theme, duration_ms, frames)
+        if command == "status":
+            return f"ok theme={self.current_theme or 'none'} themes={len(self.palettes)}"
+        if command == "stop":
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+            return "ok stopping"
+        return f"error unknown command: {line.strip()}"
+
+    def serve(self) -> int:
+        """Serve commands until stopped"""
+        if not self.start():
+            return 1
+            
+        if self.socket_path.exists():
+            try:
+                send_daemon_command(self.socket_path, "status")
+                logger.error(f"A daemon is already listening on {self.socket_path}")
+                return 1
+            except OSError:
+                self.socket_path.unlink()
+                
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw_line in self.rfile:
+                    reply = daemon.handle_command(raw_line.decode())
+                    self.wfile.write(reply.encode() + b"\n")
+
+        self._server = socketserver.UnixStreamServer(str(self.socket_path), Handler)
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=self._server.shutdown).start())
+        logger.info(f"Listening on {self.socket_path}")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+            self.socket_path.unlink(missing_ok=True)
+        return 0
+
+def send_daemon_command(socket_path: Path, command: str) -> str:
+    """Send one command to a running daemon and return its reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(socket_path))
+        client.sendall(command.encode() + b"\n")
+        client.shutdown(socket.SHUT_WR)
+        return client.makefile().readline().strip()
+
+# Components fleet mode never runs: the theme generator writes into this repo, not a target
+FLEET_EXCLUDED = {"theme_generator"}
+
+# Installer reused by every target a fleet worker process renders
+_fleet_installer = None
+
+def _init_fleet_worker(repo_root: Path, log_level: int):
+    global _fleet_installer
+    logger.setLevel(log_level)
+    _fleet_installer = HyprNovaInstaller(repo_root, backups=False)
+    _fleet_installer.copy_links = True
+    _fleet_installer.load_component_index()
+
+def _render_fleet_target(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Render one fleet target in a worker process, into its root or a tarball"""
+    installer = _fleet_installer
+    try:
+        if job["tarball"]:
+            tarball = Path(job["tarball"])
+            tarball.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.TemporaryDirectory(prefix=f"hyprnova-{job['name']}-") as stage:
+                results = installer.install_target(
+                    Path(stage), Path(job["color_file"]), job["color_vars"], job["components"], job["args"]
+                )
+                tmp_path = tarball.with_name(f".{tarball.name}.{os.getpid()}")
+                with tarfile.open(tmp_path, "w:gz") as tar:
+                    tar.add(stage, arcname=".")
+                os.replace(tmp_path, tarball)
+        else:
+            results = installer.install_target(
+                Path(job["root"]), Path(job["color_file"]), job["color_vars"], job["components"], job["args"]
+            )
+    except Exception as e:
+        return {"name": job["name"], "results": {}, "written": 0, "error": str(e)}
+        
+    written = sum(len(paths) for paths in installer.changes.values())
+    return {"name": job["name"], "results": results, "written": written, "error": None}
+
+class HyprNovaFleet:
+    """
+    Renders configs for many targets in one run
+    
+    The manifest is JSON: optional `defaults` and a list of `targets`, each
+    with a `name` and optionally a `root` (home directory to render into,
+    default `<output>/<name>`), `theme`, `components` and `overrides`
+    (variables replaced before references are resolved):
+    
+        {
+            "defaults": {"theme": "nord", "components": ["waybar", "rofi"]},
+            "targets": [
+                {"name": "ws-001"},
+                {"name": "ws-002", "overrides": {"accent-primary": "rgb(255, 121, 198)"}}
+            ]
+        }
+    
+    Each distinct theme and override set is resolved once in this process.
+    Targets are then rendered by a pool of worker processes, each reusing
+    its imported components and compiled templates for every target it gets.
+    """
+
+    def __init__(self, installer: HyprNovaInstaller, args: Any, manifest_path: Path,
+                 output_dir: Optional[Path] = None, tarballs: bool = False):
+        self.installer = installer
+        self.args = args
+        self.manifest_path = manifest_path
+        self.output_dir = output_dir or manifest_path.parent / "fleet-output"
+        self.tarballs = tarballs
+        self.palettes = {}
+
+    def load_manifest(self) -> Optional[List[Dict[str, Any]]]:
+        """Read the manifest's targets with defaults applied, or None if it is invalid"""
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read fleet manifest {self.manifest_path}: {e}")
+            return None
+            
+        defaults = manifest.get("defaults", {})
+        available = [name for name in self.installer.component_index if name not in FLEET_EXCLUDED]
+        targets = []
+        names = set()
+        for index, entry in enumerate(manifest.get("targets", [])):
+            target = {**defaults, **entry, "overrides": {**defaults.get("overrides", {}), **entry.get("overrides", {})}}
+            name = target.get("name")
+            if not name or name in names or "/" in name:
+                logger.error(f"Fleet target #{index + 1} needs a unique name without slashes")
+                return None
+            names.add(name)
+            
+            components = target.get("components") or available
+            for component in components:
+                if component in FLEET_EXCLUDED or component not in self.installer.component_index:
+                    logger.warning(f"Target {name}: skipping component {component}")
+            target["components"] = [component for component in components if component in available]
+            
+            root = target.get("root")
+            target["root"] = self.manifest_path.parent / Path(root).expanduser() if root else self.output_dir / name
+            targets.append(target)
+            
+        if not targets:
+            logger.error(f"No targets in fleet manifest {self.manifest_path}")
+            return None
+        return targets
+
+    def resolve_palette(self, theme: str, overrides: Dict[str, str]) -> Optional[Tuple[Path, Dict[str, str]]]:
+        """
+        Resolve a theme with overrides, once per distinct combination
+        
+        Returns:
+            tuple: Color file with the overrides written in (what gets linked
+                into targets) and the resolved variables, or None on error
+        """
+        key = (theme, tuple(sorted(overrides.items())))
+        if key in self.palettes:
+            return self.palettes[key]
+            
+        color_file = self.installer.colors_dir / f"{theme}.conf"
+        if not color_file.exists():
+            logger.error(f"Theme file not found: {color_file}")
+            self.palettes[key] = None
+            return None
+            
+        source = color_file.read_text()
+        graph = self.installer.parse_color_file(color_file, source.encode())
+        for name, value in overrides.items():
+            graph.update(name, value, "fleet manifest")
+        try:
+            color_vars = graph.resolve_all()
+        except ColorGraphError as e:
+            logger.error(f"Invalid colors for theme {theme} with overrides: {e}")
+            self.palettes[key] = None
+            return None
+            
+        # Write the overrides into a copy of the theme, keyed by its content
+        lines = []
+        remaining = dict(overrides)
+        for line in source.splitlines():
+            match = re.match(r"^(\s*\$([A-Za-z0-9_-]+)\s*=\s*)[^#]*?(\s*#.*)?$", line)
+            if match and match.group(2) in remaining:
+                line = f"{match.group(1)}{remaining.pop(match.group(2))}{match.group(3) or ''}"
+            lines.append(line)
+        if remaining:
+            lines += ["", "# ===== Fleet Overrides ====="] + [f"${name} = {value}" for name, value in remaining.items()]
+        content = "\n".join(lines) + "\n"
+        
+        digest = hashlib.sha256(content.encode()).hexdigest()[:16]
+        fleet_file = self.installer.cache_dir / "fleet" / f"{theme}-{digest}.conf"
+        if not fleet_file.exists():
+            fleet_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = fleet_file.with_name(f".{fleet_file.name}.{os.getpid()}")
+            tmp_path.write_text(content)
+            os.replace(tmp_path, fleet_file)
+            
+        self.palettes[key] = (fleet_file, dict(color_vars))
+        return self.palettes[key]
+
+    def run(self) -> int:
+        """Render every target in the manifest"""
+        if not self.installer.load_component_index():
+            logger.error("No component installers found")
+            return 1
+        targets = self.load_manifest()
+        if targets is None:
+            return 1
+            
+        jobs = []
+        failed = []
+        for target in targets:
+            palette = self.resolve_palette(target.get("theme", "default"), target["overrides"])
+            if palette is None:
+                failed.append(target["name"])
+                continue
+            color_file, color_vars = palette
+            jobs.append({
+                "name": target["name"],
+                "root": str(target["root"]),
+                "tarball": str(self.output_dir / f"{target['name']}.tar.gz") if self.tarballs else None,
+                "color_file": str(color_file),
+                "color_vars": color_vars,
+                "components": target["components"],
+                "args": self.args,
+            })
+            
+        workers = max(1, min(getattr(self.args, "jobs", None) or os.cpu_count() or 1, len(jobs)))
+        logger.info(f"Rendering {len(jobs)} targets with {workers} workers "
+                    f"({len(self.palettes)} distinct palettes)")
+        # Workers only report problems unless asked for more
+        log_level = logger.level if logger.level == logging.DEBUG else logging.WARNING
+        start = time.perf_counter()
+        if jobs:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_fleet_worker,
+                                     initargs=(self.installer.repo_root, log_level)) as pool:
+                for job, report in zip(jobs, pool.map(_render_fleet_target, jobs, chunksize=max(1, len(jobs) // (workers * 4)))):
+                    target_output = job["tarball"] or job["root"]
+                    if report["error"]:
+                        logger.error(f"Target {report['name']} failed: {report['error']}")
+                        failed.append(report["name"])
+                        continue
+                    broken = [name for name, result in report["results"].items() if not result]
+                    if broken:
+                        logger.warning(f"Target {report['name']}: {', '.join(broken)} failed")
+                        failed.append(report["name"])
+                    logger.info(f"Target {report['name']}: {report['written']} files written to {target_output}")
+                    
+        elapsed = time.perf_counter() - start
+        logger.info(f"Fleet summary: {len(targets) - len(failed)}/{len(targets)} targets rendered in {elapsed:.2f}s")
+        return 1 if failed else 0
+
+# Bump to rebuild every catalog entry when the entry format changes
+CATALOG_VERSION = 2
+
+# Colors whose OKLab coordinates make up a theme's fingerprint, seeds first
+CATALOG_COLORS = ["accent-primary", "accent-secondary", "accent-tertiary", "background", "foreground", "border"]
+
+# OKLCH hue (degrees) of each named hue; accents below CATALOG_GRAY_CHROMA are "gray"
+CATALOG_HUES = {
+    "red": 25, "orange": 55, "yellow": 100, "green": 145,
+    "cyan": 195, "blue": 250, "purple": 300, "pink": 350,
+}
+CATALOG_GRAY_CHROMA = 0.04
+
+# Everything describe() reads from a theme
+CATALOG_VARIABLES = set(CATALOG_COLORS) | CONTRAST_VARIABLES | {"current-theme"}
+
+# `key op value` terms of a --search query; other words match theme names
+SEARCH_TERM = re.compile(r"([a-z-]+)(>=|<=|!=|=|>|<)(\S+)")
+
+def srgb_to_oklab(rgba: Tuple[int, int, int, float]) -> Tuple[float, float, float]:
+    """OKLab coordinates of a single parsed color (alpha is ignored)"""
+    r, g, b = ((c / 255) / 12.92 if c / 255 <= 0.04045 else ((c / 255 + 0.055) / 1.055) ** 2.4 for c in rgba[:3])
+    l = (0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b) ** (1 / 3)
+    m = (0.2119034982 * r + 0.6806995451 * g + 0.1073969566 * b) ** (1 / 3)
+    s = (0.0883024619 * r + 0.2817188376 * g + 0.6299787005 * b) ** (1 / 3)
+    return (
+        0.2104542553 * l + 0.7936177850 * m - 0.0040720468 * s,
+        1.9779984951 * l - 2.4285922050 * m + 0.4505937099 * s,
+        0.0259040371 * l + 0.7827717662 * m - 0.8086757660 * s,
+    )
+
+def hue_name(lab: Tuple[float, float, float]) -> str:
+    """Closest entry of CATALOG_HUES, or "gray" for colors without much chroma"""
+    if math.hypot(lab[1], lab[2]) < CATALOG_GRAY_CHROMA:
+        return "gray"
+    hue = math.degrees(math.atan2(lab[2], lab[1])) % 360
+    return min(CATALOG_HUES, key=lambda name: min(abs(hue - CATALOG_HUES[name]), 360 - abs(hue - CATALOG_HUES[name])))
+
+class ThemeCatalog:
+    """
+    Persistent index of the themes in colors/
+    
+    Each entry holds a theme's mode, seed colors, a perceptual fingerprint
+    (the OKLab coordinates of CATALOG_COLORS) and its audit scores. The
+    catalog lives in .hyprnova-cache/catalog.json and is updated like the
+    component index: only files whose size or mtime changed are hashed, and
+    only files whose hash changed are parsed again.
+    """
+
+    def __init__(self, installer: HyprNovaInstaller):
+        self.installer = installer
+        self.path = installer.cache_dir / "catalog.json"
+        self.entries = {}
+
+    def describe(self, palettes: Dict[str, Mapping]) -> Dict[str, Dict[str, Any]]:
+        """Catalog entries for resolved palettes, with contrast computed in one batch"""
+        ratios = None
+        try:
+            ratios = contrast_ratios(palettes, CONTRAST_PAIRS + [("foreground", "background", WCAG_TEXT)])
+        except ImportError:
+            logger.warning("NumPy is not available; the catalog will have no contrast scores")
+            
+        if ratios is not None:
+            import numpy as np
+            minimums = np.array([minimum for _, _, minimum in CONTRAST_PAIRS])
+            audited_mask = ratios[:, :-1] == ratios[:, :-1]
+            
+        entries = {}
+        for row, (name, palette) in enumerate(palettes.items()):
+            colors = {color: parse_color(palette.get(color, "")) for color in CATALOG_COLORS}
+            lab = {color: srgb_to_oklab(rgba) if rgba else None for color, rgba in colors.items()}
+            primary = lab["accent-primary"]
+            mode = palette.get("current-theme", "").strip("\"'")
+            if mode not in ("dark", "light", "adaptive") and lab["background"]:
+                mode = "dark" if lab["background"][0] < 0.5 else "light"
+            entry = {
+                "mode": mode or None,
+                "seeds": {color: COLOR_FORMATTERS["hex"](rgba) for color, rgba in colors.items() if rgba},
+                "primary": hue_name(primary) if primary else None,
+                "secondary": hue_name(lab["accent-secondary"]) if lab["accent-secondary"] else None,
+                "hue": round(math.degrees(math.atan2(primary[2], primary[1])) % 360, 1) if primary else None,
+                "lightness": round(lab["background"][0], 3) if lab["background"] else None,
+                "fingerprint": [[round(v, 4) for v in value] if value else None for value in lab.values()],
+                "contrast": None,
+                "text-contrast": None,
+                "failures": None,
+            }
+            if ratios is not None:
+                audited = ratios[row, :-1]
+                audited = audited[audited_mask[row]]
+                entry["contrast"] = round(float(audited.min()), 2) if len(audited) else None
+                entry["text-contrast"] = round(float(ratios[row, -1]), 2) if ratios[row, -1] == ratios[row, -1] else None
+                entry["failures"] = int((audited < minimums[audited_mask[row]]).sum())
+            entries[name] = entry
+        return entries
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """The stored entries, without checking them against colors/"""
+        if self.path.exists():
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                if data.get("version") == CATALOG_VERSION:
+                    return data["themes"]
+            except (OSError, ValueError, KeyError):
+                pass
+        return {}
+
+    def save(self, entries: Dict[str, Dict[str, Any]]):
+        self.installer.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": CATALOG_VERSION, "themes": entries}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def merge(self, described: Dict[str, Tuple[Dict[str, Any], Path]]):
+        """Add entries described elsewhere (a theme pack) for color files that are now in place"""
+        entries = self.load()
+        for name, (entry, color_file) in described.items():
+            file_stat = color_file.stat()
+            entries[name] = dict(entry, file=color_file.name, stat=[file_stat.st_size, file_stat.st_mtime_ns],
+                                 hash=BackupStore.hash_file(color_file))
+        self.save(dict(sorted(entries.items())))
+
+    def update(self) -> Dict[str, Dict[str, Any]]:
+        """Bring the catalog up to date with colors/*.conf and return its entries"""
+        cached = self.load()
+        entries = {}
+        changed = {}
+        for color_file in sorted(self.installer.colors_dir.glob("*.conf")):
+            name = color_file.stem
+            file_stat = color_file.stat()
+            stat_key = [file_stat.st_size, file_stat.st_mtime_ns]
+            entry = cached.get(name)
+            if entry and entry["stat"] == stat_key:
+                entries[name] = entry
+                continue
+                
+            digest = BackupStore.hash_file(color_file)
+            if entry and entry["hash"] == digest:
+                entries[name] = dict(entry, stat=stat_key)
+            else:
+                changed[name] = (color_file, stat_key, digest)
+                
+        if changed:
+            logger.info(f"Indexing {len(changed)} themes")
+            palettes = {}
+            for name, (color_file, _, _) in changed.items():
+                palette = self.installer.load_palette_values(color_file, CATALOG_VARIABLES)
+                if palette:
+                    palettes[name] = dict(palette)
+            for name, entry in self.describe(palettes).items():
+                color_file, stat_key, digest = changed[name]
+                entries[name] = dict(entry, file=color_file.name, stat=stat_key, hash=digest)
+                
+        if entries != cached:
+            self.save(entries)
+            
+        self.entries = dict(sorted(entries.items()))
+        return self.entries
+
+    @staticmethod
+    def matches(name: str, entry: Dict[str, Any], query: str) -> bool:
+        """Check a theme against every term of a search query"""
+        for word in query.lower().split():
+            term = SEARCH_TERM.fullmatch(word)
+            if not term:
+                if word not in name.lower():
+                    return False
+                continue
+                
+            key, op, expected = term.groups()
+            value = name if key == "name" else entry.get(key)
+            if value is None:
+                return False
+            if isinstance(value, (int, float)):
+                try:
+                    expected = float(expected)
+                except ValueError:
+                    return False
+            else:
+                value = str(value).lower()
+            if not {
+                "=": lambda: value == expected,
+                "!=": lambda: value != expected,
+                ">=": lambda: value >= expected,
+                "<=": lambda: value <= expected,
+                ">": lambda: value > expected,
+                "<": lambda: value < expected,
+            }[op]():
+                return False
+        return True
+
+    def distances(self, target: str) -> Optional[Dict[str, float]]:
+        """
+        Perceptual distance of every theme to a color or another theme
+        
+        A color is compared with each theme's primary accent; a theme name
+        compares whole fingerprints.
+        
+        Returns:
+            dict: Theme name to distance (OKLab), or None if `target` is neither
+        """
+        rgba = parse_color(target)
+        if rgba:
+            point = srgb_to_oklab(rgba)
+            return {
+                name: math.dist(point, entry["fingerprint"][0])
+                for name, entry in self.entries.items() if entry["fingerprint"][0]
+            }
+        if target in self.entries:
+            reference = self.entries[target]["fingerprint"]
+            distances = {}
+            for name, entry in self.entries.items():
+                pairs = [(a, b) for a, b in zip(reference, entry["fingerprint"]) if a and b]
+                if pairs and name != target:
+                    distances[name] = math.sqrt(sum(math.dist(a, b) ** 2 for a, b in pairs) / len(pairs))
+            return distances
+        return None
+
+    def query(self, search: Optional[str] = None, nearest: Optional[str] = None, limit: Optional[int] = None) -> int:
+        """Print the themes matching `search`, closest to `nearest` first"""
+        entries = self.update()
+        names = [name for name, entry in entries.items() if not search or self.matches(name, entry, search)]
+        distances = {}
+        if nearest:
+            distances = self.distances(nearest)
+            if distances is None:
+                logger.error(f"Not a color or a known theme: {nearest}")
+                return 1
+            names = sorted((name for name in names if name in distances), key=distances.get)
+        if limit:
+            names = names[:limit]
+            
+        if not names:
+            print("No matching themes")
+            return 1
+        width = max(len(name) for name in names)
+        print(f"{'Theme':<{width}}  {'Mode':<8} {'Primary':<8} {'Secondary':<9} {'Contrast':>8} {'Text':>6}"
+              + ("  Distance" if nearest else ""))
+        for name in names:
+            entry = entries[name]
+            contrast = f"{entry['contrast']:.2f}" if entry["contrast"] is not None else "-"
+            text_contrast = f"{entry['text-contrast']:.1f}" if entry["text-contrast"] is not None else "-"
+            line = (f"{name:<{width}}  {entry['mode'] or '-':<8} {entry['primary'] or '-':<8} "
+                    f"{entry['secondary'] or '-':<9} {contrast:>8} {text_contrast:>6}")
+            if nearest:
+                line += f"  {distances[name]:.3f}"
+            print(line)
+        return 0
+
+# Bump when the layout of theme packs changes
+PACK_VERSION = 1
+
+# Repo files a pack carries with --pack-templates, relative to the repo root. Imports
+# write nothing else into the repo, so a pack can never add or replace code
+PACK_TEMPLATE_PATTERNS = ["**/*.template", "waybar/layout.jsonc", "waybar/modules/*.jsonc"]
+
+# Entries larger than this are rejected, so an import's memory stays bounded
+PACK_MAX_ENTRY_SIZE = 16 << 20
+
+THEME_NAME = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.-]*")
+
+class ThemePack:
+    """
+    Single-file theme packs: a gzipped tar streamed in one pass
+    
+    The first entry is manifest.json, with the SHA-256 of every other entry
+    and the catalog entry of every theme. It is followed by each theme's
+    `colors/<name>.conf` and, when it was current, its compiled form
+    `themes/<name>.bin`, then by any `templates/<path>`. Imports read the
+    archive sequentially, hold one entry in memory at a time, skip themes
+    that are already present with the same hash and never run code from a
+    pack (components are not included).
+    """
+
+    def __init__(self, installer: HyprNovaInstaller):
+        self.installer = installer
+
+    def template_files(self) -> List[Path]:
+        files = set()
+        for pattern in PACK_TEMPLATE_PATTERNS:
+            for path in self.installer.repo_root.glob(pattern):
+                relative = path.relative_to(self.installer.repo_root)
+                if path.is_file() and not relative.parts[0].startswith("."):
+                    files.add(relative)
+        return sorted(files)
+
+    @staticmethod
+    def is_template_path(relative: Path) -> bool:
+        """Whether a repo-relative path is one PACK_TEMPLATE_PATTERNS would export"""
+        parts = relative.parts
+        if not parts or relative.is_absolute() or ".." in parts or parts[0].startswith("."):
+            return False
+        for pattern in PACK_TEMPLATE_PATTERNS:
+            pattern_parts = pattern.split("/")
+            if pattern_parts[0] == "**":
+                # `**/` matches any number of leading directories, as in Path.glob
+                pattern_parts = pattern_parts[1:]
+                candidate = parts[-len(pattern_parts):]
+            elif len(parts) == len(pattern_parts):
+                candidate = parts
+            else:
+                continue
+            if len(candidate) == len(pattern_parts) and all(
+                fnmatch.fnmatchcase(part, part_pattern) for part, part_pattern in zip(candidate, pattern_parts)
+            ):
+                return True
+        return False
+
+    @staticmethod
+    def add_file(tar: tarfile.TarFile, arcname: str, path: Path):
+        info = tarfile.TarInfo(arcname)
+        info.size = path.stat().st_size
+        info.mode = 0o644
+        with open(path, "rb") as f:
+            tar.addfile(info, f)
+
+    def export_pack(self, pack_path: Path, search: Optional[str] = None, templates: bool = False) -> int:
+        """
+        Write the themes matching `search` (default: all), optionally with the repo's templates
+        
+        Returns:
+            int: Exit code
+        """
+        catalog = ThemeCatalog(self.installer)
+        entries = catalog.update()
+        names = [name for name, entry in entries.items() if not search or catalog.matches(name, entry, search)]
+        if not names:
+            logger.error("No themes to export")
+            return 1
+            
+        # Hash everything up front so the manifest can lead the archive
+        manifest = {"version": PACK_VERSION, "themes": {}, "templates": {}}
+        caches = {}
+        for name in names:
+            color_file = self.installer.colors_dir / entries[name]["file"]
+            described = {key: value for key, value in entries[name].items() if key not in ("file", "stat", "hash")}
+            theme = {"sha256": BackupStore.hash_file(color_file), "catalog": described}
+            compiled = self.installer.theme_cache.load(color_file)
+            if compiled is not None:
+                cache_file = self.installer.theme_cache.path(color_file)
+                theme["compiled_sha256"] = BackupStore.hash_file(cache_file)
+                caches[name] = cache_file
+            manifest["themes"][name] = theme
+        template_files = self.template_files() if templates else []
+        for relative in template_files:
+            manifest["templates"][relative.as_posix()] = BackupStore.hash_file(self.installer.repo_root / relative)
+            
+        pack_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = pack_path.with_name(f".{pack_path.name}.tmp")
+        try:
+            with tarfile.open(str(tmp_path), "w|gz") as tar:
+                data = json.dumps(manifest, indent=2).encode()
+                info = tarfile.TarInfo("manifest.json")
+                info.size = len(data)
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(data))
+                for name in names:
+                    self.add_file(tar, f"colors/{name}.conf", self.installer.colors_dir / entries[name]["file"])
+                    if name in caches:
+                        self.add_file(tar, f"themes/{name}.bin", caches[name])
+                for relative in template_files:
+                    self.add_file(tar, f"templates/{relative.as_posix()}", self.installer.repo_root / relative)
+            os.replace(tmp_path, pack_path)
+        except OSError as e:
+            Path(tmp_path).unlink(missing_ok=True)
+            logger.error(f"Failed to write theme pack {pack_path}: {e}")
+            return 1
+            
+        logger.info(f"Exported {len(names)} themes ({len(caches)} compiled) and {len(template_files)} templates "
+                    f"to {pack_path}")
+        return 0
+
+    def import_pack(self, pack_path: Path) -> int:
+        """
+        Merge a theme pack into colors/, the compiled theme cache, the catalog and (with templates) the repo
+        
+        Entries whose hash doesn't match the manifest are skipped. Replaced
+        files are backed up like any other install output.
+        
+        Returns:
+            int: Exit code
+        """
+        added = updated = unchanged = failed = templates = 0
+        described = {}
+        seen = set()
+        fresh = set()
+        try:
+            with tarfile.open(str(pack_path), "r|gz") as tar, self.installer.backup_store.deferred():
+                manifest = None
+                for member in tar:
+                    if manifest is None:
+                        if member.name != "manifest.json" or not member.isfile():
+                            logger.error(f"{pack_path} is not a theme pack (no leading manifest)")
+                            return 1
+                        manifest = json.load(tar.extractfile(member))
+                        if manifest.get("version") != PACK_VERSION:
+                            logger.error(f"Unsupported theme pack version: {manifest.get('version')}")
+                            return 1
+                        continue
+                        
+                    if member.isdir():
+                        continue
+                    kind, _, name = member.name.partition("/")
+                    if kind in ("colors", "themes"):
+                        name = name.rsplit(".", 1)[0]
+                        theme = manifest["themes"].get(name)
+                        if not THEME_NAME.fullmatch(name) or theme is None:
+                            logger.warning(f"Skipping unexpected pack entry {member.name}")
+                            continue
+                        color_file = self.installer.colors_dir / f"{name}.conf"
+                        if kind == "colors":
+                            seen.add(name)
+                            expected = theme["sha256"]
+                            if color_file.is_file() and BackupStore.hash_file(color_file) == expected:
+                                # Already here; its cache and catalog entry are kept as they are
+                                unchanged += 1
+                                continue
+                        else:
+                            expected = theme.get("compiled_sha256")
+                            if name not in fresh:
+                                continue
+                    elif kind == "templates":
+                        expected = manifest["templates"].get(name)
+                        relative = Path(name)
+                        if expected is None:
+                            logger.warning(f"Skipping unexpected pack entry {member.name}")
+                            continue
+                        if not self.is_template_path(relative):
+                            # Only template and layout files may land in the repo, never code
+                            logger.error(f"Refusing pack entry {member.name}: not a template or Waybar layout file")
+                            failed += 1
+                            continue
+                    else:
+                        logger.warning(f"Skipping unexpected pack entry {member.name}")
+                        continue
+                        
+                    if not member.isfile() or member.size > PACK_MAX_ENTRY_SIZE:
+                        logger.warning(f"Skipping pack entry {member.name}: not a regular file or too large")
+                        failed += 1
+                        continue
+                    data = tar.extractfile(member).read()
+                    if hashlib.sha256(data).hexdigest() != expected:
+                        logger.error(f"Hash mismatch for {member.name}, skipping it")
+                        failed += 1
+                        continue
+                        
+                    if kind == "colors":
+                        existed = color_file.exists()
+                        self.installer.write_output(color_file, data)
+                        fresh.add(name)
+                        described[name] = (theme["catalog"], color_file)
+                        if existed:
+                            logger.info(f"Replaced theme {name}")
+                            updated += 1
+                        else:
+                            added += 1
+                    elif kind == "themes":
+                        self.installer.theme_cache.install(color_file, data)
+                    else:
+                        if self.installer.write_output(self.installer.repo_root / relative, data):
+                            templates += 1
+        except (OSError, tarfile.TarError, ValueError, KeyError) as e:
+            logger.error(f"Failed to read theme pack {pack_path}: {e}")
+            return 1
+        finally:
+            if described:
+                ThemeCatalog(self.installer).merge(described)
+                
+        if manifest is None:
+            logger.error(f"{pack_path} is empty")
+            return 1
+        missing = set(manifest["themes"]) - seen
+        for name in sorted(missing):
+            logger.error(f"Theme {name} is listed in the manifest but missing from the pack")
+        logger.info(f"Imported {pack_path}: {added} new themes, {updated} replaced, {unchanged} already present, "
+                    f"{templates} templates updated, {failed} entries failed")
+        return 1 if failed or missing else 0
+
 def main():
     """Main entry point"""
-    import time
-    
     parser = argparse.ArgumentParser(description="HyprNova Theme Installer")
     parser.add_argument("--theme", "-t", help="Theme to install (default: default)")
     parser.add_argument("--components", "-c", nargs="+", help="Specific components to install")
     parser.add_argument("--list", "-l", action="store_true", help="List available components")
+    parser.add_argument("--themes", action="store_true", help="List the themes in the catalog")
+    parser.add_argument("--search", metavar="QUERY",
+                        help="Find themes, e.g. \"mode=dark primary=blue contrast>=7\" (words match names)")
+    parser.add_argument("--nearest", metavar="COLOR|THEME",
+                        help="Order themes by how close their primary accent is to a color, or by similarity to a theme")
+    parser.add_argument("--limit", type=int, help="Show at most this many themes")
+    parser.add_argument("--jobs", "-j", type=int, help="Number of components to install in parallel (default: CPU count)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
+    parser.add_argument("--rollback", nargs="?", const="", metavar="RUN",
+                        help="Undo a backup run: restore what it saved and remove what it created (default: newest)")
+    parser.add_argument("--restore", metavar="PATH", help="Restore a file or directory from a backup run")
+    parser.add_argument("--from", dest="from_run", metavar="RUN", help="Backup run used by --restore")
+    parser.add_argument("--from-image", metavar="IMAGE",
+                        help="Generate a theme from the colors of an image and apply it (named by --theme if given)")
+    parser.add_argument("--force", action="store_true",
+                        help="Let --from-image replace an existing theme (the old file is backed up)")
+    parser.add_argument("--audit", action="store_true",
+                        help="Check foreground/background contrast in every theme and exit")
+    parser.add_argument("--min-contrast", type=float,
+                        help="Lowest contrast ratio --audit accepts for every pair "
+                             "(default: WCAG AA per pair, 4.5 for text and 3 for icons)")
+    parser.add_argument("--derive-light", action="store_true",
+                        help="Have the theme generator write a -light variant of every dark theme")
+    parser.add_argument("--watch", "-w", action="store_true",
+                        help="Keep running and re-render affected outputs when colors or templates change")
+    parser.add_argument("--daemon", action="store_true", help="Run the theme-switch daemon")
+    parser.add_argument("--switch", metavar="THEME", help="Ask the running daemon to switch themes")
+    parser.add_argument("--transition", type=float, default=0, metavar="MS",
+                        help="With --switch: crossfade to the new theme over this many milliseconds")
+    parser.add_argument("--frames", type=int, metavar="N",
+                        help=f"With --transition: number of intermediate frames (default: {TRANSITION_FRAMES})")
+    parser.add_argument("--socket", type=Path, help="Daemon socket path (default: $XDG_RUNTIME_DIR/hyprnova.sock)")
+    parser.add_argument("--fleet", type=Path, metavar="MANIFEST",
+                        help="Render configs for every target in a fleet manifest")
+    parser.add_argument("--fleet-output", type=Path, metavar="DIR",
+                        help="Where fleet targets without a root are staged (default: fleet-output next to the manifest)")
+    parser.add_argument("--tarball", action="store_true",
+                        help="Write each fleet target as <output>/<name>.tar.gz instead of a directory")
+    parser.add_argument("--plan", nargs="?", const="", metavar="FILE",
+                        help="Show the changes an install would make, without making them (and save them to FILE)")
+    parser.add_argument("--apply-plan", type=Path, metavar="FILE", help="Make the changes of a plan saved by --plan")
+    parser.add_argument("--report", type=Path, metavar="FILE",
+                        help="Write per-stage timings, I/O and cache hits of the run as JSON")
+    parser.add_argument("--trace", type=Path, metavar="FILE",
+                        help="Write a Chrome trace of the run (open in chrome://tracing or Perfetto)")
+    parser.add_argument("--export-pack", type=Path, metavar="FILE",
+                        help="Write themes (those matching --search, or all) to a single-file theme pack")
+    parser.add_argument("--pack-templates", action="store_true",
+                        help="With --export-pack: include the repo's templates and Waybar module files")
+    parser.add_argument("--import-pack", type=Path, metavar="FILE", help="Merge a theme pack into this repo")
+    parser.add_argument("--gc", action="store_true", help="Prune old backup runs and unreferenced backup objects")
+    parser.add_argument("--keep", type=int, default=10, help="Number of backup runs kept by --gc (default: 10)")
     args = parser.parse_args()
     
     # Set log level
@@ -219,17 +3422,82 @@ def main():
     
     # Create installer
     installer = HyprNovaInstaller(repo_root)
+    installer.tracer.enabled = bool(args.report or args.trace)
+    
+    # Talk to or run the theme-switch daemon
+    socket_path = args.socket or default_socket_path()
+    if args.switch:
+        try:
+            command = f"switch {args.switch}"
+            if args.transition:
+                command += f" {args.transition:g} {args.frames or TRANSITION_FRAMES}"
+            reply = send_daemon_command(socket_path, command)
+        except OSError as e:
+            logger.error(f"Could not reach daemon at {socket_path}: {e}")
+            return 1
+        print(reply)
+        return 0 if reply.startswith("ok") else 1
+    if args.daemon:
+        return HyprNovaDaemon(installer, args, socket_path).serve()
+    
+    # Render a whole fleet if requested
+    if args.fleet:
+        return HyprNovaFleet(installer, args, args.fleet.expanduser().absolute(),
+                             args.fleet_output, args.tarball).run()
+    
+    # Audit theme contrast if requested
+    if args.audit:
+        return installer.audit(args.min_contrast, args.verbose)
+    
+    # Restore from backups if requested
+    if args.rollback is not None:
+        return installer.rollback(args.rollback or None)
+    if args.restore:
+        if not args.from_run:
+            parser.error("--restore requires --from RUN")
+        return installer.restore(Path(args.restore).expanduser().absolute(), args.from_run)
+    
+    # Apply a saved plan if requested
+    if args.apply_plan:
+        return installer.apply_plan(args.apply_plan.expanduser().absolute())
+    
+    # Prune backups if requested
+    if args.gc:
+        pruned = installer.backup_store.gc(args.keep)
+        logger.info(f"Pruned {pruned['runs']} backup runs and {pruned['objects']} objects ({pruned['bytes']} bytes)")
+        return 0
+    
+    # Export or import theme packs if requested
+    if args.export_pack:
+        return ThemePack(installer).export_pack(args.export_pack.expanduser().absolute(), args.search,
+                                                args.pack_templates)
+    if args.import_pack:
+        return ThemePack(installer).import_pack(args.import_pack.expanduser().absolute())
+    
+    # Query the theme catalog if requested
+    if args.themes or args.search or args.nearest:
+        return ThemeCatalog(installer).query(args.search, args.nearest, args.limit)
     
     # List components if requested
     if args.list:
-        installer.load_component_installers()
         print("Available components:")
-        for component in installer.components:
-            print(f"  - {component}")
+        for component, entry in installer.load_component_index().items():
+            if entry["description"]:
+                print(f"  - {component}: {entry['description']}")
+            else:
+                print(f"  - {component}")
         return 0
     
     # Run installer
-    return installer.run(args)
+    if args.watch:
+        return installer.watch(args)
+    if args.plan is not None:
+        result = installer.plan_run(args, Path(args.plan).expanduser().absolute() if args.plan else None)
+    else:
+        result = installer.run(args)
+    if not installer.tracer.save(args.report, args.trace):
+        return 1
+    return result
 
 if __name__ == "__main__":
     sys.exit(main())
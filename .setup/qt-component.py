@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+HyprNova Qt Component Installer
+"""
+
+from pathlib import Path
+from typing import Dict, Any
+
+# Resources this component needs before it runs, and the ones it makes available
+REQUIRES = []
+PROVIDES = ["qt"]
+
+# Variable for each QPalette role, in the order qt5ct/qt6ct color schemes list them
+PALETTE_ROLES = [
+    ("WindowText", "qt-fg"),
+    ("Button", "qt-button"),
+    ("Light", "zinc-700"),
+    ("Midlight", "zinc-800"),
+    ("Dark", "zinc-950"),
+    ("Mid", "zinc-900"),
+    ("Text", "qt-text"),
+    ("BrightText", "zinc-50"),
+    ("ButtonText", "qt-fg"),
+    ("Base", "qt-base"),
+    ("Window", "qt-bg"),
+    ("Shadow", "zinc-950"),
+    ("Highlight", "qt-selected-bg"),
+    ("HighlightedText", "qt-selected-fg"),
+    ("Link", "qt-accent"),
+    ("LinkVisited", "accent-tertiary"),
+    ("AlternateBase", "qt-bg"),
+    ("NoRole", "qt-bg"),
+    ("ToolTipBase", "qt-tooltip-bg"),
+    ("ToolTipText", "qt-tooltip-fg"),
+    ("PlaceholderText", "foreground-muted"),
+]
+
+# Disabled widgets dim their text roles
+DISABLED_ROLES = {
+    "WindowText": "foreground-muted",
+    "Text": "foreground-muted",
+    "ButtonText": "foreground-muted",
+    "HighlightedText": "foreground-muted",
+}
+
+def palette_line(key: str, overrides: Dict[str, str]) -> str:
+    colors = ", ".join(f"${{{overrides.get(role, name)}}}|qt" for role, name in PALETTE_ROLES)
+    return f"{key}={colors}\n"
+
+# Used when the repo has no qt/HyprNova.conf.template
+DEFAULT_TEMPLATE = (
+    "[ColorScheme]\n"
+    + palette_line("active_colors", {})
+    + palette_line("disabled_colors", DISABLED_ROLES)
+    + palette_line("inactive_colors", {})
+)
+
+def install(context: Dict[str, Any]) -> bool:
+    """
+    Install a HyprNova color scheme for qt5ct and qt6ct
+    
+    Select "HyprNova" as the color scheme in qt5ct/qt6ct to use it.
+    
+    Args:
+        context: Installation context containing helper functions and paths
+        
+    Returns:
+        bool: True if installation was successful, False otherwise
+    """
+    logger = context["logger"]
+    repo_root = context["repo_root"]
+    config_dir = context["config_dir"]
+    render_template = context["render_template"]
+    
+    logger.info("Installing Qt color scheme...")
+    
+    template = repo_root / "qt" / "HyprNova.conf.template"
+    source = template if template.exists() else DEFAULT_TEMPLATE
+    
+    for tool in ["qt5ct", "qt6ct"]:
+        if not render_template(source, config_dir / tool / "colors" / "HyprNova.conf"):
+            logger.error(f"Failed to render {tool} color scheme")
+            return False
+            
+    logger.info("Qt color scheme installed successfully")
+    return True
+
+# The restart hint is logged once per process, not on every switch or transition frame
+restart_noted = False
+
+def reload(context: Dict[str, Any]) -> bool:
+    """
+    Nothing to signal: qt5ct/qt6ct apps read their color scheme at startup
+    
+    Args:
+        context: Reload context containing the logger and the changed files
+        
+    Returns:
+        bool: Always False, running Qt apps keep their colors until restarted
+    """
+    global restart_noted
+    if not restart_noted:
+        context["logger"].info("Restart Qt apps to pick up the new color scheme")
+        restart_noted = True
+    return False
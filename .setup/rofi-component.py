@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+HyprNova Rofi Component Installer
+"""
+
+from pathlib import Path
+from typing import Dict, Any
+
+# Resources this component needs before it runs, and the ones it makes available
+REQUIRES = []
+PROVIDES = ["rofi"]
+
+# Used when the repo has no rofi/hyprnova-colors.rasi.template
+DEFAULT_TEMPLATE = """/* HyprNova Rofi colors (generated, do not edit)
+ * Use them from a theme with: @import "hyprnova-colors.rasi"
+ */
+
+* {
+    background: ${rofi-background}|hexa;
+    foreground: ${rofi-foreground}|hexa;
+    selected-background: ${rofi-selected-bg}|hexa;
+    selected-foreground: ${rofi-selected-fg}|hexa;
+    alternate-background: ${rofi-alternate-bg}|hexa;
+    border-color: ${rofi-border}|hexa;
+    scrollbar-color: ${rofi-scrollbar}|hexa;
+    urgent-color: ${accent-danger}|hexa;
+    active-color: ${accent-secondary}|hexa;
+}
+"""
+
+def install(context: Dict[str, Any]) -> bool:
+    """
+    Install Rofi colors
+    
+    Args:
+        context: Installation context containing helper functions and paths
+        
+    Returns:
+        bool: True if installation was successful, False otherwise
+    """
+    logger = context["logger"]
+    repo_root = context["repo_root"]
+    config_dir = context["config_dir"]
+    render_template = context["render_template"]
+    
+    logger.info("Installing Rofi configuration...")
+    
+    template = repo_root / "rofi" / "hyprnova-colors.rasi.template"
+    output = config_dir / "rofi" / "hyprnova-colors.rasi"
+    
+    if not render_template(template if template.exists() else DEFAULT_TEMPLATE, output):
+        logger.error("Failed to render Rofi colors")
+        return False
+        
+    logger.info("Rofi configuration installed successfully")
+    return True
+
+def reload(context: Dict[str, Any]) -> bool:
+    """
+    Nothing to signal: Rofi reads its theme each time it is launched
+    
+    Args:
+        context: Reload context containing the logger and the changed files
+        
+    Returns:
+        bool: Always False, as no running process was reloaded
+    """
+    return False
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+HyprNova Terminal Component Installer
+"""
+
+import subprocess
+from pathlib import Path
+from typing import Dict, Any
+
+# Resources this component needs before it runs, and the ones it makes available
+REQUIRES = []
+PROVIDES = ["terminal"]
+
+# Terminal colors 0-15, in ANSI order
+ANSI_COLORS = [
+    "black", "red", "green", "yellow", "blue", "magenta", "cyan", "white",
+]
+
+KITTY_TEMPLATE = """# HyprNova terminal colors (generated, do not edit)
+# Add `include hyprnova-colors.conf` to kitty.conf
+
+background ${terminal-background}|hex
+foreground ${terminal-foreground}|hex
+cursor ${terminal-cursor}|hex
+selection_background ${terminal-selection-bg}|hex
+selection_foreground ${terminal-selection-fg}|hex
+active_border_color ${accent-primary}|hex
+inactive_border_color ${border}|hex
+""" + "".join(
+    f"color{index} ${{terminal-{name}}}|hex\n" for index, name in enumerate(ANSI_COLORS)
+) + "".join(
+    f"color{index + 8} ${{terminal-bright-{name}}}|hex\n" for index, name in enumerate(ANSI_COLORS)
+)
+
+ALACRITTY_TEMPLATE = """# HyprNova terminal colors (generated, do not edit)
+# Add "~/.config/alacritty/hyprnova-colors.toml" to `import` in alacritty.toml
+
+[colors.primary]
+background = "${terminal-background}|hex"
+foreground = "${terminal-foreground}|hex"
+
+[colors.cursor]
+cursor = "${terminal-cursor}|hex"
+
+[colors.selection]
+background = "${terminal-selection-bg}|hex"
+text = "${terminal-selection-fg}|hex"
+
+[colors.normal]
+""" + "".join(
+    f'{name} = "${{terminal-{name}}}|hex"\n' for name in ANSI_COLORS
+) + """
+[colors.bright]
+""" + "".join(
+    f'{name} = "${{terminal-bright-{name}}}|hex"\n' for name in ANSI_COLORS
+)
+
+# (repo template, default template, output relative to the config directory)
+TARGETS = [
+    ("kitty/hyprnova-colors.conf.template", KITTY_TEMPLATE, "kitty/hyprnova-colors.conf"),
+    ("alacritty/hyprnova-colors.toml.template", ALACRITTY_TEMPLATE, "alacritty/hyprnova-colors.toml"),
+]
+
+def install(context: Dict[str, Any]) -> bool:
+    """
+    Install terminal colors for Kitty and Alacritty
+    
+    Args:
+        context: Installation context containing helper functions and paths
+        
+    Returns:
+        bool: True if installation was successful, False otherwise
+    """
+    logger = context["logger"]
+    repo_root = context["repo_root"]
+    config_dir = context["config_dir"]
+    render_template = context["render_template"]
+    
+    logger.info("Installing terminal colors...")
+    
+    success = True
+    for template_name, default_template, output_name in TARGETS:
+        template = repo_root / template_name
+        if not render_template(template if template.exists() else default_template, config_dir / output_name):
+            logger.error(f"Failed to render {output_name}")
+            success = False
+            
+    if success:
+        logger.info("Terminal colors installed successfully")
+    return success
+
+def reload(context: Dict[str, Any]) -> bool:
+    """
+    Ask running Kitty instances to reload their configuration
+    
+    Alacritty picks up changes to imported files by itself.
+    
+    Args:
+        context: Reload context containing the logger and the changed files
+        
+    Returns:
+        bool: True if a running Kitty was signalled, False otherwise
+    """
+    try:
+        result = subprocess.run(["pkill", "-SIGUSR1", "-x", "kitty"], capture_output=True, timeout=5)
+    except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+        context["logger"].debug(f"Could not reload Kitty: {e}")
+        return False
+    return result.returncode == 0
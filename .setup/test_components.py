@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+HyprNova Component Tests
+
+Checks the reload hooks the daemon calls after a theme switch.
+
+    python test_components.py
+"""
+
+import importlib.util
+import logging
+import subprocess
+import unittest
+import unittest.mock
+from pathlib import Path
+
+def load_component_module(script_dir: Path, name: str):
+    """Import a component next to this script (components/ in a checkout, *-component.py in .setup)"""
+    for path in [script_dir / "components" / f"{name}.py", script_dir / f"{name.replace('_', '-')}-component.py"]:
+        if path.exists():
+            spec = importlib.util.spec_from_file_location(f"hyprnova_{name}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+    raise FileNotFoundError(f"No {name} component found in {script_dir}")
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+def reload_context() -> dict:
+    return {"logger": logging.getLogger("hyprnova"), "changes": []}
+
+class FakeGsettings:
+    """Stands in for subprocess.run, keeping the gtk-theme value"""
+
+    def __init__(self, theme: str):
+        self.theme = theme
+        self.history = []
+
+    def __call__(self, args, **kwargs):
+        if args[1] == "set":
+            self.theme = args[-1]
+            self.history.append(self.theme)
+        return subprocess.CompletedProcess(args, 0, stdout=f"'{self.theme}'\n", stderr="")
+
+class ReloadHookTest(unittest.TestCase):
+    def test_gtk_theme_is_toggled_and_restored(self):
+        gtk = load_component_module(SCRIPT_DIR, "gtk")
+        for theme in ["Adwaita", "HighContrast"]:
+            with self.subTest(theme=theme):
+                gsettings = FakeGsettings(theme)
+                with unittest.mock.patch.object(gtk.subprocess, "run", gsettings):
+                    self.assertTrue(gtk.reload(reload_context()))
+                self.assertEqual(len(gsettings.history), 2)
+                self.assertNotEqual(gsettings.history[0], theme)
+                self.assertEqual(gsettings.theme, theme)
+
+    def test_gtk_without_gsettings(self):
+        gtk = load_component_module(SCRIPT_DIR, "gtk")
+        with unittest.mock.patch.object(gtk.subprocess, "run", side_effect=FileNotFoundError("gsettings")):
+            self.assertFalse(gtk.reload(reload_context()))
+
+    def test_apps_that_read_colors_at_startup(self):
+        for name in ["rofi", "qt"]:
+            with self.subTest(component=name):
+                component = load_component_module(SCRIPT_DIR, name)
+                self.assertFalse(component.reload(reload_context()))
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+HyprNova Installer Tests
+
+Regression tests for the installer core: component selection, output
+writes, the compiled theme cache, plan mode, backups and variable
+resolution.
+
+    python test_installer.py
+"""
+
+import contextlib
+import importlib.util
+import io
+import logging
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+from pathlib import Path
+
+def load_installer_module(script_dir: Path):
+    """Import the installer that sits next to this script (main.py in a checkout, python-installer.py in .setup)"""
+    for name in ["main.py", "python-installer.py"]:
+        path = script_dir / name
+        if path.exists():
+            spec = importlib.util.spec_from_file_location("hyprnova_installer", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+    raise FileNotFoundError(f"No installer found in {script_dir}")
+
+hyprnova = load_installer_module(Path(__file__).resolve().parent)
+
+# A component that records its import, so tests can tell which ones were loaded
+COMPONENT_SOURCE = '''"""{name} test component"""
+import os
+from pathlib import Path
+
+Path(os.environ["HYPRNOVA_TEST_IMPORTS"], "{name}").touch()
+
+def install(context):
+    return True
+'''
+
+class InstallerTestCase(unittest.TestCase):
+    """A fresh repo and config directory for every test"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.repo_root = self.root / "repo"
+        (self.repo_root / "colors").mkdir(parents=True)
+        (self.repo_root / "components").mkdir()
+        self.config_dir = self.root / "config"
+        self.config_dir.mkdir()
+        self.installer = hyprnova.HyprNovaInstaller(self.repo_root, config_dir=self.config_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+class ComponentSelectionTest(InstallerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.imports = self.root / "imports"
+        self.imports.mkdir()
+        self.environ = unittest.mock.patch.dict("os.environ", {"HYPRNOVA_TEST_IMPORTS": str(self.imports)})
+        self.environ.start()
+        for name in ["first", "second"]:
+            (self.repo_root / "components" / f"{name}.py").write_text(COMPONENT_SOURCE.format(name=name))
+
+    def tearDown(self):
+        self.environ.stop()
+        super().tearDown()
+
+    def test_empty_selection_loads_nothing(self):
+        self.installer.load_component_installers([])
+        self.assertEqual(self.installer.components, {})
+        self.assertEqual(list(self.imports.iterdir()), [])
+
+    def test_default_selection_loads_everything(self):
+        self.installer.load_component_installers()
+        self.assertEqual(set(self.installer.components), {"first", "second"})
+
+    def test_selection_loads_only_the_named_components(self):
+        self.installer.load_component_installers(["second"])
+        self.assertEqual(set(self.installer.components), {"second"})
+        self.assertEqual([path.name for path in self.imports.iterdir()], ["second"])
+
+class WriteOutputTest(InstallerTestCase):
+    def test_symlink_is_replaced_not_written_through(self):
+        dotfile = self.root / "dotfiles" / "hyprland.conf"
+        dotfile.parent.mkdir()
+        dotfile.write_text("tracked\n")
+        link = self.config_dir / "hyprland.conf"
+        link.symlink_to(dotfile)
+
+        self.assertTrue(self.installer.write_output(link, "generated\n"))
+        self.assertEqual(dotfile.read_text(), "tracked\n")
+        self.assertFalse(link.is_symlink())
+        self.assertEqual(link.read_text(), "generated\n")
+        self.assertEqual(self.installer.backup_store.entries[str(link)], {"type": "symlink", "target": str(dotfile)})
+
+        # Rolling back brings the link back
+        self.installer.backup_store.restore(self.installer.backup_store.entries)
+        self.assertTrue(link.is_symlink())
+        self.assertEqual(link.read_text(), "tracked\n")
+
+    def test_unchanged_file_is_left_alone(self):
+        output = self.config_dir / "out.conf"
+        self.assertTrue(self.installer.write_output(output, "same\n"))
+        self.assertFalse(self.installer.write_output(output, "same\n"))
+
+class ThemeCacheTest(InstallerTestCase):
+    def test_same_name_in_different_directories(self):
+        themes = {}
+        for directory, color in [("colors", "rgb(1, 2, 3)"), ("packs", "rgb(4, 5, 6)")]:
+            color_file = self.repo_root / directory / "nord.conf"
+            color_file.parent.mkdir(exist_ok=True)
+            color_file.write_text(f"$fg = {color}\n$bg = $fg\n")
+            themes[color_file] = color
+            self.assertEqual(dict(self.installer.load_color_variables(color_file)), {"fg": color, "bg": color})
+
+        self.assertEqual(len({self.installer.theme_cache.path(color_file) for color_file in themes}), 2)
+        for color_file, color in themes.items():
+            compiled = self.installer.theme_cache.load(color_file)
+            self.assertIsNotNone(compiled, f"the compiled {color_file} was overwritten")
+            self.assertEqual(compiled["bg"], color)
+
+class VariableResolutionTest(InstallerTestCase):
+    def test_names_match_exactly(self):
+        color_file = self.repo_root / "colors" / "exact.conf"
+        color_file.write_text("$bg = rgb(1, 2, 3)\n$bg-80 = rgba(1, 2, 3, 0.8)\n$panel = $bg-80\n")
+        color_vars = self.installer.load_color_variables(color_file)
+        self.assertEqual(color_vars["panel"], "rgba(1, 2, 3, 0.8)")
+
+    def test_undefined_name_never_falls_back_to_a_prefix(self):
+        color_file = self.repo_root / "colors" / "typo.conf"
+        color_file.write_text("$bg = rgb(1, 2, 3)\n$panel = $bg-80\n")
+        with self.assertLogs("hyprnova", "ERROR") as logs:
+            self.assertEqual(self.installer.load_color_variables(color_file), {})
+        self.assertIn("$bg-80", logs.output[0])
+        self.assertIn(f"{color_file}:2", logs.output[0])
+
+    def test_template_leaves_unknown_names_as_written(self):
+        output = self.config_dir / "out.css"
+        self.assertTrue(self.installer.render_template("test", "a: $bg; b: $bg-80; c: ${bg}-80\n", output,
+                                                       {"bg": "#010203"}))
+        self.assertEqual(output.read_text(), "a: #010203; b: $bg-80; c: #010203-80\n")
+
+class BackupRunTest(InstallerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = hyprnova.BackupStore(self.root / "backups")
+
+    def test_runs_sort_by_numeric_suffix(self):
+        self.store.runs_dir.mkdir(parents=True)
+        for run_id in ["20250101_120000.10", "20250101_120000", "20250101_120000.2", "20241231_235959.11"]:
+            (self.store.runs_dir / f"{run_id}.json").write_text("{}")
+        self.assertEqual(self.store.list_runs(), [
+            "20241231_235959.11", "20250101_120000", "20250101_120000.2", "20250101_120000.10",
+        ])
+
+    def test_failed_restore_removes_the_directories_it_made(self):
+        kept = self.config_dir / "kept.conf"
+        kept.write_text("before\n")
+        entries = self.store.backup(kept)
+        kept.write_text("after\n")
+        # Stored contents that have gone missing make staging fail part way
+        entries[str(self.config_dir / "new" / "deeper" / "lost.conf")] = {
+            "type": "file", "hash": "0" * 64, "mode": 0o644, "size": 1, "mtime_ns": 0,
+        }
+
+        with self.assertRaises(OSError):
+            self.store.restore(entries)
+        self.assertFalse((self.config_dir / "new").exists())
+        self.assertEqual(kept.read_text(), "after\n")
+        self.assertEqual(sorted(path.name for path in self.config_dir.iterdir()), ["kept.conf"])
+
+class PlanTest(InstallerTestCase):
+    def test_planned_theme_rewrite_beats_the_compiled_cache(self):
+        color_file = self.repo_root / "colors" / "default.conf"
+        color_file.write_text("$fg = rgb(1, 2, 3)\n$bg = $fg\n")
+        self.assertEqual(self.installer.load_color_variables(color_file)["bg"], "rgb(1, 2, 3)")
+        self.assertIsNotNone(self.installer.theme_cache.load(color_file))
+
+        self.installer.plan = hyprnova.ChangePlan()
+        self.installer.write_output(color_file, "$fg = rgb(4, 5, 6)\n$bg = $fg\n")
+        self.assertEqual(self.installer.load_color_variables(color_file)["bg"], "rgb(4, 5, 6)")
+        self.assertEqual(self.installer.load_palette_values(color_file, {"bg"}), {"bg": "rgb(4, 5, 6)"})
+        self.assertEqual(color_file.read_text(), "$fg = rgb(1, 2, 3)\n$bg = $fg\n")
+
+def numpy_available() -> bool:
+    return importlib.util.find_spec("numpy") is not None
+
+@unittest.skipUnless(numpy_available(), "contrast checks require NumPy")
+class ContrastAuditTest(InstallerTestCase):
+    def setUp(self):
+        super().setUp()
+        # White text on black everywhere, except an icon color that only clears the non-text minimum
+        lines = []
+        for fg, bg, _ in hyprnova.CONTRAST_PAIRS:
+            lines += [f"${fg} = rgb(255, 255, 255)", f"${bg} = rgb(0, 0, 0)"]
+        lines.append("$module-icon-color = rgb(100, 100, 100)")
+        self.color_file = self.repo_root / "colors" / "icons.conf"
+        self.color_file.write_text("\n".join(lines) + "\n")
+
+    def test_icons_use_the_non_text_minimum(self):
+        palette = self.installer.load_palette_values(self.color_file, hyprnova.CONTRAST_VARIABLES)
+        ratio = hyprnova.contrast_ratios({"icons": palette}, [("module-icon-color", "module-background", 0)])[0, 0]
+        self.assertTrue(hyprnova.WCAG_NON_TEXT < ratio < hyprnova.WCAG_TEXT)
+
+        self.assertEqual(hyprnova.ThemeCatalog(self.installer).describe({"icons": palette})["icons"]["failures"], 0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.installer.audit(), 0)
+            self.assertEqual(self.installer.audit(min_contrast=hyprnova.WCAG_TEXT), 1)
+
+    def test_palette_values_match_the_compiled_theme(self):
+        self.color_file.write_text(self.color_file.read_text() + "$gtk-bg = $module-icon-color\n")
+        names = {"gtk-bg", "gtk-fg"}
+        cold = self.installer.load_palette_values(self.color_file, names)
+        full = self.installer.load_color_variables(self.color_file)
+        self.assertIsNotNone(self.installer.theme_cache.load(self.color_file))
+        self.assertEqual(cold, {name: full[name] for name in names})
+        self.assertEqual(self.installer.load_palette_values(self.color_file, names), cold)
+
+class StopWatching(Exception):
+    pass
+
+class WatchTest(InstallerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.color_file = self.repo_root / "colors" / "default.conf"
+        self.color_file.write_text("$fg = rgb(1, 2, 3)\n")
+        self.template = self.repo_root / "test.template"
+        self.template.write_text("first $fg\n")
+        self.output = self.config_dir / "test.conf"
+        self.installer.color_file = self.color_file
+
+    def fake_run(self, args) -> int:
+        """Render one template, as a run with a single component would"""
+        installer = self.installer
+        installer.color_vars = installer.load_color_variables(self.color_file)
+        installer.render_jobs[self.output] = ("test", self.template, None)
+        installer.render_template("test", self.template, self.output, installer.color_vars)
+        self.started.set()
+        return 0
+
+    def test_edit_during_rerender_is_picked_up(self):
+        self.started = threading.Event()
+        finished = threading.Event()
+        rerender = self.installer.rerender
+        calls = []
+
+        def slow_rerender(outputs):
+            rendered = rerender(outputs)
+            calls.append(self.output.read_text())
+            if len(calls) == 1:
+                # Saved after the template was read, before the watcher looks again
+                self.template.write_text("third $fg\n")
+                return rendered
+            finished.set()
+            raise StopWatching()
+
+        def watch():
+            try:
+                self.installer.watch(None)
+            except StopWatching:
+                pass
+
+        self.installer.run = self.fake_run
+        self.installer.rerender = slow_rerender
+        thread = threading.Thread(target=watch, daemon=True)
+        thread.start()
+        self.assertTrue(self.started.wait(5))
+        # Give watch() time to set up its watcher after the initial run
+        time.sleep(0.5)
+        self.template.write_text("second $fg\n")
+
+        self.assertTrue(finished.wait(10), f"the edit made during a re-render was missed: {calls}")
+        self.assertEqual(self.output.read_text(), "third rgb(1, 2, 3)\n")
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main()
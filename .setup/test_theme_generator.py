@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+HyprNova Theme Generator Tests
+
+Checks that themes derived in one batch only ever see their own variables,
+and that generating a theme from an image never silently replaces one.
+
+    python test_theme_generator.py
+"""
+
+import contextlib
+import importlib.util
+import logging
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+def load_generator_module(script_dir: Path):
+    """Import the theme generator next to this script (components/ in a checkout, *-component.py in .setup)"""
+    for path in [script_dir / "components" / "theme_generator.py", script_dir / "theme-generator-component.py"]:
+        if path.exists():
+            spec = importlib.util.spec_from_file_location("hyprnova_theme_generator", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+    raise FileNotFoundError(f"No theme generator found in {script_dir}")
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+generator = load_generator_module(SCRIPT_DIR)
+
+def default_theme() -> str:
+    """default.conf from the repo (next to this script in a checkout, one level up from .setup)"""
+    for colors_dir in [SCRIPT_DIR / "colors", SCRIPT_DIR.parent / "colors"]:
+        if (colors_dir / "default.conf").exists():
+            return (colors_dir / "default.conf").read_text()
+    raise FileNotFoundError("No colors/default.conf found")
+
+def theme_value(text: str, name: str) -> str:
+    match = re.search(rf"^\${re.escape(name)}\s*=\s*(.*?)\s*(#|$)", text, re.MULTILINE)
+    return match.group(1) if match else None
+
+def resolved_value(text: str, name: str) -> str:
+    return generator.resolve_theme_values(text).get(name)
+
+@unittest.skipIf(generator.np is None, "the palette engine requires NumPy")
+class DeriveLightThemesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.colors_dir = Path(self.tmp.name)
+        default = default_theme()
+        # Sorted first, so a value borrowed from "the first file" would come from here
+        (self.colors_dir / "aaa.conf").write_text(default)
+        self.referencing = re.sub(r"^\$accent-tertiary = .*$", "$accent-tertiary = $accent-primary    # Same as primary",
+                                  default, flags=re.MULTILINE)
+        self.referencing = re.sub(r"^\$accent-primary = rgb\([^)]*\)", "$accent-primary = rgb(56, 120, 220)",
+                                  self.referencing, flags=re.MULTILINE)
+        (self.colors_dir / "bbb.conf").write_text(self.referencing)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reference_follows_its_own_theme(self):
+        generator.derive_light_themes(self.colors_dir)
+        light = (self.colors_dir / "bbb-light.conf").read_text()
+        other = (self.colors_dir / "aaa-light.conf").read_text()
+
+        self.assertEqual(theme_value(light, "accent-tertiary"), "$accent-primary")
+        self.assertEqual(resolved_value(light, "accent-tertiary"), resolved_value(light, "accent-primary"))
+        self.assertNotEqual(resolved_value(light, "accent-tertiary"), resolved_value(other, "accent-tertiary"))
+
+    def test_batch_matches_single_theme(self):
+        generator.derive_light_themes(self.colors_dir)
+        batched = (self.colors_dir / "bbb-light.conf").read_text()
+
+        (self.colors_dir / "aaa.conf").unlink()
+        (self.colors_dir / "aaa-light.conf").unlink()
+        generator.derive_light_themes(self.colors_dir)
+        self.assertEqual((self.colors_dir / "bbb-light.conf").read_text(), batched)
+
+    def test_missing_variables_are_not_borrowed(self):
+        (self.colors_dir / "bbb.conf").write_text(
+            re.sub(r"^\$accent-warning = .*\n", "", self.referencing, flags=re.MULTILINE)
+        )
+        palettes = generator.read_palettes([(self.colors_dir / name).read_text() for name in ["aaa.conf", "bbb.conf"]])
+        self.assertFalse(generator.np.isnan(palettes["accent-warning"][0]).any())
+        self.assertTrue(generator.np.isnan(palettes["accent-warning"][1]).all())
+
+        generator.derive_light_themes(self.colors_dir)
+        self.assertIsNone(theme_value((self.colors_dir / "bbb-light.conf").read_text(), "accent-warning"))
+
+class FromImageTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.colors_dir = root / "colors"
+        self.colors_dir.mkdir()
+        self.default = self.colors_dir / "default.conf"
+        self.default.write_text(default_theme())
+        self.written = []
+        self.context = {
+            "logger": logging.getLogger("hyprnova"),
+            "colors_dir": self.colors_dir,
+            "cache_dir": root / "cache",
+            "trace": lambda *args, **kwargs: contextlib.nullcontext(),
+            "write_output": lambda path, content: self.written.append(path) or path.write_text(content),
+        }
+        self.image = root / "wall.png"
+        if importlib.util.find_spec("PIL") is not None:
+            from PIL import Image
+            Image.new("RGB", (32, 32), (200, 40, 90)).save(self.image)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_existing_theme_is_not_replaced(self):
+        original = self.default.read_text()
+        self.assertIsNone(generator.generate_theme_from_image(self.context, self.image, "default"))
+        self.assertEqual(self.default.read_text(), original)
+        self.assertEqual(self.written, [])
+
+    @unittest.skipIf(generator.np is None or importlib.util.find_spec("PIL") is None, "requires NumPy and Pillow")
+    def test_force_replaces_through_write_output(self):
+        (self.colors_dir / "wall.conf").write_text("$foreground = rgb(0, 0, 0)\n")
+
+        self.assertIsNone(generator.generate_theme_from_image(self.context, self.image))
+        theme_file = generator.generate_theme_from_image(self.context, self.image, force=True)
+        self.assertEqual(theme_file, self.colors_dir / "wall.conf")
+        self.assertEqual(self.written, [theme_file])
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main()
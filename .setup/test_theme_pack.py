@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+HyprNova Theme Pack Tests
+
+Checks that importing a theme pack only ever writes theme files and the
+template and layout files PACK_TEMPLATE_PATTERNS allows, never code.
+
+    python test_theme_pack.py
+"""
+
+import hashlib
+import importlib.util
+import io
+import json
+import logging
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+def load_installer_module(script_dir: Path):
+    """Import the installer that sits next to this script (main.py in a checkout, python-installer.py in .setup)"""
+    for name in ["main.py", "python-installer.py"]:
+        path = script_dir / name
+        if path.exists():
+            spec = importlib.util.spec_from_file_location("hyprnova_installer", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+    raise FileNotFoundError(f"No installer found in {script_dir}")
+
+hyprnova = load_installer_module(Path(__file__).resolve().parent)
+
+def write_pack(pack_path: Path, templates: dict):
+    """Write a pack with no themes and the given {relative path: bytes} templates"""
+    manifest = {
+        "version": hyprnova.PACK_VERSION,
+        "themes": {},
+        "templates": {path: hashlib.sha256(data).hexdigest() for path, data in templates.items()},
+    }
+    with tarfile.open(str(pack_path), "w:gz") as tar:
+        for name, data in [("manifest.json", json.dumps(manifest).encode())] + [
+            (f"templates/{path}", data) for path, data in templates.items()
+        ]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+class ThemePackImportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.repo_root = root / "repo"
+        (self.repo_root / "colors").mkdir(parents=True)
+        (self.repo_root / "components").mkdir()
+        self.installer_file = self.repo_root / "main.py"
+        self.installer_file.write_text("# installer\n")
+        self.installer = hyprnova.HyprNovaInstaller(self.repo_root, config_dir=root / "config")
+        self.pack_path = root / "pack.tar.gz"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def import_pack(self, templates: dict) -> int:
+        write_pack(self.pack_path, templates)
+        return hyprnova.ThemePack(self.installer).import_pack(self.pack_path)
+
+    def test_imports_whitelisted_templates(self):
+        templates = {
+            "waybar/style.css.template": b"* { color: $foreground; }\n",
+            "waybar/layout.jsonc": b"{}\n",
+            "waybar/modules/clock.jsonc": b"{\"clock\": {}}\n",
+        }
+        self.assertEqual(self.import_pack(templates), 0)
+        for path, data in templates.items():
+            self.assertEqual((self.repo_root / path).read_bytes(), data)
+
+    def test_refuses_component_code(self):
+        self.assertEqual(self.import_pack({"components/zz.py": b"def install(context):\n    return True\n"}), 1)
+        self.assertFalse((self.repo_root / "components" / "zz.py").exists())
+        self.assertNotIn("zz", self.installer.load_component_index())
+
+    def test_refuses_installer_code(self):
+        self.assertEqual(self.import_pack({"main.py": b"print('replaced')\n"}), 1)
+        self.assertEqual(self.installer_file.read_text(), "# installer\n")
+
+    def test_refuses_paths_outside_the_patterns(self):
+        for path in ["waybar/modules/nested/clock.jsonc", "waybar/modules/clock.py", ".git/hooks/pre-commit.template",
+                     "waybar/../components/zz.template"]:
+            with self.subTest(path=path):
+                self.assertEqual(self.import_pack({path: b"x\n"}), 1)
+        self.assertFalse((self.repo_root / "waybar" / "modules").exists())
+        self.assertFalse((self.repo_root / ".git").exists())
+
+    def test_template_path_matches_export_patterns(self):
+        for path, allowed in [
+            ("style.css.template", True),
+            ("hypr/deep/appearance.conf.template", True),
+            ("waybar/layout.jsonc", True),
+            ("waybar/modules/clock.jsonc", True),
+            ("components/zz.py", False),
+            ("main.py", False),
+            ("layout.jsonc", False),
+            ("other/waybar/layout.jsonc", False),
+            ("/etc/passwd.template", False),
+        ]:
+            with self.subTest(path=path):
+                self.assertEqual(hyprnova.ThemePack.is_template_path(Path(path)), allowed)
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main()
@@ -7,74 +7,851 @@ import os
 from pathlib import Path
 import shutil
 import re
-from typing import Dict, Any
+import json
+import hashlib
+from typing import Dict, Any, List, Optional
 
-def create_theme(colors_dir, name, theme_mode, primary_color=None, secondary_color=None):
+try:
+    import numpy as np
+except ImportError:
+    # Only the palette engine needs NumPy; it raises ImportError when used without it
+    np = None
+
+# Resources this component needs before it runs, and the ones it makes available
+REQUIRES = []
+PROVIDES = ["themes"]
+
+# ===== Palette Engine =====
+# Colors are derived in OKLCH so lightness steps look even across hues.
+# Every function works on arrays with a trailing axis of 3 (or 4 with alpha),
+# so any number of themes is generated in one batch.
+
+# Linear sRGB <-> LMS and LMS' <-> OKLab matrices (Björn Ottosson)
+LMS_FROM_LINEAR = [
+    [0.4122214708, 0.5363325363, 0.0514459929],
+    [0.2119034982, 0.6806995451, 0.1073969566],
+    [0.0883024619, 0.2817188376, 0.6299787005],
+]
+OKLAB_FROM_LMS = [
+    [0.2104542553, 0.7936177850, -0.0040720468],
+    [1.9779984951, -2.4285922050, 0.4505937099],
+    [0.0259040371, 0.7827717662, -0.8086757660],
+]
+LMS_FROM_OKLAB = [
+    [1.0, 0.3963377774, 0.2158037573],
+    [1.0, -0.1055613458, -0.0638541728],
+    [1.0, -0.0894841775, -1.2914855480],
+]
+LINEAR_FROM_LMS = [
+    [4.0767416621, -3.3077115913, 0.2309699292],
+    [-1.2684380046, 2.6097574011, -0.3413193965],
+    [-0.0041960863, -0.7034186147, 1.7076147010],
+]
+
+# Neutral ramp as (name, OKLCH lightness, chroma), matching the shadcn zinc scale
+NEUTRAL_RAMP = [
+    ("zinc-50", 0.985, 0.000),
+    ("zinc-100", 0.967, 0.001),
+    ("zinc-200", 0.920, 0.004),
+    ("zinc-300", 0.871, 0.006),
+    ("zinc-400", 0.705, 0.015),
+    ("zinc-500", 0.552, 0.016),
+    ("zinc-600", 0.442, 0.017),
+    ("zinc-700", 0.370, 0.013),
+    ("zinc-800", 0.274, 0.006),
+    ("zinc-900", 0.210, 0.006),
+    ("zinc-950", 0.141, 0.005),
+]
+
+# Semantic accents keep a fixed hue and follow the primary's lightness and chroma
+SEMANTIC_HUES = {
+    "accent-success": 145.0,
+    "accent-warning": 70.0,
+    "accent-danger": 25.0,
+    "terminal-cyan": 215.0,
+}
+
+# Hue offsets from the primary for derived accents
+DERIVED_HUE_OFFSETS = {
+    "accent-secondary": -120.0,
+    "accent-tertiary": -50.0,
+}
+
+# Bright terminal colors are lighter, slightly calmer versions of their base
+BRIGHT_VARIANTS = {
+    "terminal-bright-red": "accent-danger",
+    "terminal-bright-green": "accent-success",
+    "terminal-bright-yellow": "accent-warning",
+    "terminal-bright-blue": "accent-secondary",
+    "terminal-bright-magenta": "accent-tertiary",
+    "terminal-bright-cyan": "terminal-cyan",
+}
+
+# Translucent variants as (base variable, alpha)
+ALPHA_VARIANTS = {
+    "background-90": ("zinc-950", 0.9),
+    "background-80": ("zinc-950", 0.8),
+    "background-70": ("zinc-950", 0.7),
+    "background-50": ("zinc-950", 0.5),
+    "background-30": ("zinc-950", 0.3),
+    "background-alt-80": ("zinc-900", 0.8),
+    "background-alt-50": ("zinc-900", 0.5),
+    "border-30": ("zinc-800", 0.3),
+    "border-50": ("zinc-800", 0.5),
+    "border-70": ("zinc-800", 0.7),
+}
+
+# Comments written next to regenerated accents (the defaults name specific hues)
+ACCENT_COMMENTS = {
+    "accent-primary": "Primary accent",
+    "accent-secondary": "Secondary accent",
+    "accent-tertiary": "Tertiary accent",
+}
+
+THEME_MODES = ["dark", "light", "adaptive"]
+
+# Wallpaper extraction: images are shrunk to at most this size a side and
+# clustered into this many colors in OKLab
+WALLPAPER_SAMPLE_SIZE = 256
+WALLPAPER_CLUSTERS = 8
+WALLPAPER_ITERATIONS = 16
+WALLPAPER_CACHE_VERSION = 1
+# Semantic colors take the hue of a wallpaper cluster this close (in degrees)
+WALLPAPER_HUE_SNAP = 25.0
+
+# Light themes: translucent variants move this far towards opaque, and accents keep
+# their dark-mode contrast against the background, clamped to this range
+LIGHT_ALPHA_BOOST = 0.5
+LIGHT_CONTRAST_RANGE = (3.0, 7.0)
+
+COLOR_PATTERN = re.compile(r"rgba?\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*(?:,\s*([\d.]+)\s*)?\)|#([0-9a-fA-F]{6})")
+THEME_HEADER = re.compile(r"^# HyprNova (?:.* )?Theme - Complete Color Definitions")
+THEME_LINE = re.compile(r"^(\$([A-Za-z0-9_-]+)\s*=\s*)(.*?)(\s*#.*)?$")
+
+def require_numpy():
+    """Raise a clear ImportError when the palette engine can't run"""
+    if np is None:
+        raise ImportError("the palette engine requires NumPy", name="numpy")
+
+def parse_rgb(color):
+    """Parse `rgb(r, g, b)`, `rgba(...)` or `#rrggbb` into an (r, g, b) tuple, or None"""
+    if not color:
+        return None
+    parsed = parse_rgba(color)
+    return parsed[:3] if parsed else None
+
+def parse_rgba(color):
+    """Like parse_rgb, but keeps the alpha of `rgba(...)` as a fourth item"""
+    match = COLOR_PATTERN.fullmatch(color.strip())
+    if not match:
+        return None
+    if match.group(5):
+        value = match.group(5)
+        return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+    rgb = tuple(min(int(channel), 255) for channel in match.group(1, 2, 3))
+    return rgb + (float(match.group(4)),) if match.group(4) else rgb
+
+def srgb_to_oklab(rgb):
+    """Convert sRGB values in 0-255 to OKLab"""
+    c = np.asarray(rgb, dtype=float) / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    lms = np.cbrt(linear @ np.transpose(LMS_FROM_LINEAR))
+    return lms @ np.transpose(OKLAB_FROM_LMS)
+
+def oklab_to_linear(lab):
+    """Convert OKLab to linear sRGB (may fall outside 0-1)"""
+    lms = (np.asarray(lab, dtype=float) @ np.transpose(LMS_FROM_OKLAB)) ** 3
+    return lms @ np.transpose(LINEAR_FROM_LMS)
+
+def linear_to_srgb(linear):
+    """Convert linear sRGB in 0-1 to sRGB values in 0-255"""
+    c = np.clip(linear, 0.0, 1.0)
+    encoded = np.where(c <= 0.0031308, c * 12.92, 1.055 * np.power(c, 1 / 2.4) - 0.055)
+    return np.round(encoded * 255.0).astype(np.uint8)
+
+def oklab_to_oklch(lab):
+    lab = np.asarray(lab, dtype=float)
+    chroma = np.hypot(lab[..., 1], lab[..., 2])
+    hue = np.degrees(np.arctan2(lab[..., 2], lab[..., 1])) % 360.0
+    return np.stack([lab[..., 0], chroma, hue], axis=-1)
+
+def oklch_to_oklab(lch):
+    lch = np.asarray(lch, dtype=float)
+    hue = np.radians(lch[..., 2])
+    return np.stack([lch[..., 0], lch[..., 1] * np.cos(hue), lch[..., 1] * np.sin(hue)], axis=-1)
+
+def oklch_to_srgb(lch, steps=16):
     """
-    Create a new theme based on the default colors
+    Convert OKLCH to sRGB 0-255, reducing chroma until each color fits the gamut
+    
+    Lightness and hue are preserved; out-of-gamut colors are bisected on
+    chroma in parallel rather than clipped per channel.
+    """
+    lch = np.array(lch, dtype=float)
+
+    def in_gamut(chroma):
+        linear = oklab_to_linear(oklch_to_oklab(np.stack([lch[..., 0], chroma, lch[..., 2]], axis=-1)))
+        return np.all((linear >= -1e-5) & (linear <= 1 + 1e-5), axis=-1)
+
+    outside = ~in_gamut(lch[..., 1])
+    if outside.any():
+        low = np.zeros_like(lch[..., 1])
+        high = lch[..., 1].copy()
+        for _ in range(steps):
+            middle = (low + high) / 2
+            fits = in_gamut(middle)
+            low = np.where(fits, middle, low)
+            high = np.where(fits, high, middle)
+        lch[..., 1] = np.where(outside, low, lch[..., 1])
+    return linear_to_srgb(oklab_to_linear(oklch_to_oklab(lch)))
+
+def relative_luminance(rgb):
+    """WCAG relative luminance of sRGB values in 0-255 (alpha is ignored)"""
+    c = np.asarray(rgb, dtype=float)[..., :3] / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    return linear @ np.array([0.2126, 0.7152, 0.0722])
+
+def contrast_ratio(foreground, background):
+    """WCAG contrast ratio between two arrays of sRGB colors"""
+    first = relative_luminance(foreground)
+    second = relative_luminance(background)
+    return (np.maximum(first, second) + 0.05) / (np.minimum(first, second) + 0.05)
+
+def generate_palettes(primary, secondary=None, tint=0.25, ramp_hue=None, semantic_hues=None):
+    """
+    Derive complete palettes from seed colors
     
     Args:
-        colors_dir: Directory containing color files
-        name: Theme name (without extension)
-        theme_mode: Theme mode (dark or light)
-        primary_color: Primary accent color (RGB format, optional)
-        secondary_color: Secondary accent color (RGB format, optional)
+        primary: Array of shape (n, 3) with primary accents as sRGB 0-255
+        secondary: Optional array of shape (n, 3); rows with negative values
+            are derived from the primary instead
+        tint: How strongly the neutral ramp leans towards its hue (scalar or shape (n,))
+        ramp_hue: Optional array of shape (n,) with the neutral ramp's hue;
+            NaN rows use the primary hue
+        semantic_hues: Optional dict of SEMANTIC_HUES names to arrays of shape (n,);
+            NaN rows keep the fixed hue
         
     Returns:
-        Path: Path to the created theme file, or None if failed
+        dict: Variable name to array of shape (n, 3) (opaque sRGB 0-255)
+            or (n, 4) (sRGB 0-255 plus alpha) for translucent variants
     """
-    # Validate inputs
-    if not name or not theme_mode:
-        return None
+    require_numpy()
+    primary_lch = oklab_to_oklch(srgb_to_oklab(np.asarray(primary, dtype=float).reshape(-1, 3)))
+    count = len(primary_lch)
+    lightness = np.clip(primary_lch[:, 0], 0.62, 0.80)
+    chroma = np.clip(primary_lch[:, 1], 0.12, 0.22)
+    hue = primary_lch[:, 2]
+    tint = np.broadcast_to(np.asarray(tint, dtype=float), (count,))
+    if ramp_hue is not None:
+        ramp_hue = np.asarray(ramp_hue, dtype=float).reshape(-1)
+        ramp_hue = np.where(np.isnan(ramp_hue), hue, ramp_hue)
+    else:
+        ramp_hue = hue
+    semantic_hues = semantic_hues or {}
+
+    # Everything except the seeds is converted in a single gamut-mapping pass
+    names = []
+    lch_rows = []
+
+    for name, ramp_lightness, ramp_chroma in NEUTRAL_RAMP:
+        names.append(name)
+        lch_rows.append(np.stack([
+            np.full(count, ramp_lightness),
+            ramp_chroma + tint * 0.02,
+            ramp_hue,
+        ], axis=-1))
+
+    for name, offset in DERIVED_HUE_OFFSETS.items():
+        names.append(name)
+        lch_rows.append(np.stack([primary_lch[:, 0], primary_lch[:, 1], (hue + offset) % 360.0], axis=-1))
+
+    for name, semantic_hue in SEMANTIC_HUES.items():
+        names.append(name)
+        name_hue = np.full(count, semantic_hue)
+        if name in semantic_hues:
+            given = np.asarray(semantic_hues[name], dtype=float).reshape(-1)
+            name_hue = np.where(np.isnan(given), semantic_hue, given)
+        lch_rows.append(np.stack([lightness, chroma, name_hue], axis=-1))
+
+    srgb = oklch_to_srgb(np.stack(lch_rows))
+    palettes = dict(zip(names, srgb))
+    palettes["accent-primary"] = np.asarray(primary, dtype=np.uint8).reshape(-1, 3)
+
+    if secondary is not None:
+        secondary = np.asarray(secondary, dtype=float).reshape(-1, 3)
+        given = np.all(secondary >= 0, axis=-1)
+        palettes["accent-secondary"] = np.where(
+            given[:, None], np.clip(secondary, 0, 255), palettes["accent-secondary"]
+        ).astype(np.uint8)
+
+    # Bright variants derive from the final (possibly user-supplied) bases
+    bright_names = list(BRIGHT_VARIANTS)
+    base_lch = oklab_to_oklch(srgb_to_oklab(np.stack([palettes[BRIGHT_VARIANTS[name]] for name in bright_names])))
+    base_lch[..., 0] = np.minimum(base_lch[..., 0] + 0.08, 0.92)
+    base_lch[..., 1] *= 0.9
+    palettes.update(zip(bright_names, oklch_to_srgb(base_lch)))
+
+    for name, (base, alpha) in ALPHA_VARIANTS.items():
+        palettes[name] = np.concatenate([palettes[base], np.full((count, 1), alpha)], axis=-1)
+
+    return palettes
+
+def derive_light_palettes(palettes):
+    """
+    Derive light counterparts of dark palettes
+    
+    The neutral ramp is mirrored (zinc-950 trades places with zinc-50), so
+    every semantic reference flips with it. Translucent variants follow their
+    mirrored base and become more opaque. Accents are darkened in OKLCH,
+    keeping hue and chroma, until they reach their dark-mode contrast
+    against the new background.
+    
+    Args:
+        palettes: Output of generate_palettes (or read_palettes)
+        
+    Returns:
+        dict: Same shape as the input, with light colors
+    """
+    require_numpy()
+    light = dict(palettes)
+    ramp = [name for name, _, _ in NEUTRAL_RAMP]
+    for name, mirrored in zip(ramp, reversed(ramp)):
+        light[name] = palettes[mirrored]
+        
+    for name, (base, alpha) in ALPHA_VARIANTS.items():
+        original_alpha = palettes[name][..., 3:] if name in palettes else np.full((len(light[base]), 1), alpha)
+        # Themes that don't define the variant get the standard alpha
+        original_alpha = np.where(np.isnan(original_alpha), alpha, original_alpha)
+        boosted = original_alpha + (1.0 - original_alpha) * LIGHT_ALPHA_BOOST
+        light[name] = np.concatenate([light[base][..., :3], boosted], axis=-1)
+        
+    accents = ["accent-primary"] + list(DERIVED_HUE_OFFSETS) + list(SEMANTIC_HUES) + list(BRIGHT_VARIANTS)
+    accents = [name for name in accents if name in palettes]
+    colors = np.stack([palettes[name][..., :3] for name in accents]).astype(float)
+    dark_background = palettes["zinc-950"][..., :3]
+    light_background = light["zinc-950"][..., :3]
+    # Themes missing an accent or a background keep NaN there (read_palettes);
+    # the math runs on zeros instead and the result is masked out again
+    missing = np.isnan(colors).any(axis=-1) | np.isnan(dark_background).any(axis=-1) \
+        | np.isnan(light_background).any(axis=-1)
+    colors = np.nan_to_num(colors)
+    dark_background = np.nan_to_num(dark_background)
+    light_background = np.nan_to_num(light_background)
+    target = np.clip(contrast_ratio(colors, dark_background), *LIGHT_CONTRAST_RANGE)
+    
+    # Bisect for the lightest shade that still meets the target contrast
+    lch = oklab_to_oklch(srgb_to_oklab(colors))
+    low = np.zeros_like(lch[..., 0])
+    high = lch[..., 0].copy()
+    already = contrast_ratio(colors, light_background) >= target
+    for _ in range(20):
+        middle = (low + high) / 2
+        candidate = oklch_to_srgb(np.stack([middle, lch[..., 1], lch[..., 2]], axis=-1))
+        fits = contrast_ratio(candidate, light_background) >= target
+        low = np.where(fits, middle, low)
+        high = np.where(fits, high, middle)
+    lch[..., 0] = np.where(already, lch[..., 0], low)
+    light.update(zip(accents, np.where(missing[..., None], np.nan, oklch_to_srgb(lch))))
+    
+    return light
+
+def read_palettes(texts):
+    """
+    Collect the generated variables from theme files into batched arrays
+    
+    Args:
+        texts: Contents of theme files (at least one)
+        
+    Returns:
+        dict: Variable name to array of shape (n, 3) or (n, 4); rows are NaN
+            where a file doesn't define the variable (directly or through a
+            reference to another of its own variables)
+    """
+    require_numpy()
+    names = [name for name, _, _ in NEUTRAL_RAMP] + ["accent-primary"] + list(DERIVED_HUE_OFFSETS)
+    names += list(SEMANTIC_HUES) + list(BRIGHT_VARIANTS) + list(ALPHA_VARIANTS)
+    parsed = []
+    for text in texts:
+        values = resolve_theme_values(text)
+        parsed.append({name: parse_rgba(values[name]) for name in names if values.get(name)})
+        
+    palettes = {}
+    for name in names:
+        rows = [values.get(name) for values in parsed]
+        if not any(rows):
+            continue
+        width = max(len(row) for row in rows if row)
+        palettes[name] = np.array([
+            (float("nan"),) * width if not row else row if len(row) == width else row + (1.0,)
+            for row in rows
+        ], dtype=float)
+    return palettes
+
+def resolve_theme_values(text):
+    """
+    The variables of one theme file, with `$name` references followed within that file
+    
+    Only whole-value references are followed (that's how colors alias each
+    other); anything else, like a gradient, is returned as written. A
+    reference to a missing name, or a cycle, leaves the variable out.
+    """
+    raw = {}
+    for line in text.splitlines():
+        match = THEME_LINE.match(line.strip())
+        if match:
+            raw[match.group(2)] = match.group(3).strip()
+            
+    values = {}
+    for name, value in raw.items():
+        seen = {name}
+        while value.startswith("$") and value[1:] in raw and value[1:] not in seen:
+            seen.add(value[1:])
+            value = raw[value[1:]]
+        if not value.startswith("$"):
+            values[name] = value
+    return values
+
+def load_image_pixels(image_path, size=WALLPAPER_SAMPLE_SIZE):
+    """Decode an image at reduced size, returning an (n, 3) array of sRGB pixels"""
+    require_numpy()
+    from PIL import Image
+    
+    with Image.open(image_path) as image:
+        # JPEGs are decoded directly at 1/2 - 1/8 scale
+        image.draft("RGB", (size, size))
+        image = image.convert("RGB")
+        image.thumbnail((size, size), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        return np.asarray(image, dtype=np.uint8).reshape(-1, 3)
+
+def cluster_colors(pixels, count=WALLPAPER_CLUSTERS, iterations=WALLPAPER_ITERATIONS):
+    """
+    Find the dominant colors of an image with weighted k-means in OKLab
+    
+    Pixels are first binned to 5 bits per channel, so the clustering runs
+    over distinct colors weighted by how often they occur rather than over
+    every pixel.
+    
+    Args:
+        pixels: Array of shape (n, 3) with sRGB values in 0-255
+        count: Number of clusters
+        iterations: Maximum number of k-means iterations
+        
+    Returns:
+        tuple: OKLab centroids of shape (k, 3) and their pixel shares, heaviest first
+    """
+    require_numpy()
+    bins = pixels.astype(np.int32) >> 3
+    packed = (bins[:, 0] << 10) | (bins[:, 1] << 5) | bins[:, 2]
+    histogram = np.bincount(packed, minlength=1 << 15)
+    occupied = np.flatnonzero(histogram)
+    weights = histogram[occupied].astype(float)
+    colors = np.stack([occupied >> 10, (occupied >> 5) & 31, occupied & 31], axis=-1) * 8 + 4
+    lab = srgb_to_oklab(colors)
+    count = min(count, len(lab))
+    
+    # Deterministic farthest-point seeding, weighted by how common each color is
+    centroids = [lab[np.argmax(weights)]]
+    nearest = ((lab - centroids[0]) ** 2).sum(axis=-1)
+    for _ in range(count - 1):
+        centroids.append(lab[np.argmax(weights * nearest)])
+        nearest = np.minimum(nearest, ((lab - centroids[-1]) ** 2).sum(axis=-1))
+    centroids = np.array(centroids)
+    
+    for _ in range(iterations):
+        labels = ((lab[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=-1).argmin(axis=1)
+        totals = np.bincount(labels, weights, minlength=count)
+        sums = np.stack([np.bincount(labels, weights * lab[:, axis], minlength=count) for axis in range(3)], axis=-1)
+        updated = np.where(totals[:, None] > 0, sums / np.maximum(totals, 1e-12)[:, None], centroids)
+        converged = np.allclose(updated, centroids, atol=1e-4)
+        centroids = updated
+        if converged:
+            break
+            
+    labels = ((lab[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=-1).argmin(axis=1)
+    shares = np.bincount(labels, weights, minlength=count) / weights.sum()
+    order = np.argsort(-shares)
+    return centroids[order], shares[order]
+
+def hue_distance(first, second):
+    """Angular distance between hues in degrees"""
+    difference = np.abs(np.asarray(first, dtype=float) - second) % 360.0
+    return np.minimum(difference, 360.0 - difference)
+
+def wallpaper_seeds(centroids, shares):
+    """
+    Map dominant image colors onto theme seeds
+    
+    The primary accent is the brightest, most colorful cluster that covers a fair part
+    of the image, the secondary the next one with a clearly different hue.
+    The neutral ramp is tinted towards the image's dominant color, and
+    semantic and terminal colors borrow the hue of a nearby cluster.
+    
+    Args:
+        centroids: OKLab centroids of shape (k, 3)
+        shares: Fraction of the image each centroid covers
+        
+    Returns:
+        dict: Theme keys for create_themes ("primary", "secondary", "tint",
+            "ramp_hue", "semantic_hues") plus the extracted "colors"
+    """
+    lch = oklab_to_oklch(centroids)
+    colorful = (lch[:, 1] > 0.03) & (lch[:, 0] > 0.25) & (lch[:, 0] < 0.95)
+    # Bright, saturated clusters make better accents than large dark ones
+    score = shares ** 0.25 * lch[:, 1] * lch[:, 0] * colorful
+    primary = int(np.argmax(score)) if colorful.any() else int(np.argmax(lch[:, 1]))
+    
+    # Accents must stay readable on the dark ramp, whatever the image's lightness
+    accents = lch.copy()
+    accents[:, 0] = np.clip(accents[:, 0], 0.62, 0.82)
+    accent_srgb = oklch_to_srgb(accents)
+    
+    distinct = colorful & (hue_distance(lch[:, 2], lch[primary, 2]) > 40.0)
+    secondary = int(np.argmax(np.where(distinct, score, -1.0))) if distinct.any() else None
+    
+    semantic_hues = {}
+    for name, semantic_hue in SEMANTIC_HUES.items():
+        distance = np.where(colorful, hue_distance(lch[:, 2], semantic_hue), np.inf)
+        if distance.min() <= WALLPAPER_HUE_SNAP:
+            semantic_hues[name] = float(lch[np.argmin(distance), 2])
+            
+    dominant = lch[0]
+    return {
+        "primary": format_color(accent_srgb[primary]),
+        "secondary": format_color(accent_srgb[secondary]) if secondary is not None else None,
+        "tint": float(np.clip(dominant[1] / 0.08, 0.0, 1.0)),
+        "ramp_hue": float(dominant[2]) if dominant[1] > 0.02 else float(lch[primary, 2]),
+        "semantic_hues": semantic_hues,
+        "colors": [[format_color(color), round(float(share), 4)]
+                   for color, share in zip(oklch_to_srgb(lch), shares)],
+    }
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def extract_wallpaper_seeds(image_path, cache_dir=None):
+    """
+    Theme seeds for an image, cached by the image's content hash
+    
+    The cache also remembers each path's size and mtime, so an unchanged
+    wallpaper is neither decoded nor re-hashed.
+    
+    Args:
+        image_path: Path to the image
+        cache_dir: Directory for `wallpapers.json` (optional, no caching without it)
         
-    if theme_mode not in ["dark", "light"]:
+    Returns:
+        dict: Seeds as returned by wallpaper_seeds
+    """
+    image_path = Path(image_path).expanduser().resolve()
+    stat = image_path.stat()
+    cache_file = Path(cache_dir) / "wallpapers.json" if cache_dir else None
+    cache = {"version": WALLPAPER_CACHE_VERSION, "paths": {}, "images": {}}
+    if cache_file and cache_file.exists():
+        try:
+            with open(cache_file, "r") as f:
+                stored = json.load(f)
+            if stored.get("version") == WALLPAPER_CACHE_VERSION:
+                cache = stored
+        except (OSError, ValueError):
+            pass
+            
+    entry = cache["paths"].get(str(image_path))
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        digest = entry["hash"]
+    else:
+        digest = file_digest(image_path)
+        
+    seeds = cache["images"].get(digest)
+    if seeds is not None and entry and entry["hash"] == digest:
+        return seeds
+    if seeds is None:
+        seeds = wallpaper_seeds(*cluster_colors(load_image_pixels(image_path)))
+        cache["images"][digest] = seeds
+    cache["paths"][str(image_path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+    
+    if cache_file:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = cache_file.with_name(f".{cache_file.name}.{os.getpid()}")
+        with open(temp_file, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temp_file, cache_file)
+    return seeds
+
+def format_color(value):
+    """Format a palette entry as Hyprland `rgb(...)` or `rgba(...)`"""
+    if len(value) == 4:
+        return f"rgba({int(value[0])}, {int(value[1])}, {int(value[2])}, {value[3]:g})"
+    return f"rgb({int(value[0])}, {int(value[1])}, {int(value[2])})"
+
+# Theme transitions: the stops and optional angle of a resolved value
+TRANSITION_PART = re.compile(r"rgba?\([^)]*\)|#[0-9a-fA-F]{6}|(-?[\d.]+)deg")
+
+def split_color_value(value):
+    """
+    Parse a resolved color or gradient into its stops and angle
+    
+    Returns:
+        tuple: (list of (r, g, b, alpha), angle in degrees or None, whether
+            any stop is translucent), or None if the value isn't made of colors
+    """
+    stops = []
+    angle = None
+    for match in TRANSITION_PART.finditer(value):
+        if match.group(1) is not None:
+            angle = float(match.group(1))
+            continue
+        parsed = parse_rgba(match.group(0))
+        if parsed is None:
+            return None
+        stops.append(parsed)
+    if not stops or re.sub(r"\s+", "", TRANSITION_PART.sub("", value)):
         return None
+    translucent = any(len(stop) == 4 for stop in stops)
+    return [stop if len(stop) == 4 else stop + (1.0,) for stop in stops], angle, translucent
+
+def interpolate_palettes(start, end, steps):
+    """
+    Palettes between two resolved palettes, for animated theme switches
+    
+    Colors move through OKLab with premultiplied alpha, so a color fading in
+    from transparent keeps its hue, and with smoothstep easing. Gradients are
+    interpolated stop by stop (the shorter one repeats its last stop) along
+    with their angle. Every color of every frame is computed in one batch;
+    values that aren't colors switch from `start` to `end` halfway.
+    
+    Args:
+        start: Variable name to resolved value before the switch
+        end: Variable name to resolved value after the switch
+        steps: Number of intermediate palettes
         
-    # Source and destination files
-    default_colors = colors_dir / "default.conf"
-    theme_file = colors_dir / f"{name}.conf"
+    Returns:
+        list: `steps` palettes with the variables of `end`, excluding both ends
+    """
+    require_numpy()
+    t = np.arange(1, steps + 1) / (steps + 1)
+    t = t * t * (3 - 2 * t)
     
+    rows = []
+    first = []
+    last = []
+    for name, value in end.items():
+        source = split_color_value(start[name]) if name in start else None
+        target = split_color_value(value)
+        if source is None or target is None:
+            continue
+        count = max(len(source[0]), len(target[0]))
+        first += source[0] + [source[0][-1]] * (count - len(source[0]))
+        last += target[0] + [target[0][-1]] * (count - len(target[0]))
+        rows.append((name, count, source[1], target[1], source[2] or target[2]))
+        
+    frames = [
+        {name: value if step >= 0.5 else start.get(name, value) for name, value in end.items()}
+        for step in t
+    ]
+    if not rows:
+        return frames
+        
+    first = np.array(first, dtype=float)
+    last = np.array(last, dtype=float)
+    first_lab = srgb_to_oklab(first[:, :3])
+    last_lab = srgb_to_oklab(last[:, :3])
+    alpha = first[:, 3] + (last[:, 3] - first[:, 3]) * t[:, None]
+    premultiplied = first_lab * first[:, 3:] + (last_lab * last[:, 3:] - first_lab * first[:, 3:]) * t[:, None, None]
+    # Where both ends are fully transparent there is no hue to keep; mix plainly
+    plain = first_lab + (last_lab - first_lab) * t[:, None, None]
+    lab = np.where(alpha[..., None] > 1e-6, premultiplied / np.maximum(alpha, 1e-6)[..., None], plain)
+    rgb = linear_to_srgb(oklab_to_linear(lab))
+    alpha = np.round(alpha, 3)
+    
+    for index, palette in enumerate(frames):
+        offset = 0
+        for name, count, source_angle, target_angle, translucent in rows:
+            stops = [
+                format_color((*rgb[index, row], alpha[index, row]) if translucent else rgb[index, row])
+                for row in range(offset, offset + count)
+            ]
+            offset += count
+            if source_angle is not None and target_angle is not None:
+                stops.append(f"{round(source_angle + (target_angle - source_angle) * t[index], 1):g}deg")
+            elif (target_angle if t[index] >= 0.5 else source_angle) is not None:
+                stops.append(f"{target_angle if t[index] >= 0.5 else source_angle:g}deg")
+            palette[name] = " ".join(stops)
+    return frames
+
+def render_theme(template, title_case_name, theme_mode, palette):
+    """Fill a copy of default.conf with a generated palette, keeping its layout and references"""
+    lines = []
+    for line in template.splitlines():
+        if THEME_HEADER.match(line):
+            line = f"# HyprNova {title_case_name} Theme - Complete Color Definitions"
+        match = THEME_LINE.match(line)
+        if match:
+            prefix, name, value, comment = match.groups()
+            if name == "current-theme":
+                line = f'{prefix}"{theme_mode}"{comment or ""}'
+            elif value.startswith("$"):
+                # References stay as written, so they follow the new palette
+                pass
+            elif name in palette:
+                if theme_mode == "light" and name.startswith("zinc-"):
+                    # The mirrored ramp no longer matches the "Almost white" style comments
+                    comment = None
+                elif name in ACCENT_COMMENTS:
+                    comment = re.sub(r"#.*", f"# {ACCENT_COMMENTS[name]}", comment or "    #")
+                line = f"{prefix}{palette[name]}{comment or ''}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+def write_theme(theme_file, content, write_output=None):
+    """Write a theme file through the installer helper when available"""
+    if write_output:
+        write_output(theme_file, content)
+    else:
+        with open(theme_file, "w") as f:
+            f.write(content)
+
+def create_themes(colors_dir, themes, write_output=None):
+    """
+    Create several themes from seed colors in one batched palette pass
+    
+    Themes in "light" mode get a derived light palette. "adaptive" themes
+    are written twice: `<name>.conf` with the dark palette and
+    `<name>-light.conf` with its light counterpart, so switching between
+    them needs no recomputation.
+    
+    Args:
+        colors_dir: Directory containing color files
+        themes: List of dicts with "name", "mode" and optional "primary"/"secondary"
+            colors; "tint", "ramp_hue" and "semantic_hues" (see generate_palettes)
+            are optional too
+        write_output: Installer write helper (optional, skips unchanged files)
+        
+    Returns:
+        list: Path to each created theme file, or None where creation failed
+    """
+    require_numpy()
+    default_colors = colors_dir / "default.conf"
     if not default_colors.exists():
-        return None
+        return [None] * len(themes)
         
-    # Read default colors
     with open(default_colors, "r") as f:
-        content = f.read()
+        template = f.read()
         
-    # Update theme name
-    content = re.sub(r'\$current-theme = ".*"', f'$current-theme = "{theme_mode}"', content)
+    # Seeds left out fall back to the default theme's accents
+    default_primary = re.search(r"^\$accent-primary = (.*?)\s*(#|$)", template, re.MULTILINE)
+    default_primary = parse_rgb(default_primary.group(1)) if default_primary else (244, 114, 182)
     
-    # Update theme comment
-    title_case_name = "".join(word.capitalize() for word in name.split("_"))
-    content = re.sub(
-        r'# HyprNova Theme - Complete Color Definitions',
-        f'# HyprNova {title_case_name} Theme - Complete Color Definitions',
-        content
+    valid = []
+    for index, theme in enumerate(themes):
+        if not theme.get("name") or theme.get("mode") not in THEME_MODES:
+            continue
+        primary = parse_rgb(theme.get("primary")) if theme.get("primary") else default_primary
+        secondary = parse_rgb(theme.get("secondary")) if theme.get("secondary") else (-1, -1, -1)
+        if primary is None or secondary is None:
+            continue
+        valid.append((index, primary, secondary))
+        
+    results = [None] * len(themes)
+    if not valid:
+        return results
+        
+    seeded = [themes[index] for index, _, _ in valid]
+    palettes = generate_palettes(
+        np.array([primary for _, primary, _ in valid]),
+        np.array([secondary for _, _, secondary in valid]),
+        tint=np.array([theme.get("tint", 0.25) for theme in seeded]),
+        ramp_hue=np.array([theme.get("ramp_hue", np.nan) for theme in seeded]),
+        semantic_hues={name: np.array([(theme.get("semantic_hues") or {}).get(name, np.nan) for theme in seeded])
+                       for name in SEMANTIC_HUES},
     )
+    light_palettes = None
+    if any(themes[index]["mode"] != "dark" for index, _, _ in valid):
+        light_palettes = derive_light_palettes(palettes)
     
-    # Update primary color if provided
-    if primary_color:
-        content = re.sub(
-            r'\$accent-primary = .*?#.*$',
-            f'$accent-primary = {primary_color}    # Primary accent',
-            content,
-            flags=re.MULTILINE
-        )
+    for row, (index, _, _) in enumerate(valid):
+        theme = themes[index]
+        title_case_name = "".join(word.capitalize() for word in theme["name"].split("_"))
+        variants = []
+        if theme["mode"] in ["dark", "adaptive"]:
+            variants.append((theme["name"], theme["mode"], palettes))
+        if theme["mode"] == "light":
+            variants.append((theme["name"], "light", light_palettes))
+        if theme["mode"] == "adaptive":
+            variants.append((f"{theme['name']}-light", "light", light_palettes))
+            
+        for file_name, mode, source in variants:
+            palette = {name: format_color(values[row]) for name, values in source.items()}
+            content = render_theme(template, title_case_name, mode, palette)
+            write_theme(colors_dir / f"{file_name}.conf", content, write_output)
+        results[index] = colors_dir / f"{theme['name']}.conf"
         
-    # Update secondary color if provided
-    if secondary_color:
-        content = re.sub(
-            r'\$accent-secondary = .*?#.*$',
-            f'$accent-secondary = {secondary_color}   # Secondary accent',
-            content,
-            flags=re.MULTILINE
+    return results
+
+def derive_light_themes(colors_dir, write_output=None):
+    """
+    Write a `<name>-light.conf` counterpart for every dark theme in colors_dir
+    
+    All themes are converted in one batched pass. Themes that are already
+    light (by `$current-theme` or a `-light` name) are skipped.
+    
+    Args:
+        colors_dir: Directory containing color files
+        write_output: Installer write helper (optional, skips unchanged files)
+        
+    Returns:
+        list: Paths of the light theme files
+    """
+    sources = []
+    for theme_file in sorted(colors_dir.glob("*.conf")):
+        if theme_file.stem.endswith("-light"):
+            continue
+        text = theme_file.read_text()
+        if re.search(r'^\$current-theme\s*=\s*"light"', text, re.MULTILINE):
+            continue
+        sources.append((theme_file, text))
+        
+    if not sources:
+        return []
+        
+    light_palettes = derive_light_palettes(read_palettes([text for _, text in sources]))
+    light_files = []
+    for row, (theme_file, text) in enumerate(sources):
+        # Variables a theme doesn't define are NaN and stay out of its light file
+        palette = {name: format_color(values[row]) for name, values in light_palettes.items()
+                   if not np.isnan(values[row]).any()}
+        title = re.search(r"^# HyprNova (.*?)Theme - ", text)
+        title_case_name = title.group(1).strip() if title and title.group(1).strip() else "".join(
+            word.capitalize() for word in theme_file.stem.split("_")
         )
+        content = render_theme(text, f"{title_case_name} Light", "light", palette)
+        light_file = colors_dir / f"{theme_file.stem}-light.conf"
+        write_theme(light_file, content, write_output)
+        light_files.append(light_file)
         
-    # Write theme file
-    with open(theme_file, "w") as f:
-        f.write(content)
+    return light_files
+
+def create_theme(colors_dir, name, theme_mode, primary_color=None, secondary_color=None, write_output=None):
+    """
+    Create a new theme based on the default colors
+    
+    Args:
+        colors_dir: Directory containing color files
+        name: Theme name (without extension)
+        theme_mode: Theme mode (dark, light or adaptive)
+        primary_color: Primary accent color (RGB format, optional)
+        secondary_color: Secondary accent color (RGB format, optional)
+        write_output: Installer write helper (optional, skips unchanged files)
         
-    return theme_file
+    Returns:
+        Path: Path to the created theme file, or None if failed
+    """
+    theme = {"name": name, "mode": theme_mode, "primary": primary_color, "secondary": secondary_color}
+    return create_themes(colors_dir, [theme], write_output)[0]
 
 def install(context: Dict[str, Any]) -> bool:
     """
@@ -126,21 +903,28 @@ def install(context: Dict[str, Any]) -> bool:
         }
     ]
     
-    # Create example themes
-    for theme in themes:
-        theme_file = create_theme(
-            colors_dir,
-            theme["name"],
-            theme["mode"],
-            theme["primary"],
-            theme["secondary"]
-        )
+    if np is None:
+        # The existing themes still install; only new palettes need NumPy
+        logger.warning("NumPy is not installed; skipping the example themes")
+        if getattr(args, "derive_light", False):
+            logger.error("--derive-light requires NumPy")
+            return False
+        logger.info("Theme generator component installed successfully")
+        return True
         
+    # Create example themes in one batch
+    theme_files = create_themes(colors_dir, themes, context["write_output"])
+    for theme, theme_file in zip(themes, theme_files):
         if theme_file:
             logger.info(f"Created example theme: {theme_file}")
         else:
             logger.warning(f"Failed to create example theme: {theme['name']}")
             
+    # Derive light counterparts of every dark theme if requested
+    if getattr(args, "derive_light", False):
+        for light_file in derive_light_themes(colors_dir, context["write_output"]):
+            logger.info(f"Derived light theme: {light_file}")
+            
     logger.info("Theme generator component installed successfully")
     return True
 
@@ -151,7 +935,7 @@ def generate_theme(context, name, mode="dark", primary=None, secondary=None):
     Args:
         context: Installation context
         name: Theme name
-        mode: Theme mode (dark or light)
+        mode: Theme mode (dark, light or adaptive)
         primary: Primary accent color
         secondary: Secondary accent color
         
@@ -163,11 +947,65 @@ def generate_theme(context, name, mode="dark", primary=None, secondary=None):
     
     logger.info(f"Generating theme: {name}")
     
-    theme_file = create_theme(colors_dir, name, mode, primary, secondary)
-    
+    try:
+        theme_file = create_theme(colors_dir, name, mode, primary, secondary, context.get("write_output"))
+    except ImportError:
+        logger.error("Generating themes requires NumPy")
+        return None
+        
     if theme_file:
         logger.info(f"Theme generated successfully: {theme_file}")
         return theme_file
     else:
         logger.error(f"Failed to generate theme: {name}")
         return None
+
+def generate_theme_from_image(context, image_path, name=None, mode="dark", force=False):
+    """
+    Generate a theme from the dominant colors of an image
+    
+    Existing themes are never replaced unless `force` is set, so naming the
+    result after one (e.g. `--theme default`) can't silently clobber it.
+    
+    Args:
+        context: Installation context
+        image_path: Path to the wallpaper
+        name: Theme name (default: derived from the file name)
+        mode: Theme mode (dark, light or adaptive)
+        force: Replace existing theme files (they are backed up first)
+        
+    Returns:
+        Path: Path to the created theme file, or None if failed
+    """
+    logger = context["logger"]
+    colors_dir = context["colors_dir"]
+    image_path = Path(image_path).expanduser()
+    name = name or re.sub(r"[^a-z0-9]+", "_", image_path.stem.lower()).strip("_") or "wallpaper"
+    
+    targets = [colors_dir / f"{name}.conf"] + ([colors_dir / f"{name}-light.conf"] if mode == "adaptive" else [])
+    existing = [path for path in targets if path.exists()]
+    if existing and not force:
+        logger.error(f"Theme already exists: {existing[0]} (use --force to replace it, or pick another --theme)")
+        return None
+        
+    logger.info(f"Extracting colors from {image_path}")
+    try:
+        with context["trace"]("extract colors", path=str(image_path)):
+            seeds = extract_wallpaper_seeds(image_path, context.get("cache_dir"))
+    except ImportError as e:
+        logger.error(f"Generating themes from images requires {'NumPy' if e.name == 'numpy' else 'Pillow'}")
+        return None
+    except OSError as e:
+        logger.error(f"Failed to read image {image_path}: {e}")
+        return None
+        
+    logger.debug(f"Dominant colors: {', '.join(color for color, _ in seeds['colors'])}")
+    theme = {key: value for key, value in seeds.items() if key != "colors"}
+    theme.update({"name": name, "mode": mode})
+    theme_file = create_themes(colors_dir, [theme], context.get("write_output"))[0]
+    
+    if theme_file:
+        logger.info(f"Theme generated successfully: {theme_file}")
+    else:
+        logger.error(f"Failed to generate theme: {name}")
+    return theme_file
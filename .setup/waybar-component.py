@@ -4,49 +4,201 @@ HyprNova Waybar Component Installer
 """
 
 import os
+import re
 import subprocess
+from fnmatch import fnmatchcase
 from pathlib import Path
 import shutil
 import tempfile
-from typing import Dict, Any
+import hashlib
+from typing import Dict, Any, List, Optional
 import json
 
-def process_template(template_path, output_path, color_vars, additional_vars=None):
+# Resources this component needs before it runs, and the ones it makes available
+REQUIRES = []
+PROVIDES = ["waybar"]
+
+# Bump to drop cached module parses when their format changes
+MODULE_CACHE_VERSION = 1
+
+# Where modules go when the repo has no waybar/layout.jsonc. Each position lists
+# names or patterns; a module goes to the first pattern it matches, in file
+# order. Plain names are always placed, so built-in modules need no file.
+DEFAULT_LAYOUT = {
+    "bar": {"layer": "top", "position": "top", "height": 32},
+    "modules-left": ["hyprland/workspaces", "*workspaces*"],
+    "modules-center": ["clock", "*clock*"],
+    "modules-right": ["*pulseaudio*", "*backlight*", "*battery*", "*", "tray"],
+}
+LAYOUT_POSITIONS = ["modules-left", "modules-center", "modules-right"]
+
+# Strings, comments, and the characters that can end a trailing comma
+JSONC_TOKEN = re.compile(r'"(?:[^"\\\n]|\\.)*"|//[^\n]*|/\*[\s\S]*?\*/|[,}\]]')
+
+class JsoncError(ValueError):
+    """A JSONC file failed to parse or validate; the message starts with file:line"""
+
+def jsonc_to_json(text: str) -> str:
     """
-    Process a template file with color variables
+    Turn JSONC into JSON in a single pass
     
-    Args:
-        template_path: Path to the template file
-        output_path: Path to write the processed file
-        color_vars: Dictionary of color variables
-        additional_vars: Dictionary of additional variables (optional)
+    Comments become spaces (newlines are kept) and trailing commas are
+    dropped, so line and column numbers in JSON errors still match the source.
+    """
+    out = []
+    trailing_comma = None
+    pos = 0
+    for match in JSONC_TOKEN.finditer(text):
+        gap = text[pos:match.start()]
+        out.append(gap)
+        if gap.strip():
+            trailing_comma = None
+        token = match.group(0)
+        pos = match.end()
+        
+        if token[0] == "/":
+            out.append(re.sub(r"[^\n]", " ", token))
+        elif token == ",":
+            trailing_comma = len(out)
+            out.append(token)
+        else:
+            if token in "}]" and trailing_comma is not None:
+                out[trailing_comma] = " "
+            trailing_comma = None
+            out.append(token)
+    out.append(text[pos:])
+    return "".join(out)
+
+def parse_jsonc(text: str, source: str) -> Any:
+    """Parse JSONC text, raising JsoncError with `source:line:column` on failure"""
+    try:
+        return json.loads(jsonc_to_json(text))
+    except json.JSONDecodeError as e:
+        raise JsoncError(f"{source}:{e.lineno}:{e.colno}: {e.msg}") from None
+
+def parse_module_file(text: str, source: str) -> Dict[str, Any]:
+    """
+    Parse a module file into its module definitions
+    
+    Files hold either a complete object or bare `"name": {...},` members,
+    which are wrapped in braces (on the first line, so line numbers hold).
     
     Returns:
-        bool: True if successful, False otherwise
+        dict: "modules" (name to definition) and "lines" (name to the line defining it)
     """
-    if not template_path.exists():
-        return False
+    stripped = jsonc_to_json(text).lstrip()
+    modules = parse_jsonc(text if stripped.startswith("{") else "{" + text + "\n}", source)
+    if not isinstance(modules, dict):
+        raise JsoncError(f"{source}:1: expected an object of modules")
         
-    # Create output directory if it doesn't exist
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    lines = {}
+    for name, definition in modules.items():
+        offset = text.find(json.dumps(name))
+        lines[name] = text.count("\n", 0, offset) + 1 if offset >= 0 else 1
+        if not isinstance(definition, dict):
+            raise JsoncError(f"{source}:{lines[name]}: module {name} must be an object")
+    return {"modules": modules, "lines": lines}
+
+def load_module_files(module_files: List[Path], cache_dir: Optional[Path], logger) -> List[tuple]:
+    """
+    Parse module files, reusing cached results for files whose contents haven't changed
+    
+    Files are matched to the cache by size and mtime first and by content
+    hash otherwise, so only new or edited files are parsed.
     
-    # Read template file
-    with open(template_path, "r") as f:
-        content = f.read()
+    Returns:
+        list: (path, parsed module file) for every file that parsed
+    """
+    cache_file = cache_dir / "waybar-modules.json" if cache_dir else None
+    cache = {"version": MODULE_CACHE_VERSION, "files": {}, "parsed": {}}
+    if cache_file and cache_file.exists():
+        try:
+            with open(cache_file, "r") as f:
+                stored = json.load(f)
+            if stored.get("version") == MODULE_CACHE_VERSION:
+                cache = stored
+        except (OSError, ValueError):
+            pass
+            
+    loaded = []
+    used = set()
+    parsed_count = 0
+    for module_file in module_files:
+        stat = module_file.stat()
+        entry = cache["files"].get(str(module_file))
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            digest = entry["hash"]
+            text = None
+        else:
+            data = module_file.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            text = data.decode()
+            
+        parsed = cache["parsed"].get(digest)
+        if parsed is None:
+            if text is None:
+                text = module_file.read_text()
+            try:
+                parsed = parse_module_file(text, str(module_file))
+            except JsoncError as e:
+                logger.warning(f"Skipping Waybar module file: {e}")
+                continue
+            cache["parsed"][digest] = parsed
+            parsed_count += 1
+            
+        cache["files"][str(module_file)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+        used.add(digest)
+        loaded.append((module_file, parsed))
         
-    # Replace variables
-    for var_name, var_value in color_vars.items():
-        content = content.replace(f"${var_name}", var_value)
+    logger.debug(f"Parsed {parsed_count} of {len(module_files)} Waybar module files")
+    if cache_file:
+        # Forget files that are gone and parses nothing refers to anymore
+        cache["files"] = {path: entry for path, entry in cache["files"].items() if Path(path).exists()}
+        live = used | {entry["hash"] for entry in cache["files"].values()}
+        cache["parsed"] = {digest: parsed for digest, parsed in cache["parsed"].items() if digest in live}
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_file.with_name(f".{cache_file.name}.{os.getpid()}")
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_file)
+    return loaded
+
+def assemble_config(layout: Dict[str, Any], module_files: List[tuple], logger) -> Dict[str, Any]:
+    """
+    Build a Waybar config from parsed module files and a declarative layout
+    
+    Args:
+        layout: Bar settings under "bar" and name patterns per position
+        module_files: (path, parsed module file) pairs in file order
+        logger: Logger for duplicate definitions
         
-    if additional_vars:
-        for var_name, var_value in additional_vars.items():
-            content = content.replace(f"${var_name}", str(var_value))
+    Returns:
+        dict: The Waybar config
+    """
+    config = dict(layout.get("bar", {}))
+    defined = {}
+    for module_file, parsed in module_files:
+        for name, definition in parsed["modules"].items():
+            location = f"{module_file}:{parsed['lines'][name]}"
+            if name in defined:
+                logger.warning(f"{location}: module {name} already defined at {defined[name]}, keeping the first")
+                continue
+            defined[name] = location
+            config[name] = definition
             
-    # Write output file
-    with open(output_path, "w") as f:
-        f.write(content)
-        
-    return True
+    placed = set()
+    for position in LAYOUT_POSITIONS:
+        config[position] = []
+        for pattern in layout.get(position, []):
+            if not any(char in pattern for char in "*?["):
+                matches = [pattern]
+            else:
+                matches = [name for name in defined if fnmatchcase(name, pattern)]
+            for name in matches:
+                if name not in placed:
+                    placed.add(name)
+                    config[position].append(name)
+    return config
 
 def install(context: Dict[str, Any]) -> bool:
     """
@@ -62,13 +214,13 @@ def install(context: Dict[str, Any]) -> bool:
     repo_root = context["repo_root"]
     config_dir = context["config_dir"]
     color_vars = context["color_vars"]
-    create_backup = context["create_backup"]
+    write_output = context["write_output"]
+    render_template = context["render_template"]
     
     logger.info("Installing Waybar configuration...")
     
-    # Create Waybar config directory
+    # Waybar config directory (created on first write)
     waybar_dir = config_dir / "waybar"
-    waybar_dir.mkdir(parents=True, exist_ok=True)
     
     # Additional variables for templates
     additional_vars = {
@@ -125,8 +277,7 @@ def install(context: Dict[str, Any]) -> bool:
     
     if config_template.exists():
         logger.info(f"Processing Waybar config template: {config_template}")
-        create_backup(config_output)
-        success = process_template(config_template, config_output, color_vars, additional_vars)
+        success = render_template(config_template, config_output, additional_vars)
         if success:
             logger.info(f"Generated Waybar config: {config_output}")
         else:
@@ -141,61 +292,24 @@ def install(context: Dict[str, Any]) -> bool:
         # Create consolidated config from module files
         modules_dir = repo_root / "waybar" / "modules"
         if modules_dir.exists():
-            # Basic config structure
-            config = {
-                "layer": "top",
-                "position": "top",
-                "height": 32,
-                "modules-left": ["hyprland/workspaces"],
-                "modules-center": ["clock"],
-                "modules-right": ["tray"],
-            }
-            
-            # Add modules
-            for module_file in modules_dir.glob("*.jsonc"):
+            layout = DEFAULT_LAYOUT
+            layout_file = repo_root / "waybar" / "layout.jsonc"
+            if layout_file.exists():
                 try:
-                    module_name = module_file.stem
-                    if module_name.endswith("##"):
-                        # Skip alternate versions
-                        continue
-                        
-                    with open(module_file, "r") as f:
-                        module_content = f.read()
-                        
-                    # Clean up the module content (remove trailing commas, etc.)
-                    module_content = module_content.strip()
-                    if module_content.endswith(","):
-                        module_content = module_content[:-1]
-                        
-                    # Parse module content
-                    module_json = json.loads("{" + module_content + "}")
-                    
-                    # Add module to config
-                    config.update(module_json)
-                    
-                    # Add module to appropriate section
-                    if "battery" in module_name or "backlight" in module_name or "pulseaudio" in module_name:
-                        if module_name not in config["modules-right"]:
-                            config["modules-right"].insert(0, module_name)
-                    elif "workspaces" in module_name:
-                        if module_name not in config["modules-left"]:
-                            config["modules-left"].insert(0, module_name)
-                    elif "clock" in module_name:
-                        if module_name not in config["modules-center"]:
-                            config["modules-center"].insert(0, module_name)
-                    else:
-                        if module_name not in config["modules-right"]:
-                            config["modules-right"].append(module_name)
-                            
-                except Exception as e:
-                    logger.warning(f"Error processing module {module_file}: {e}")
+                    layout = parse_jsonc(layout_file.read_text(), str(layout_file))
+                except JsoncError as e:
+                    logger.error(f"Invalid Waybar layout: {e}")
+                    return False
                     
+            # Skip alternate versions
+            module_files = sorted(path for path in modules_dir.glob("*.jsonc") if not path.stem.endswith("##"))
+            loaded = load_module_files(module_files, context.get("cache_dir"), logger)
+            config = assemble_config(layout, loaded, logger)
+            
             # Write consolidated config
-            create_backup(config_output)
-            with open(config_output, "w") as f:
-                json.dump(config, f, indent=4)
+            write_output(config_output, json.dumps(config, indent=4))
                 
-            logger.info(f"Created consolidated Waybar config: {config_output}")
+            logger.info(f"Created consolidated Waybar config from {len(loaded)} module files: {config_output}")
         else:
             logger.warning(f"Waybar modules directory not found at {modules_dir}")
             
@@ -205,8 +319,7 @@ def install(context: Dict[str, Any]) -> bool:
     
     if style_template.exists():
         logger.info(f"Processing Waybar style template: {style_template}")
-        create_backup(style_output)
-        success = process_template(style_template, style_output, color_vars, additional_vars)
+        success = render_template(style_template, style_output, additional_vars)
         if success:
             logger.info(f"Generated Waybar style: {style_output}")
         else:
@@ -224,13 +337,13 @@ def install(context: Dict[str, Any]) -> bool:
  */
 
 :root {
-    --background: ${background};
-    --background-alt: ${background-alt};
-    --foreground: ${foreground};
-    --accent-primary: ${accent-primary};
-    --accent-secondary: ${accent-secondary};
-    --accent-warning: ${accent-warning};
-    --accent-danger: ${accent-danger};
+    --background: ${background}|css;
+    --background-alt: ${background-alt}|css;
+    --foreground: ${foreground}|css;
+    --accent-primary: ${accent-primary}|css;
+    --accent-secondary: ${accent-secondary}|css;
+    --accent-warning: ${accent-warning}|css;
+    --accent-danger: ${accent-danger}|css;
 }
 
 * {
@@ -241,25 +354,25 @@ def install(context: Dict[str, Any]) -> bool:
 }
 
 window#waybar {
-    background-color: ${background-80};
-    color: ${foreground};
+    background-color: ${background-80}|css;
+    color: ${foreground}|css;
 }
 
 #workspaces button {
     padding: 0 5px;
     background-color: transparent;
-    color: ${foreground};
+    color: ${foreground}|css;
     transition: all 0.3s;
 }
 
 #workspaces button.active {
-    background-color: ${accent-primary};
-    color: ${background};
+    background-color: ${accent-primary}|css;
+    color: ${background}|css;
 }
 
 #workspaces button.urgent {
-    background-color: ${accent-danger};
-    color: ${background};
+    background-color: ${accent-danger}|css;
+    color: ${background}|css;
 }
 
 #clock,
@@ -274,33 +387,44 @@ window#waybar {
 #custom-power,
 #tray {
     padding: 0 10px;
-    color: ${foreground};
-    background-color: ${background-alt-80};
+    color: ${foreground}|css;
+    background-color: ${background-alt-80}|css;
     border-radius: 8px;
     margin: 6px 3px;
 }
 
 #battery.warning {
-    background-color: ${accent-warning};
-    color: ${background};
+    background-color: ${accent-warning}|css;
+    color: ${background}|css;
 }
 
 #battery.critical {
-    background-color: ${accent-danger};
-    color: ${background};
+    background-color: ${accent-danger}|css;
+    color: ${background}|css;
 }
 """
         
-        # Replace variables
-        for var_name, var_value in color_vars.items():
-            basic_style = basic_style.replace(f"${{{var_name}}}", var_value)
-            
-        # Write basic style
-        create_backup(style_output)
-        with open(style_output, "w") as f:
-            f.write(basic_style)
+        # Render basic style (skipped when the cached output is current)
+        render_template(basic_style, style_output)
             
         logger.info(f"Created basic Waybar style: {style_output}")
         
     logger.info("Waybar configuration installed successfully")
     return True
+
+def reload(context: Dict[str, Any]) -> bool:
+    """
+    Ask a running Waybar to reload its config and style
+    
+    Args:
+        context: Reload context containing the logger and the changed files
+        
+    Returns:
+        bool: True if a running Waybar was signalled, False otherwise
+    """
+    try:
+        result = subprocess.run(["pkill", "-SIGUSR2", "-x", "waybar"], capture_output=True, timeout=5)
+    except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+        context["logger"].debug(f"Could not reload Waybar: {e}")
+        return False
+    return result.returncode == 0